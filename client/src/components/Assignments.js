@@ -7,6 +7,7 @@ function Assignments() {
   const [assignments, setAssignments] = useState([]);
   const [officers, setOfficers] = useState([]);
   const [reports, setReports] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [editingAssignment, setEditingAssignment] = useState(null);
   const [editForm, setEditForm] = useState({});
 
@@ -28,14 +29,27 @@ function Assignments() {
         reportsRes.json()
       ]);
 
-      setAssignments(assignmentsData);
-      setOfficers(officersData);
-      setReports(reportsData);
+      setAssignments(assignmentsData.items);
+      setNextCursor(assignmentsData.next_cursor);
+      // Only the first page of each, for the edit form's choices
+      setOfficers(officersData.items);
+      setReports(reportsData.items);
     } catch (error) {
       console.error('Error fetching data:', error);
     }
   };
 
+  const loadMore = async () => {
+    try {
+      const response = await fetch(`/assignments?cursor=${encodeURIComponent(nextCursor)}`);
+      const data = await response.json();
+      setAssignments([...assignments, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching assignments:', error);
+    }
+  };
+
   const handleDelete = async (assignmentId) => {
     if (!window.confirm('Are you sure you want to delete this assignment?')) return;
 
@@ -83,15 +97,11 @@ function Assignments() {
     }
   };
 
-  const getOfficerName = (officerId) => {
-    const officer = officers.find(off => off.id === officerId);
-    return officer ? officer.name : 'Unknown Officer';
-  };
-
-  const getReportTitle = (reportId) => {
-    const report = reports.find(rep => rep.id === reportId);
-    return report ? report.title : 'Unknown Report';
-  };
+  // Assignments embed their officer and report, which may not be on the
+  // first page of either list
+  const withCurrent = (items, current) => (
+    current && !items.some(item => item.id === current.id) ? [current, ...items] : items
+  );
 
   if (!user) {
     return <div>Please log in to view assignments.</div>;
@@ -143,7 +153,7 @@ function Assignments() {
                           onChange={(e) => setEditForm({...editForm, officer_id: parseInt(e.target.value)})}
                           className="w-full px-3 py-2 border border-slate-300 rounded-md"
                         >
-                          {officers.map(officer => (
+                          {withCurrent(officers, assignment.officer).map(officer => (
                             <option key={officer.id} value={officer.id}>
                               {officer.name}
                             </option>
@@ -156,7 +166,7 @@ function Assignments() {
                           onChange={(e) => setEditForm({...editForm, crime_report_id: parseInt(e.target.value)})}
                           className="w-full px-3 py-2 border border-slate-300 rounded-md"
                         >
-                          {reports.map(report => (
+                          {withCurrent(reports, assignment.crime_report).map(report => (
                             <option key={report.id} value={report.id}>
                               {report.title}
                             </option>
@@ -197,12 +207,12 @@ function Assignments() {
                     <>
                       <td className="px-6 py-4">
                         <div className="text-sm font-medium text-slate-900">
-                          {getOfficerName(assignment.officer_id)}
+                          {assignment.officer ? assignment.officer.name : 'Unknown Officer'}
                         </div>
                       </td>
                       <td className="px-6 py-4">
                         <div className="text-sm text-slate-900">
-                          {getReportTitle(assignment.crime_report_id)}
+                          {assignment.crime_report ? assignment.crime_report.title : 'Unknown Report'}
                         </div>
                       </td>
                       <td className="px-6 py-4">
@@ -238,6 +248,14 @@ function Assignments() {
             </tbody>
           </table>
 
+          {nextCursor && (
+            <div className="p-4 text-center">
+              <button onClick={loadMore} className="btn btn-sm btn-secondary">
+                Load more
+              </button>
+            </div>
+          )}
+
           {assignments.length === 0 && (
             <div className="text-center py-8 text-slate-500">
               No assignments found. <Link to="/assignments/new" className="text-primary-600 hover:text-primary-700">Create one</Link>
@@ -1,39 +1,48 @@
 import React, { useState, useEffect, useContext } from "react";
 import { Link } from "react-router-dom";
 import { AuthContext } from "../context/AuthContext";
+import { useDebounce } from "../hooks/useDebounce";
 
 function CrimeReports() {
   const { user } = useContext(AuthContext);
   const [reports, setReports] = useState([]);
   const [categories, setCategories] = useState([]);
-  const [assignments, setAssignments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [filters, setFilters] = useState({ status: '', category_id: '' });
+  const [searchTerm, setSearchTerm] = useState('');
+  const debouncedSearchTerm = useDebounce(searchTerm, 300);
   const [selectedReport, setSelectedReport] = useState(null);
   const [editingReport, setEditingReport] = useState(null);
   const [editForm, setEditForm] = useState({});
 
   useEffect(() => {
-    fetchData();
+    fetch('/categories')
+      .then(res => res.json())
+      .then(data => setCategories(data))
+      .catch(error => console.error('Error fetching categories:', error));
   }, []);
 
-  const fetchData = async () => {
-    try {
-      const [reportsRes, categoriesRes, assignmentsRes] = await Promise.all([
-        fetch('/reports'),
-        fetch('/categories'),
-        fetch('/assignments')
-      ]);
+  useEffect(() => {
+    fetchReports();
+  }, [filters, debouncedSearchTerm]);
 
-      const [reportsData, categoriesData, assignmentsData] = await Promise.all([
-        reportsRes.json(),
-        categoriesRes.json(),
-        assignmentsRes.json()
-      ]);
+  const fetchReports = async (cursor = null) => {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value) params.append(key, value);
+    });
+    if (cursor) params.append('cursor', cursor);
+    const query = debouncedSearchTerm.trim();
+    if (query) params.append('q', query);
+
+    try {
+      const response = await fetch(`${query ? '/reports/search' : '/reports'}?${params.toString()}`);
+      const data = await response.json();
 
-      setReports(reportsData);
-      setCategories(categoriesData);
-      setAssignments(assignmentsData);
+      setReports(cursor ? [...reports, ...data.items] : data.items);
+      setNextCursor(data.next_cursor);
     } catch (error) {
-      console.error('Error fetching data:', error);
+      console.error('Error fetching reports:', error);
     }
   };
 
@@ -88,8 +97,8 @@ function CrimeReports() {
     }
   };
 
-  const getReportAssignments = (reportId) => {
-    return assignments.filter(assignment => assignment.crime_report_id === reportId);
+  const getReportAssignments = (report) => {
+    return report.assignments || [];
   };
 
   const getCategoryName = (categoryId) => {
@@ -123,6 +132,35 @@ function CrimeReports() {
         <div className="bg-white rounded-lg shadow-sm border border-slate-200">
           <div className="p-6 border-b border-slate-200">
             <h2 className="text-xl font-semibold text-slate-900">All Reports</h2>
+            <input
+              type="text"
+              placeholder="Search title, description or location..."
+              value={searchTerm}
+              onChange={(e) => setSearchTerm(e.target.value)}
+              className="w-full mt-4 px-3 py-2 border border-slate-300 rounded-md text-sm"
+            />
+            <div className="flex gap-2 mt-4">
+              <select
+                value={filters.status}
+                onChange={(e) => setFilters({...filters, status: e.target.value})}
+                className="px-3 py-2 border border-slate-300 rounded-md text-sm"
+              >
+                <option value="">All statuses</option>
+                <option value="open">Open</option>
+                <option value="pending">Pending</option>
+                <option value="closed">Closed</option>
+              </select>
+              <select
+                value={filters.category_id}
+                onChange={(e) => setFilters({...filters, category_id: e.target.value})}
+                className="px-3 py-2 border border-slate-300 rounded-md text-sm"
+              >
+                <option value="">All categories</option>
+                {categories.map(category => (
+                  <option key={category.id} value={category.id}>{category.name}</option>
+                ))}
+              </select>
+            </div>
           </div>
           <div className="divide-y divide-slate-200 max-h-96 overflow-y-auto">
             {reports.map(report => (
@@ -146,6 +184,16 @@ function CrimeReports() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <button
+                  onClick={() => fetchReports(nextCursor)}
+                  className="btn btn-sm btn-secondary"
+                >
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         </div>
 
@@ -256,13 +304,13 @@ function CrimeReports() {
                   <div>
                     <h4 className="font-medium text-slate-700 mb-2">Assigned Officers</h4>
                     <div className="space-y-2">
-                      {getReportAssignments(selectedReport.id).map(assignment => (
+                      {getReportAssignments(selectedReport).map(assignment => (
                         <div key={assignment.id} className="bg-slate-50 p-3 rounded">
                           <p className="font-medium">{assignment.officer.name}</p>
                           <p className="text-sm text-slate-600">{assignment.role_in_case}</p>
                         </div>
                       ))}
-                      {getReportAssignments(selectedReport.id).length === 0 && (
+                      {getReportAssignments(selectedReport).length === 0 && (
                         <p className="text-slate-500 text-sm">No officers assigned</p>
                       )}
                     </div>
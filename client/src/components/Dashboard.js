@@ -2,6 +2,9 @@ import React, { useState, useEffect, useContext } from "react";
 import { Link } from "react-router-dom";
 import { AuthContext } from "../context/AuthContext";
 
+// Events arriving within this window share one refetch
+const REFRESH_DELAY_MS = 1500;
+
 function Dashboard() {
   const { user } = useContext(AuthContext);
   const [stats, setStats] = useState({
@@ -18,32 +21,51 @@ function Dashboard() {
     }
   }, [user]);
 
+  // Refresh when reports or assignments change instead of polling, once
+  // per burst of events rather than once per event
+  useEffect(() => {
+    if (!user) return;
+    const source = new EventSource('/events');
+    let timer = null;
+    const refresh = () => {
+      if (timer) return;
+      timer = setTimeout(() => {
+        timer = null;
+        fetchDashboardData();
+      }, REFRESH_DELAY_MS);
+    };
+    ['created', 'updated', 'deleted'].forEach(type => {
+      source.addEventListener(`reports.${type}`, refresh);
+      source.addEventListener(`assignments.${type}`, refresh);
+    });
+    source.addEventListener('overflow', refresh);
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, [user]);
+
   const fetchDashboardData = async () => {
     try {
-      const [reportsRes, officersRes, assignmentsRes] = await Promise.all([
-        fetch('/reports'),
-        fetch('/officers'),
-        fetch('/assignments')
+      const [statsRes, reportsRes] = await Promise.all([
+        fetch('/stats'),
+        fetch('/reports?limit=5')
       ]);
 
-      const [reports, officers, assignments] = await Promise.all([
-        reportsRes.json(),
-        officersRes.json(),
-        assignmentsRes.json()
+      const [statsData, reportsData] = await Promise.all([
+        statsRes.json(),
+        reportsRes.json()
       ]);
 
       setStats({
-        totalReports: reports.length,
-        openReports: reports.filter(r => r.status === 'open').length,
-        totalOfficers: officers.length,
-        totalAssignments: assignments.length
+        totalReports: statsData.total_reports,
+        openReports: statsData.open_reports,
+        totalOfficers: statsData.total_officers,
+        totalAssignments: statsData.total_assignments
       });
 
-      // Get 5 most recent reports
-      const sortedReports = reports
-        .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))
-        .slice(0, 5);
-      setRecentReports(sortedReports);
+      // Reports come back newest first
+      setRecentReports(reportsData.items);
 
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
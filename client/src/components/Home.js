@@ -15,26 +15,21 @@ function Home() {
 
   useEffect(() => {
     Promise.all([
-      fetch("/reports"),
-      fetch("/assignments"),
-      fetch("/officers"),
+      fetch("/stats"),
+      fetch("/reports?limit=5"),
     ])
       .then((responses) => Promise.all(responses.map((r) => r.json())))
-      .then(([reports, assignments, officers]) => {
-        const openReports = reports.filter((r) => r.status === "open").length;
-        const pendingReports = reports.filter((r) => r.status === "pending").length;
-        const closedReports = reports.filter((r) => r.status === "closed").length;
-
+      .then(([statsData, reportsData]) => {
         setStats({
-          totalReports: reports.length,
-          openReports,
-          pendingReports,
-          closedReports,
-          totalOfficers: officers.length,
-          totalAssignments: assignments.length,
+          totalReports: statsData.total_reports,
+          openReports: statsData.open_reports,
+          pendingReports: statsData.pending_reports,
+          closedReports: statsData.closed_reports,
+          totalOfficers: statsData.total_officers,
+          totalAssignments: statsData.total_assignments,
         });
 
-        setRecentReports(reports.slice(0, 5));
+        setRecentReports(reportsData.items);
       })
       .catch((error) => console.error("Error fetching data:", error));
   }, []);
@@ -16,33 +16,55 @@ const validationSchema = Yup.object({
 function NewAssignment() {
   const { user } = useContext(AuthContext);
   const history = useHistory();
-  const [officers, setOfficers] = useState([]);
+  const [recommended, setRecommended] = useState([]);
   const [reports, setReports] = useState([]);
+  // Next page of each status still to load; null once it is exhausted
+  const [cursors, setCursors] = useState({});
   const [submitError, setSubmitError] = useState("");
 
   useEffect(() => {
     fetchData();
   }, []);
 
-  const fetchData = async () => {
+  // Only open and pending reports can be assigned; the server filters them
+  const fetchData = async (pending = { open: null, pending: null }) => {
     try {
-      const [officersRes, reportsRes] = await Promise.all([
-        fetch('/officers'),
-        fetch('/reports')
-      ]);
-
-      const [officersData, reportsData] = await Promise.all([
-        officersRes.json(),
-        reportsRes.json()
-      ]);
-
-      setOfficers(officersData);
-      setReports(reportsData.filter(report => report.status !== 'closed'));
+      const pages = await Promise.all(Object.entries(pending).map(async ([status, cursor]) => {
+        const params = new URLSearchParams({ status });
+        if (cursor) params.append('cursor', cursor);
+        const response = await fetch(`/reports?${params.toString()}`);
+        return [status, await response.json()];
+      }));
+
+      const loaded = pages.flatMap(([, data]) => data.items);
+      setReports(previous => [...previous, ...loaded]
+        .sort((a, b) => new Date(b.created_at) - new Date(a.created_at)));
+      setCursors(previous => ({
+        ...previous,
+        ...Object.fromEntries(pages.map(([status, data]) => [status, data.next_cursor]))
+      }));
     } catch (error) {
       console.error('Error fetching data:', error);
     }
   };
 
+  const loadMoreReports = () => {
+    fetchData(Object.fromEntries(Object.entries(cursors).filter(([, cursor]) => cursor)));
+  };
+
+  // The least-loaded officers not already on the report, ranked server-side.
+  const fetchRecommended = async (reportId) => {
+    setRecommended([]);
+    if (!reportId) return;
+    try {
+      const response = await fetch(`/reports/${reportId}/recommended-officers?k=10`);
+      const data = await response.json();
+      setRecommended(data.items);
+    } catch (error) {
+      console.error('Error fetching recommended officers:', error);
+    }
+  };
+
   const handleSubmit = async (values, { setSubmitting }) => {
     setSubmitError("");
 
@@ -92,44 +114,55 @@ function NewAssignment() {
           validationSchema={validationSchema}
           onSubmit={handleSubmit}
         >
-          {({ isSubmitting }) => (
+          {({ isSubmitting, setFieldValue }) => (
             <Form>
               <div className="mb-4">
                 <label className="block text-sm font-medium text-slate-700 mb-2">
-                  Officer *
+                  Crime Report *
                 </label>
                 <Field
                   as="select"
-                  name="officer_id"
+                  name="crime_report_id"
+                  onChange={(e) => {
+                    setFieldValue("crime_report_id", e.target.value);
+                    setFieldValue("officer_id", "");
+                    fetchRecommended(e.target.value);
+                  }}
                   className="w-full px-3 py-2 border border-slate-300 rounded-md focus:outline-none focus:ring-2 focus:ring-primary-500"
                 >
-                  <option value="">Select an officer</option>
-                  {officers.map(officer => (
-                    <option key={officer.id} value={officer.id}>
-                      {officer.name} - {officer.badge_number} ({officer.rank})
+                  <option value="">Select a report</option>
+                  {reports.map(report => (
+                    <option key={report.id} value={report.id}>
+                      {report.title} - {report.location} ({report.status})
                     </option>
                   ))}
                 </Field>
-                <ErrorMessage name="officer_id" component="div" className="text-red-600 text-sm mt-1" />
+                <ErrorMessage name="crime_report_id" component="div" className="text-red-600 text-sm mt-1" />
+                {Object.values(cursors).some(cursor => cursor) && (
+                  <button type="button" onClick={loadMoreReports} className="btn btn-sm btn-secondary mt-2">
+                    Load more reports
+                  </button>
+                )}
               </div>
 
               <div className="mb-4">
                 <label className="block text-sm font-medium text-slate-700 mb-2">
-                  Crime Report *
+                  Officer *
                 </label>
                 <Field
                   as="select"
-                  name="crime_report_id"
+                  name="officer_id"
+                  disabled={recommended.length === 0}
                   className="w-full px-3 py-2 border border-slate-300 rounded-md focus:outline-none focus:ring-2 focus:ring-primary-500"
                 >
-                  <option value="">Select a report</option>
-                  {reports.map(report => (
-                    <option key={report.id} value={report.id}>
-                      {report.title} - {report.location} ({report.status})
+                  <option value="">Select a recommended officer</option>
+                  {recommended.map(officer => (
+                    <option key={officer.id} value={officer.id}>
+                      {officer.name} ({officer.rank}) - {officer.open_cases} open cases
                     </option>
                   ))}
                 </Field>
-                <ErrorMessage name="crime_report_id" component="div" className="text-red-600 text-sm mt-1" />
+                <ErrorMessage name="officer_id" component="div" className="text-red-600 text-sm mt-1" />
               </div>
 
               <div className="mb-6">
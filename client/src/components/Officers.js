@@ -8,30 +8,33 @@ import { AuthContext } from "../context/AuthContext";
 function Officers() {
   const { user } = useContext(AuthContext);
   const [officers, setOfficers] = useState([]);
-  const [assignments, setAssignments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
 
   const [selectedRole, setSelectedRole] = useState("all");
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedOfficer, setSelectedOfficer] = useState(null);
 
   useEffect(() => {
-    Promise.all([
-      fetch('/officers'),
-      fetch('/assignments'),
-
-    ])
-    .then(responses => Promise.all(responses.map(r => r.json())))
-    .then(([officersData, assignmentsData]) => {
-      setOfficers(officersData);
-      setAssignments(assignmentsData)
-    })
-    .catch(error=>console.error('Error Fetching data:',error));
-  },[]);
-
-  const getOfficerAssignments = (officerId) => {
-    return assignments.filter(assignment => assignment.officer_id === officerId);
+    fetchOfficers();
+  }, [selectedRole]);
+
+  const fetchOfficers = (cursor = null) => {
+    const params = new URLSearchParams();
+    if (selectedRole !== "all") params.append('role', selectedRole);
+    if (cursor) params.append('cursor', cursor);
+
+    fetch(`/officers?${params.toString()}`)
+      .then(res => res.json())
+      .then(data => {
+        setOfficers(cursor ? [...officers, ...data.items] : data.items);
+        setNextCursor(data.next_cursor);
+      })
+      .catch(error=>console.error('Error Fetching data:',error));
   };
 
+  // Each officer comes with all of their assignments
+  const getOfficerAssignments = (officer) => officer.assignments || [];
+
   if (!user) {
     return (
       <div className="text-center p-12 bg-white rounded-lg shadow-sm border border-slate-200 text-slate-600 text-lg">
@@ -40,13 +43,9 @@ function Officers() {
     );
   }
 
-  // Filter officers based on selected filters
+  // The role filter is applied by the server; search covers the loaded officers
   let filteredOfficers = officers;
 
-  if (selectedRole !== "all") {
-    filteredOfficers = filteredOfficers.filter(officer => officer.role === selectedRole);
-  }
-
   if (searchTerm) {
     filteredOfficers = filteredOfficers.filter(officer =>
       officer.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
@@ -98,12 +97,12 @@ function Officers() {
       </div>
 
       <div className="mb-6 text-slate-600 text-sm">
-        Showing {filteredOfficers.length} of {officers.length} officers
+        Showing {filteredOfficers.length} of {officers.length}{nextCursor ? '+' : ''} officers
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 mb-8">
         {filteredOfficers.map(officer => {
-          const officerAssignments = getOfficerAssignments(officer.id);
+          const officerAssignments = getOfficerAssignments(officer);
           return (
             <div
               key={officer.id}
@@ -148,6 +147,14 @@ function Officers() {
         })}
       </div>
 
+      {nextCursor && (
+        <div className="mb-8 text-center">
+          <button onClick={() => fetchOfficers(nextCursor)} className="btn btn-sm btn-secondary">
+            Load more
+          </button>
+        </div>
+      )}
+
       {filteredOfficers.length === 0 && (
         <div className="text-center p-12 bg-white rounded-lg shadow-sm border border-slate-200">
           <h3 className="text-xl font-semibold text-slate-900 mb-2">No officers found</h3>
@@ -205,7 +212,7 @@ function Officers() {
               <div className="mb-6">
                 <label className="block text-sm font-semibold text-slate-600 uppercase tracking-wide mb-2">Current Assignments:</label>
                 <div className="flex flex-col gap-3">
-                  {getOfficerAssignments(selectedOfficer.id).map(assignment => (
+                  {getOfficerAssignments(selectedOfficer).map(assignment => (
                     <div key={assignment.id} className="p-4 bg-slate-50 rounded-md border border-slate-200">
                       <div className="flex justify-between items-start gap-4">
                         <div className="flex-1">
@@ -224,7 +231,7 @@ function Officers() {
                       </div>
                     </div>
                   ))}
-                  {getOfficerAssignments(selectedOfficer.id).length === 0 && (
+                  {getOfficerAssignments(selectedOfficer).length === 0 && (
                     <p className="text-slate-600 text-center py-4">No current assignments</p>
                   )}
                 </div>
@@ -29,9 +29,9 @@ export const AuthProvider = ({ children }) => {
 
       if (response.ok) {
         // Fetch user details after successful login
-        const userResponse = await fetch('/officers');
+        const userResponse = await fetch(`/officers?email=${encodeURIComponent(email)}`);
         const officers = await userResponse.json();
-        const currentUser = officers.find(officer => officer.email === email);
+        const currentUser = officers.items[0];
 
         if (currentUser) {
           const userData = {
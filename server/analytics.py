@@ -0,0 +1,176 @@
+"""Daily report rollups and the /api/analytics/timeseries queries over them.
+
+report_rollups holds one count per (day filed, category, current status).
+Reports the session inserts, deletes or moves between statuses and
+categories adjust it when they flush, in the same transaction; bulk
+ingestion and bulk status changes apply their deltas explicitly. A trend
+chart over years of data reads a range of the rollups' primary key, at
+most a few rows per day, instead of scanning crime_reports.
+
+Statuses are current ones: the closed count for a day is how many of the
+reports filed that day have been closed since.
+
+Databases with reports written around the session are rebuilt with
+
+    python server/analytics.py
+"""
+from collections import Counter
+from datetime import time
+
+from sqlalchemy import Date, cast, delete, event, func, inspect, union_all
+
+from models import db, CrimeReport, ArchivedCrimeReport, ReportRollup
+from pagination import parse_date, parse_int
+
+GRANULARITIES = ("day", "week", "month")
+# group_by values and the key each adds to a point.
+DIMENSIONS = {
+    "status": ("status", ReportRollup.status),
+    "category": ("crime_category_id", ReportRollup.crime_category_id),
+}
+KEY_FIELDS = ("created_at", "crime_category_id", "status")
+
+
+def _day(column, dialect):
+    # SQLite casts '2026-10-17 09:00:00' AS DATE to the number 2026.
+    if dialect == "sqlite":
+        return func.date(column, type_=Date)
+    return cast(column, Date)
+
+
+def _period(granularity, dialect):
+    if granularity == "day":
+        return ReportRollup.day
+    if dialect == "sqlite":
+        # Weeks start on Monday, as date_trunc('week', ...) does in Postgres.
+        modifiers = ("weekday 0", "-6 days") if granularity == "week" else ("start of month",)
+        return func.date(ReportRollup.day, *modifiers, type_=Date)
+    return cast(func.date_trunc(granularity, ReportRollup.day), Date)
+
+
+def report_key(report, old=False):
+    """The (day, crime_category_id, status) rollup a report counts towards, before any unflushed change if `old`."""
+    attrs = inspect(report).attrs
+    created_at, category_id, status = (
+        attrs[name].history.deleted[0] if old and attrs[name].history.deleted else getattr(report, name)
+        for name in KEY_FIELDS
+    )
+    return created_at.date(), category_id, status
+
+
+def apply_deltas(connection, deltas):
+    """Add a Counter of rollup key -> change in count to report_rollups with one upsert."""
+    rows = [
+        {"day": day, "crime_category_id": category_id, "status": status, "count": n}
+        for (day, category_id, status), n in sorted(deltas.items())
+        if n
+    ]
+    if not rows:
+        return
+    # Imported here so a process only loads the dialect it talks to.
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(ReportRollup.__table__).values(rows)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=["day", "crime_category_id", "status"],
+        set_={"count": ReportRollup.__table__.c.count + stmt.excluded.count},
+    ))
+
+
+def rebuild_rollups():
+    """Recompute every rollup from live and archived reports with one GROUP BY."""
+    reports = union_all(*(
+        db.select(model.created_at, model.crime_category_id, model.status).where(model.created_at.is_not(None))
+        for model in (CrimeReport, ArchivedCrimeReport)
+    )).subquery()
+    day = _day(reports.c.created_at, db.engine.dialect.name)
+    db.session.execute(delete(ReportRollup.__table__))
+    db.session.execute(ReportRollup.__table__.insert().from_select(
+        ["day", "crime_category_id", "status", "count"],
+        db.select(day, reports.c.crime_category_id, reports.c.status, func.count())
+        .group_by(day, reports.c.crime_category_id, reports.c.status),
+    ))
+
+
+class ReportRollups:
+    def init_app(self, app, db):
+        event.listen(db.session, "after_flush", self._record_flush)
+
+    def _record_flush(self, session, flush_context):
+        deltas = Counter()
+        for obj in session.new:
+            if isinstance(obj, CrimeReport):
+                deltas[report_key(obj)] += 1
+        for obj in session.deleted:
+            if isinstance(obj, CrimeReport):
+                deltas[report_key(obj, old=True)] -= 1
+        for obj in session.dirty:
+            if isinstance(obj, CrimeReport):
+                old, new = report_key(obj, old=True), report_key(obj)
+                if old != new:
+                    deltas[old] -= 1
+                    deltas[new] += 1
+        apply_deltas(session.connection(), deltas)
+
+    def timeseries(self, args):
+        """Report counts per period, optionally split by status and/or category.
+
+        Periods with no reports are left out. created_from and created_to
+        bound the filing date like the list filters do, but in whole days:
+        a bound partway through a day takes in all of that day.
+        """
+        granularity = args.get("granularity", "day")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        group_by = [name for name in args.get("group_by", "").split(",") if name]
+        unknown = [name for name in group_by if name not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"group_by must be a comma-separated list of {', '.join(DIMENSIONS)}")
+
+        period = _period(granularity, db.engine.dialect.name).label("period")
+        dimensions = [DIMENSIONS[name][1].label(DIMENSIONS[name][0]) for name in dict.fromkeys(group_by)]
+        total = func.sum(ReportRollup.count)
+        stmt = (
+            db.select(period, *dimensions, total.label("count"))
+            .group_by(period, *dimensions)
+            .having(total != 0)
+            .order_by(period, *dimensions)
+        )
+
+        category_id = parse_int(args, "category_id")
+        if category_id is not None:
+            stmt = stmt.where(ReportRollup.crime_category_id == category_id)
+        status = args.get("status")
+        if status:
+            stmt = stmt.where(ReportRollup.status == status)
+        created_from = parse_date(args, "created_from")
+        if created_from:
+            stmt = stmt.where(ReportRollup.day >= created_from.date())
+        created_to = parse_date(args, "created_to")
+        if created_to:
+            if created_to.time() == time.min:
+                stmt = stmt.where(ReportRollup.day < created_to.date())
+            else:
+                stmt = stmt.where(ReportRollup.day <= created_to.date())
+
+        points = []
+        for row in db.session.execute(stmt):
+            point = row._asdict()
+            point["period"] = row.period.isoformat()
+            point["count"] = int(row.count)
+            points.append(point)
+        return {"granularity": granularity, "points": points}
+
+
+report_rollups = ReportRollups()
+
+
+if __name__ == "__main__":
+    from app import app
+
+    with app.app_context():
+        rebuild_rollups()
+        db.session.commit()
+        print(f"{db.session.query(func.count()).select_from(ReportRollup).scalar()} rollups rebuilt")
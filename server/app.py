@@ -1,261 +1,124 @@
 #!/usr/bin/env python3
+"""The Flask application factory.
+
+Importing this module is cheap: create_app imports the extensions and
+resources, and `app` is only built the first time something asks for it
+(`gunicorn app:app`, `flask --app app ...`, `from app import app`). The
+extensions are module-level singletons listening on db.session, so build
+one app per process.
+
+Under `gunicorn -c gunicorn.conf.py` the master builds the app once and
+forks its workers from it; pool.py, passwords.py and events.py rebuild
+their connections and threads in each worker.
+"""
 import os
-from flask import Flask, jsonify, request, session, send_from_directory
-from flask_migrate import Migrate
-from flask_restful import Api, Resource
-from flask_bcrypt import Bcrypt
-from flask_cors import CORS
-
-from config import DevelopmentConfig, ProductionConfig
-from models import db, bcrypt, PoliceOfficer, CrimeCategory, CrimeReport, Assignment
-from decorators import rank_required, login_required
-
-# Use ProductionConfig on Render, DevelopmentConfig locally
-config = ProductionConfig if os.environ.get('RENDER') else DevelopmentConfig
-
-app = Flask(__name__)
-app.config.from_object(config)
-
-db.init_app(app)
-bcrypt.init_app(app)
-migrate = Migrate(app, db)
-api = Api(app)
-CORS(app)
-
-@app.route('/api/login', methods=['POST'])
-def login():
-    data = request.get_json()
-    email = data.get("email")
-    password = data.get("password")
-
-    officer = PoliceOfficer.query.filter_by(email=email).first()
-    if officer and officer.check_password(password):
-        session["user_id"] = officer.id
-        session["role"] = officer.role
-        return {"message": f"Logged in as {officer.role}"}, 200
-    return {"error": "Invalid email or password"}, 401
-
-@app.route('/api/logout', methods=['POST'])
-def logout():
-    session.clear()
-    return {"message": "Logged out successfully"}, 200
-
-
-class PoliceOfficerResource(Resource):
-    def get(self, id=None):
-        if id:
-            officer = PoliceOfficer.query.get_or_404(id)
-            return officer.to_dict()
-        officers = PoliceOfficer.query.all()
-        return [o.to_dict() for o in officers], 200
-
-    def post(self):
-        data = request.get_json()
-        try:
-            officer = PoliceOfficer(
-                name=data["name"],
-                badge_number=data["badge_number"],
-                rank=data["rank"],
-                email=data["email"],
-                phone=data["phone"],
-                role=data.get("role", "officer")
-            )
-            officer.set_password(data["password"])
-            db.session.add(officer)
-            db.session.commit()
-            return officer.to_dict(), 201
-        except Exception as e:
-            db.session.rollback()
-            return {"error": str(e)}, 400
-
-    def patch(self, id):
-        officer = PoliceOfficer.query.get_or_404(id)
-        data = request.get_json()
-        for field, value in data.items():
-            if field == "password":
-                officer.set_password(value)
-            else:
-                setattr(officer, field, value)
-        db.session.commit()
-        return officer.to_dict()
-
-    @rank_required
-    def delete(self, id):
-        officer = PoliceOfficer.query.get_or_404(id)
-        db.session.delete(officer)
-        db.session.commit()
-        return {"message": "Officer deleted successfully"}, 204
 
+import click
 
-class CrimeReportResource(Resource):
-    def get(self, id=None):
-        if id:
-            report = CrimeReport.query.get_or_404(id)
-            return report.to_dict()
-        reports = CrimeReport.query.all()
-        return [r.to_dict() for r in reports], 200
-
-    @login_required
-    def post(self):
-        data = request.get_json()
-        try:
-            report = CrimeReport(
-                title=data.get("title"),
-                description=data.get("description"),
-                location=data.get("location"),
-                status=data.get("status", "open"),
-                crime_category_id=data["crime_category_id"]
-            )
-            db.session.add(report)
-            db.session.commit()
-            return report.to_dict(), 201
-        except Exception as e:
-            db.session.rollback()
-            return {"error": str(e)}, 400
-
-    def patch(self, id):
-        report = CrimeReport.query.get_or_404(id)
-        data = request.get_json()
-        for field, value in data.items():
-            setattr(report, field, value)
-        db.session.commit()
-        return report.to_dict()
-
-    def delete(self, id):
-        report = CrimeReport.query.get_or_404(id)
-        db.session.delete(report)
-        db.session.commit()
-        return {"message": "Report deleted"}, 204
-
-
-class AssignmentResource(Resource):
-    def get(self, id=None):
-        if id:
-            assignment = Assignment.query.get_or_404(id)
-            return assignment.to_dict()
-        assignments = Assignment.query.all()
-        return [a.to_dict() for a in assignments], 200
-    
-    @rank_required
-    def post(self):
-        data = request.get_json()
-        try:
-            assignment = Assignment(
-                role_in_case=data["role_in_case"],
-                crime_report_id=data["crime_report_id"],
-                officer_id=data["officer_id"],
-            )
-            db.session.add(assignment)
-            db.session.commit()
-            return assignment.to_dict(), 201
-        except Exception as e:
-            db.session.rollback()
-            return {"error": str(e)}, 400
-
-
-class CrimeCategoryResource(Resource):
-    def get(self, id=None):
-        if id:
-            category = CrimeCategory.query.get_or_404(id)
-            return category.to_dict()
-        categories = CrimeCategory.query.all()
-        return [c.to_dict() for c in categories], 200
-
-    def post(self):
-        data = request.get_json()
-        try:
-            category = CrimeCategory(name=data["name"])
-            db.session.add(category)
-            db.session.commit()
-            return category.to_dict(), 201
-        except Exception as e:
-            db.session.rollback()
-            return {"error": str(e)}, 400
-
-# Add /api prefix to all API resources
-api.add_resource(PoliceOfficerResource, "/api/officers", "/api/officers/<int:id>")
-api.add_resource(CrimeReportResource, "/api/reports", "/api/reports/<int:id>")
-api.add_resource(AssignmentResource, "/api/assignments", "/api/assignments/<int:id>")
-api.add_resource(CrimeCategoryResource, "/api/categories", "/api/categories/<int:id>")
+from config import DevelopmentConfig, ProductionConfig
 
 
-# Debug route to check file paths
-@app.route('/debug')
-def debug_info():
-    server_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(server_dir)
-    build_dir = os.path.join(project_root, "client", "build")
-    static_dir = os.path.join(build_dir, "static")
-    build_exists = os.path.exists(build_dir)
-    static_exists = os.path.exists(static_dir)
-    
-    build_contents = []
-    static_contents = []
-    
-    if build_exists:
-        try:
-            build_contents = os.listdir(build_dir)
-        except:
-            build_contents = ["Error reading build directory"]
-    
-    if static_exists:
-        try:
-            static_contents = os.listdir(static_dir)
-        except:
-            static_contents = ["Error reading static directory"]
-    
-    return {
-        "server_dir": server_dir,
-        "project_root": project_root,
-        "build_dir": build_dir,
-        "static_dir": static_dir,
-        "build_exists": build_exists,
-        "static_exists": static_exists,
-        "build_contents": build_contents,
-        "static_contents": static_contents,
+def default_config():
+    # Use ProductionConfig on Render, DevelopmentConfig locally
+    return ProductionConfig if os.environ.get('RENDER') else DevelopmentConfig
+
+
+class MigrateGroup(click.Group):
+    """`flask db`, importing Flask-Migrate and Alembic only when it runs."""
+
+    def __init__(self, app, db):
+        super().__init__("db", help="Perform database migrations.")
+        self.app = app
+        self.db = db
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        if "migrate" not in self.app.extensions:
+            from flask_migrate import Migrate
+
+            # Also replaces this group on app.cli with Flask-Migrate's own.
+            Migrate(self.app, self.db)
+        return self.app.cli.commands["db"].make_context(info_name, args, parent, **extra)
+
+
+def create_app(config=None):
+    from flask import Flask
+    from flask_cors import CORS
+    from sqlalchemy.orm import configure_mappers
+
+    import export
+    import resources
+    from cache import response_cache
+    from passwords import password_hasher
+    from pool import engine_options, pool_metrics, pool_monitor
+    from metrics import metrics
+    from routing import replica_router
+    from models import db, bcrypt, PoliceOfficer, CrimeCategory, CrimeReport, Assignment
+    from frontend import frontend
+    from sync import change_feed
+    from events import event_broker
+    from geo import geo_index
+    from analytics import report_rollups
+    from recommendations import workload_index
+    from jobs import job_queue
+
+    # The React build's static/ folder is served by resources.serve_static.
+    app = Flask(__name__, static_folder=None)
+    app.config.from_object(config or default_config())
+    if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+        raise ValueError(
+            "DATABASE_URL environment variable not set! You must set it on Render."
+        )
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    app.config["SQLALCHEMY_BINDS"] = {
+        f"replica_{i}": {"url": url, **engine_options(app.config, url)}
+        for i, url in enumerate(app.config.get("DATABASE_REPLICA_URLS", []))
     }
 
-# Serve static files (CSS, JS, images)
-@app.route("/static/<path:filename>")
-def serve_static(filename):
-    server_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(server_dir)
-    build_dir = os.path.join(project_root, "client", "build")
-    
-    # Serve from build/static/ directory
-    return send_from_directory(os.path.join(build_dir, "static"), filename)
-
-# React frontend routes - this should be LAST
-@app.route("/", defaults={"path": ""})
-@app.route("/<path:path>")
-def serve_react(path):
-    server_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(server_dir)
-    build_dir = os.path.join(project_root, "client", "build")
-    
-    # Check if build directory exists
-    if not os.path.exists(build_dir):
-        return f"Build directory not found at: {build_dir}", 404
-    
-    # Handle static files (CSS, JS, images, etc.)
-    if path.startswith('static/'):
-        file_path = os.path.join(build_dir, path)
-        if os.path.exists(file_path):
-            return send_from_directory(build_dir, path)
-    
-    # Handle other static assets (favicon, manifest, etc.)
-    if path != "" and os.path.exists(os.path.join(build_dir, path)):
-        return send_from_directory(build_dir, path)
-    
-    # Serve index.html for all routes (SPA routing)
-    index_path = os.path.join(build_dir, "index.html")
-    if os.path.exists(index_path):
-        return send_from_directory(build_dir, "index.html")
-    else:
-        return f"index.html not found at: {index_path}", 404
+    db.init_app(app)
+    pool_monitor.init_app(app, db)
+    replica_router.init_app(app, db)
+    metrics.init_app(app, db)
+    metrics.add_collector(pool_metrics)
+    bcrypt.init_app(app)
+    password_hasher.init_app(app, bcrypt)
+    app.cli.add_command(MigrateGroup(app, db))
+    CORS(app)
+    frontend.init_app(app)
+    change_feed.init_app(app, db)
+    event_broker.init_app(app, db)
+    geo_index.init_app(app, db)
+    report_rollups.init_app(app, db)
+    workload_index.init_app(app, db)
+    job_queue.init_app(app, db)
+    export.init_app(app, db)
+
+    # Officer and category responses embed assignments, reports and categories,
+    # so a write to any of them invalidates both.
+    response_cache.init_app(app, db)
+    response_cache.depends_on("officers", PoliceOfficer, CrimeCategory, CrimeReport, Assignment)
+    response_cache.depends_on("categories", PoliceOfficer, CrimeCategory, CrimeReport, Assignment)
+    response_cache.depends_on("heatmap", CrimeReport, Assignment)
+
+    resources.init_app(app)
+    # Otherwise the first query of the first request configures them, in
+    # every gunicorn worker rather than once in the preloading master.
+    configure_mappers()
+    return app
+
+
+def __getattr__(name):
+    # Module attribute lookups that fail land here (PEP 562): build `app` on
+    # first use and keep it as a plain module global afterwards.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
+    from models import db
+
+    app = create_app()
     with app.app_context():
         db.create_all()
-    app.run(port=5555, debug=True)
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""Archival of closed crime reports out of the live tables.
+
+Reports closed and filed more than ARCHIVE_AFTER_DAYS ago move, with their
+assignments, to archived_crime_reports and archived_assignments, one
+transaction per batch. crime_reports and assignments, and every index and
+list query on them, then only carry live cases. Plain tables are used
+rather than Postgres partitions so SQLite deployments archive the same way.
+
+Archived rows keep their ids, which the live tables never hand out again
+(AUTOINCREMENT on SQLite), and are read-only. The report and assignment
+detail endpoints fall back to the archive, and their list endpoints merge
+it in with include_archived=true. Archived reports still count in
+/api/stats and the analytics rollups. /api/sync sends them as deleted;
+search, geo queries, exports and the officer and category responses cover
+live reports only.
+
+Run it from cron or by hand:
+
+    python server/archive.py [--days 365] [--batch-size 1000]
+"""
+import argparse
+import heapq
+from datetime import datetime, timedelta
+
+from flask import abort
+from sqlalchemy import delete, insert, literal
+
+from filters import filter_assignments, filter_reports
+from loaders import eager_options
+from models import db, CrimeReport, Assignment, ArchivedCrimeReport, ArchivedAssignment, Tombstone
+from pagination import keyset_query, keyset_rows
+
+BATCH_SIZE = 1000
+ARCHIVES = {CrimeReport: ArchivedCrimeReport, Assignment: ArchivedAssignment}
+TRUE_VALUES = {"1", "true", "yes"}
+
+
+def include_archived(args):
+    return args.get("include_archived", "").lower() in TRUE_VALUES
+
+
+def get_or_404(model, id):
+    """A report or assignment with its relationships loaded, from the live table or else the archive."""
+    for m in (model, ARCHIVES[model]):
+        obj = db.session.get(m, id, options=eager_options(m))
+        if obj is not None:
+            return obj
+    abort(404)
+
+
+def filter_archive(query, model, args):
+    """filter_reports or filter_assignments on a query over `model`, live or archived."""
+    tables = (ArchivedCrimeReport, ArchivedAssignment) if model in ARCHIVES.values() else (CrimeReport, Assignment)
+    if model in (CrimeReport, ArchivedCrimeReport):
+        return filter_reports(query, args, *tables)
+    return filter_assignments(query, args, *tables)
+
+
+def merge_pages(pages, limit):
+    """One keyset page from the newest-first pages of a live table and its archive.
+
+    Ids are never shared between the two, so one id cursor pages both.
+    """
+    return keyset_rows(list(heapq.merge(*pages, key=lambda row: -row.id)), limit)
+
+
+def keyset_page_with_archive(model, args):
+    """keyset_page over a live table and its archive together, newest first."""
+    pages = []
+    for m in (model, ARCHIVES[model]):
+        query, limit = keyset_query(filter_archive(m.query.options(*eager_options(m)), m, args), m, args)
+        pages.append(query.all())
+    return merge_pages(pages, limit)
+
+
+def _columns(model):
+    return [column.name for column in model.__table__.columns]
+
+
+def _batch(cutoff, batch_size):
+    stmt = (
+        db.select(CrimeReport.id)
+        .where(CrimeReport.status == "closed", CrimeReport.created_at < cutoff)
+        .order_by(CrimeReport.id)
+        .limit(batch_size)
+    )
+    if db.engine.dialect.name == "postgresql":
+        # A report being edited right now is left for the next run.
+        stmt = stmt.with_for_update(of=CrimeReport, skip_locked=True)
+    return db.session.scalars(stmt).all()
+
+
+def archive_reports(days, batch_size=BATCH_SIZE, log=print):
+    """Move closed reports filed more than `days` ago, and their assignments, to the archive."""
+    cutoff = datetime.now() - timedelta(days=days)
+    archived = 0
+    while True:
+        ids = _batch(cutoff, batch_size)
+        if not ids:
+            return archived
+        now = literal(datetime.now())
+        report_columns = _columns(CrimeReport)
+        assignment_columns = _columns(Assignment)
+        db.session.execute(insert(ArchivedCrimeReport).from_select(
+            report_columns + ["archived_at"],
+            db.select(*(getattr(CrimeReport, c) for c in report_columns), now).where(CrimeReport.id.in_(ids)),
+        ))
+        db.session.execute(insert(ArchivedAssignment).from_select(
+            assignment_columns,
+            db.select(*(getattr(Assignment, c) for c in assignment_columns)).where(Assignment.crime_report_id.in_(ids)),
+        ))
+        # /api/sync clients drop archived rows like deleted ones.
+        db.session.execute(insert(Tombstone).from_select(
+            ["table_name", "row_id", "deleted_at"],
+            db.select(literal(CrimeReport.__tablename__), CrimeReport.id, now).where(CrimeReport.id.in_(ids)),
+        ))
+        db.session.execute(insert(Tombstone).from_select(
+            ["table_name", "row_id", "deleted_at"],
+            db.select(literal(Assignment.__tablename__), Assignment.id, now).where(Assignment.crime_report_id.in_(ids)),
+        ))
+        options = {"synchronize_session": False}
+        db.session.execute(delete(Assignment).where(Assignment.crime_report_id.in_(ids)), execution_options=options)
+        db.session.execute(delete(CrimeReport).where(CrimeReport.id.in_(ids)), execution_options=options)
+        db.session.commit()
+        archived += len(ids)
+        log(f"{archived} reports archived")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, help="archive reports filed this long ago (default ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        days = app.config["ARCHIVE_AFTER_DAYS"] if args.days is None else args.days
+        print(f"Archiving closed reports filed before {datetime.now() - timedelta(days=days):%Y-%m-%d}...")
+        archive_reports(days, args.batch_size)
+        print("Archiving complete!")
+
+
+if __name__ == "__main__":
+    main()
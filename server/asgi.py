@@ -0,0 +1,283 @@
+"""ASGI entry point serving the read API on SQLAlchemy's asyncio extension.
+
+    pip install -r server/requirements-asgi.txt
+    uvicorn --app-dir server asgi:app --workers 4
+
+A database call or a bcrypt check here suspends one request rather than
+blocking a whole worker, so a few processes hold thousands of concurrent
+requests. The GET endpoints, /api/health, /api/stats, /api/login and
+/api/logout return the same JSON as the Flask app and share its session cookie,
+so a proxy can send reads here and everything else to gunicorn. Writes
+stay on the Flask app: stat counters, cache invalidation, events and
+tombstones all hang off its session. Reads go to the primary only.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import parse_qsl
+
+from itsdangerous import BadSignature
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.http import dump_cookie, parse_cookie, quote_etag
+
+from app import app as flask_app
+from archive import ARCHIVES, filter_archive, include_archived, merge_pages
+from filters import filter_reports, filter_assignments, filter_officers
+from loaders import eager_options
+from models import PoliceOfficer, CrimeCategory, CrimeReport, Assignment, StatCounter
+from pagination import keyset_query, keyset_rows, ranked_query, ranked_rows
+from passwords import password_hasher, HasherBusy
+from pool import PoolMonitor, async_engine_options, async_url
+from search import search_hits
+from serializers import (
+    dumps, serialize_officer, serialize_report, serialize_assignment, serialize_category,
+)
+from stats import summary
+
+
+class Request:
+    def __init__(self, scope, body, api):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        # Like Flask's request.args.get, the first value of a repeated key wins.
+        self.args = {}
+        for key, value in parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True):
+            self.args.setdefault(key, value)
+        self.body = body
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.session = {}
+        self.session_changed = False
+        cookie = parse_cookie(headers.get("cookie", "")).get(api.cookie_name)
+        if cookie:
+            try:
+                self.session = api.cookies.loads(cookie, max_age=api.cookie_max_age)
+            except BadSignature:
+                pass
+
+    def get_json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class AsyncAPI:
+    def __init__(self, flask_app):
+        self.config = flask_app.config
+        url = async_url(self.config.get("ASYNC_DATABASE_URL") or self.config["SQLALCHEMY_DATABASE_URI"])
+        self.engine = create_async_engine(url, **async_engine_options(self.config, url))
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.pools = PoolMonitor()
+        self.pools.watch("default", self.engine.sync_engine, self.config)
+        self.dialect = self.engine.dialect.name
+
+        # Flask's own signer, so either server can read the other's cookie.
+        self.cookies = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.cookie_name = self.config["SESSION_COOKIE_NAME"]
+        self.cookie_max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+
+        self.routes = [
+            (re.compile(pattern), method, handler) for pattern, method, handler in (
+                (r"/api/health", "GET", self.health),
+                (r"/api/stats", "GET", self.stats),
+                (r"/api/login", "POST", self.login),
+                (r"/api/logout", "POST", self.logout),
+                (r"/api/officers", "GET", self.officers),
+                (r"/api/officers/(\d+)", "GET", self.officer),
+                (r"/api/reports", "GET", self.reports),
+                (r"/api/reports/search", "GET", self.search),
+                (r"/api/reports/(\d+)", "GET", self.report),
+                (r"/api/assignments", "GET", self.assignments),
+                (r"/api/assignments/(\d+)", "GET", self.assignment),
+                (r"/api/categories", "GET", self.categories),
+                (r"/api/categories/(\d+)", "GET", self.category),
+            )
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.engine.dispose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        request = Request(scope, body, self)
+
+        status, headers, payload = await self.dispatch(request)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def dispatch(self, request):
+        allowed = []
+        for pattern, method, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            try:
+                async with self.sessions() as session:
+                    result = await handler(request, session, *map(int, match.groups()))
+            except ValueError as e:
+                result = {"error": str(e)}, 400
+            break
+        else:
+            if allowed:
+                result = {"message": MethodNotAllowed.description}, 405, [("Allow", ", ".join(allowed))]
+            else:
+                result = {"message": NotFound.description}, 404
+
+        data, status, headers = (*result, [])[:3] if isinstance(result, tuple) else (result, 200, [])
+        headers = [("Content-Type", "application/json"), *headers]
+        if request.session_changed:
+            headers.append(("Set-Cookie", self._cookie(request.session)))
+        return status, headers, dumps(data) + b"\n"
+
+    def _cookie(self, session):
+        options = {
+            "path": self.config["SESSION_COOKIE_PATH"] or self.config["APPLICATION_ROOT"],
+            "domain": self.config["SESSION_COOKIE_DOMAIN"],
+            "secure": self.config["SESSION_COOKIE_SECURE"],
+            "httponly": self.config["SESSION_COOKIE_HTTPONLY"],
+            "samesite": self.config["SESSION_COOKIE_SAMESITE"],
+        }
+        if not session:
+            return dump_cookie(self.cookie_name, "", expires=0, max_age=0, **options)
+        return dump_cookie(self.cookie_name, self.cookies.dumps(session), **options)
+
+    async def health(self, request, session):
+        try:
+            await session.execute(text("SELECT 1"))
+        except SQLAlchemyError as e:
+            return {"status": "unavailable", "error": str(getattr(e, "orig", e)), "pools": self.pools.stats()}, 503
+        return {"status": "ok", "pools": self.pools.stats()}
+
+    async def stats(self, request, session):
+        counters = {c.name: c.value for c in await session.scalars(select(StatCounter))}
+        return summary(counters)
+
+    async def login(self, request, session):
+        data = request.get_json() or {}
+        password = data.get("password")
+        officer = (await session.scalars(select(PoliceOfficer).filter_by(email=data.get("email")))).first()
+        loop = asyncio.get_running_loop()
+        try:
+            authenticated = officer is not None and await loop.run_in_executor(None, officer.check_password, password)
+            if authenticated and password_hasher.needs_rehash(officer.password_hash):
+                await loop.run_in_executor(None, officer.set_password, password)
+                try:
+                    await session.commit()
+                except StaleDataError:
+                    # A concurrent login of the same officer upgraded it first.
+                    await session.rollback()
+                    await session.refresh(officer)
+        except HasherBusy as e:
+            return {"error": e.description}, 503, [("Retry-After", "1")]
+
+        if authenticated:
+            request.session.update(user_id=officer.id, role=officer.role)
+            request.session_changed = True
+            return {"message": f"Logged in as {officer.role}"}, 200
+        return {"error": "Invalid email or password"}, 401
+
+    async def logout(self, request, session):
+        request.session.clear()
+        request.session_changed = True
+        return {"message": "Logged out successfully"}, 200
+
+    async def _find(self, session, model, id):
+        # Reports and assignments fall back to the archive, as archive.get_or_404 does.
+        for m in (model, ARCHIVES[model]) if model in ARCHIVES else (model,):
+            obj = await session.get(m, id, options=eager_options(m))
+            if obj is not None:
+                return obj
+        return None
+
+    async def _get(self, session, model, id, serialize):
+        obj = await self._find(session, model, id)
+        if obj is None:
+            return {"message": NotFound.description}, 404
+        return serialize(obj)
+
+    async def _page(self, session, model, stmt, args, serialize):
+        stmt, limit = keyset_query(stmt, model, args)
+        rows, next_cursor = keyset_rows((await session.scalars(stmt)).all(), limit)
+        return {"items": [serialize(row) for row in rows], "next_cursor": next_cursor}
+
+    async def _page_with_archive(self, session, model, args, serialize):
+        pages = []
+        for m in (model, ARCHIVES[model]):
+            stmt, limit = keyset_query(filter_archive(select(m).options(*eager_options(m)), m, args), m, args)
+            pages.append((await session.scalars(stmt)).all())
+        rows, next_cursor = merge_pages(pages, limit)
+        return {"items": [serialize(row) for row in rows], "next_cursor": next_cursor}
+
+    async def officers(self, request, session):
+        stmt = filter_officers(select(PoliceOfficer).options(*eager_options(PoliceOfficer)), request.args)
+        return await self._page(session, PoliceOfficer, stmt, request.args, serialize_officer)
+
+    async def officer(self, request, session, id):
+        return await self._get(session, PoliceOfficer, id, serialize_officer)
+
+    async def reports(self, request, session):
+        if include_archived(request.args):
+            return await self._page_with_archive(session, CrimeReport, request.args, serialize_report)
+        stmt = filter_reports(select(CrimeReport).options(*eager_options(CrimeReport)), request.args)
+        return await self._page(session, CrimeReport, stmt, request.args, serialize_report)
+
+    async def search(self, request, session):
+        q = request.args.get("q", "").strip()
+        if not q:
+            return {"error": "q is required"}, 400
+        hits = search_hits(q, self.dialect)
+        stmt = (
+            select(CrimeReport, hits.c.score)
+            .options(*eager_options(CrimeReport))
+            .join(hits, hits.c.id == CrimeReport.id)
+        )
+        stmt, limit = ranked_query(filter_reports(stmt, request.args), hits.c.score, hits.c.id, request.args)
+        rows, next_cursor = ranked_rows((await session.execute(stmt)).all(), limit)
+        return {"items": [serialize_report(r) for r, _ in rows], "next_cursor": next_cursor}
+
+    async def report(self, request, session, id):
+        report = await self._find(session, CrimeReport, id)
+        if report is None:
+            return {"message": NotFound.description}, 404
+        # The version tag a PATCH to the Flask app checks in If-Match.
+        return serialize_report(report), 200, [("ETag", quote_etag(str(report.version)))]
+
+    async def assignments(self, request, session):
+        if include_archived(request.args):
+            return await self._page_with_archive(session, Assignment, request.args, serialize_assignment)
+        stmt = filter_assignments(select(Assignment).options(*eager_options(Assignment)), request.args)
+        return await self._page(session, Assignment, stmt, request.args, serialize_assignment)
+
+    async def assignment(self, request, session, id):
+        return await self._get(session, Assignment, id, serialize_assignment)
+
+    async def categories(self, request, session):
+        categories = await session.scalars(select(CrimeCategory).options(*eager_options(CrimeCategory)))
+        return [serialize_category(c) for c in categories]
+
+    async def category(self, request, session, id):
+        return await self._get(session, CrimeCategory, id, serialize_category)
+
+
+app = AsyncAPI(flask_app)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Throughput and p50/p95/p99 latency of every /api endpoint, as JSON.
+
+Run from the server directory:
+
+    python -m benchmarks.api --reports 100000 --officers 1000 --output before.json
+    git checkout <other commit>
+    python -m benchmarks.api --reports 100000 --officers 1000 --output after.json
+
+The data set comes from seed.generate with a fixed --seed, so two runs at the
+same scale see identical data. Each scenario is run through the Flask test
+client (in-process, no network) and, with --target gunicorn, through a local
+gunicorn with --workers processes driven by --concurrency client threads.
+Without --database-url a throwaway SQLite file is used.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+from sqlalchemy.engine import make_url
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCH_WORDS = ["report", "police", "car", "night", "market", "money", "family", "house", "street", "phone"]
+# bcrypt makes logins expensive by design; a handful is enough for a number.
+LOGIN_REQUESTS = 20
+
+
+def scenarios(officers, reports):
+    from pagination import encode_cursor
+
+    week_ago = (datetime.now() - timedelta(days=7)).isoformat(timespec="seconds")
+    return {
+        "health": lambda r: ("GET", "/api/health", None),
+        "stats": lambda r: ("GET", "/api/stats", None),
+        "reports_list": lambda r: ("GET", "/api/reports", None),
+        "reports_deep_page": lambda r: ("GET", f"/api/reports?cursor={encode_cursor(r.randint(1, reports))}", None),
+        "reports_filtered": lambda r: ("GET", f"/api/reports?status=open&category_id={r.randint(1, 5)}", None),
+        "reports_by_officer": lambda r: ("GET", f"/api/reports?officer_id={r.randint(1, officers)}", None),
+        "report_detail": lambda r: ("GET", f"/api/reports/{r.randint(1, reports)}", None),
+        "reports_search": lambda r: ("GET", f"/api/reports/search?q={r.choice(SEARCH_WORDS)}", None),
+        "reports_export_week": lambda r: ("GET", f"/api/reports/export?created_from={week_ago}", None),
+        "officers_list": lambda r: ("GET", "/api/officers", None),
+        "officer_detail": lambda r: ("GET", f"/api/officers/{r.randint(1, officers)}", None),
+        "officer_by_email": lambda r: ("GET", f"/api/officers?email=officer{r.randint(1, officers)}@example.com", None),
+        "assignments_by_officer": lambda r: ("GET", f"/api/assignments?officer_id={r.randint(1, officers)}", None),
+        "categories": lambda r: ("GET", "/api/categories", None),
+        "login": lambda r: ("POST", "/api/login", {
+            "email": f"officer{r.randint(1, officers)}@example.com", "password": "password123",
+        }),
+        "report_create": lambda r: ("POST", "/api/reports", {
+            "title": "Benchmark report", "description": "Created by benchmarks.api",
+            "location": "Nairobi", "crime_category_id": r.randint(1, 5),
+        }),
+        "report_update": lambda r: ("PATCH", f"/api/reports/{r.randint(1, reports)}", {
+            "status": r.choice(["open", "pending", "closed"]),
+        }),
+    }
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 2)
+
+
+def summarize(timings, errors, elapsed):
+    return {
+        "requests": len(timings) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+    }
+
+
+class ClientTarget:
+    """Requests go straight into the WSGI app; measures the app alone."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, body):
+            resp = client.open(path, method=method, json=body)
+            resp.get_data()
+            return resp.status_code
+        return send
+
+
+class HttpTarget:
+    """Requests go over HTTP to a server, one cookie jar per client thread."""
+
+    def __init__(self, base):
+        self.base = base
+
+    def session(self):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+        def send(method, path, body):
+            data = json.dumps(body).encode() if body is not None else None
+            req = urllib.request.Request(
+                self.base + path, data=data, method=method, headers={"Content-Type": "application/json"},
+            )
+            try:
+                with opener.open(req, timeout=120) as resp:
+                    resp.read()
+                    return resp.status
+            except urllib.error.HTTPError as e:
+                e.read()
+                return e.code
+        return send
+
+
+def run_scenario(target, build, count, concurrency, seed, login=True):
+    timings, errors = [], 0
+    lock = threading.Lock()
+    remaining = iter(range(count))
+
+    def worker(index):
+        nonlocal errors
+        rnd = random.Random(f"{seed}-{index}")
+        send = target.session()
+        if login:
+            send("POST", "/api/login", {"email": "officer1@example.com", "password": "password123"})
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            method, path, body = build(rnd)
+            start = time.perf_counter()
+            status = send(method, path, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status < 400:
+                    timings.append(elapsed)
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(timings, errors, time.perf_counter() - start)
+
+
+def run_target(target, selected, args, concurrency, login=True):
+    results = {}
+    for name, build in selected.items():
+        count = min(args.requests, LOGIN_REQUESTS) if name == "login" else args.requests
+        results[name] = run_scenario(target, build, count, concurrency, args.seed, login)
+        print(json.dumps({name: results[name]}), file=sys.stderr, flush=True)
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(argv, env=None):
+    """Run a server command on a free port (filled into argv's {port}) until it answers /api/health."""
+    port = free_port()
+    server = subprocess.Popen([arg.format(port=port) for arg in argv], env=env or os.environ.copy())
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base + "/api/health", timeout=2):
+                return server, base
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"{argv[2]} did not start")
+
+
+def start_gunicorn(workers, threads):
+    return start_server([
+        sys.executable, "-m", "gunicorn", "--chdir", SERVER_DIR, "-b", "127.0.0.1:{port}",
+        "-w", str(workers), "--threads", str(threads), "--log-level", "warning", "app:app",
+    ])
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=SERVER_DIR, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain"], cwd=SERVER_DIR, text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def prepare_database(args):
+    """Point the app at --database-url (or a temporary SQLite file) and seed it; returns the app."""
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_api.db")
+    # Keep the benchmark's own bulk loads out of the slow query log.
+    os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+    from app import app
+    from models import db
+    from seed import generate
+
+    if not args.reuse_data:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            generate(args.officers, args.reports, seed=args.seed, log=lambda msg: print(msg, file=sys.stderr))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100000)
+    parser.add_argument("--officers", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="wiped and reseeded unless --reuse-data")
+    parser.add_argument("--reuse-data", action="store_true", help="skip seeding; the database must match --reports/--officers")
+    parser.add_argument("--target", default="client,gunicorn")
+    parser.add_argument("--scenarios", help="comma-separated subset; default all")
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads against gunicorn")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    app = prepare_database(args)
+
+    selected = scenarios(args.officers, args.reports)
+    if args.scenarios:
+        selected = {name: selected[name] for name in args.scenarios.split(",")}
+
+    report = {
+        **git_revision(),
+        "dataset": {
+            "reports": args.reports, "officers": args.officers, "seed": args.seed,
+            "database": make_url(os.environ["DATABASE_URL"]).get_backend_name(),
+        },
+        "requests_per_scenario": args.requests,
+        "targets": {},
+    }
+    targets = args.target.split(",")
+    if "client" in targets:
+        report["targets"]["client"] = run_target(ClientTarget(app), selected, args, concurrency=1)
+    if "gunicorn" in targets:
+        server, base = start_gunicorn(args.workers, args.threads)
+        try:
+            report["targets"]["gunicorn"] = {
+                "workers": args.workers, "threads": args.threads, "concurrency": args.concurrency,
+                "scenarios": run_target(HttpTarget(base), selected, args, args.concurrency),
+            }
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Read endpoints under rising concurrency: gunicorn (app:app) against uvicorn (asgi:app).
+
+Run from the server directory (uvicorn, aiosqlite or asyncpg installed):
+
+    python -m benchmarks.async_api --reports 100000 --officers 1000 --concurrency 1,16,64,256
+
+Both servers get the same number of worker processes and the same seeded
+data. At each concurrency level every read scenario from benchmarks.api is
+sent to each server in turn; the report holds throughput, latency
+percentiles and error counts side by side, as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+
+from sqlalchemy.engine import make_url
+
+from benchmarks.api import (
+    SERVER_DIR, HttpTarget, git_revision, prepare_database, run_target, scenarios, start_gunicorn, start_server,
+)
+
+# Endpoints asgi:app does not serve, and logins, which measure bcrypt rather than I/O.
+SKIPPED = {"login", "report_create", "report_update", "reports_export_week"}
+
+
+def start_uvicorn(workers):
+    return start_server([
+        sys.executable, "-m", "uvicorn", "--app-dir", SERVER_DIR, "--host", "127.0.0.1", "--port", "{port}",
+        "--workers", str(workers), "--log-level", "warning", "asgi:app",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100000)
+    parser.add_argument("--officers", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="wiped and reseeded unless --reuse-data")
+    parser.add_argument("--reuse-data", action="store_true", help="skip seeding; the database must match --reports/--officers")
+    parser.add_argument("--scenarios", help="comma-separated subset; default every read scenario")
+    parser.add_argument("--requests", type=int, default=500, help="per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,16,64,256", help="comma-separated client thread counts")
+    parser.add_argument("--workers", type=int, default=2, help="processes for both servers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    prepare_database(args)
+
+    selected = {name: build for name, build in scenarios(args.officers, args.reports).items() if name not in SKIPPED}
+    if args.scenarios:
+        selected = {name: selected[name] for name in args.scenarios.split(",")}
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    report = {
+        **git_revision(),
+        "dataset": {
+            "reports": args.reports, "officers": args.officers, "seed": args.seed,
+            "database": make_url(os.environ["DATABASE_URL"]).get_backend_name(),
+        },
+        "requests_per_scenario": args.requests,
+        "servers": {
+            "gunicorn": {"workers": args.workers, "threads": args.threads},
+            "uvicorn": {"workers": args.workers},
+        },
+        "concurrency": {},
+    }
+    servers = {
+        "gunicorn": lambda: start_gunicorn(args.workers, args.threads),
+        "uvicorn": lambda: start_uvicorn(args.workers),
+    }
+    for name, start in servers.items():
+        server, base = start()
+        try:
+            for level in levels:
+                print(json.dumps({"server": name, "concurrency": level}), file=sys.stderr, flush=True)
+                # Reads need no session, and per-thread bcrypt logins would swamp the numbers.
+                results = run_target(HttpTarget(base), selected, args, level, login=False)
+                report["concurrency"].setdefault(str(level), {})[name] = results
+        finally:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
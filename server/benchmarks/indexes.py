@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""EXPLAIN plans and latencies of the list queries before and after the index migration.
+
+Run from the server directory:
+
+    python -m benchmarks.indexes --reports 200000
+
+The target database is wiped. Without --database-url a throwaway SQLite file
+is used; pass a Postgres URL to get EXPLAIN ANALYZE output from Postgres.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BEFORE = "139c2405bed5"
+AFTER = "7b0462fe30d3"
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def seed(db, sa, reports, officers, seed_value):
+    # Lightweight table() constructs insert only the columns every revision
+    # has, without model-level defaults, so this works at any schema version.
+    rnd = random.Random(seed_value)
+    start = datetime(2020, 1, 1)
+    tables = {
+        "crime_categories": sa.table("crime_categories", sa.column("id"), sa.column("name"), sa.column("created_at")),
+        "police_officers": sa.table(
+            "police_officers", sa.column("id"), sa.column("name"), sa.column("badge_number"), sa.column("rank"),
+            sa.column("email"), sa.column("phone"), sa.column("password_hash"), sa.column("role"), sa.column("created_at"),
+        ),
+        "crime_reports": sa.table(
+            "crime_reports", sa.column("id"), sa.column("title"), sa.column("description"), sa.column("location"),
+            sa.column("status"), sa.column("created_at"), sa.column("crime_category_id"),
+        ),
+        "assignments": sa.table(
+            "assignments", sa.column("id"), sa.column("role_in_case"), sa.column("assigned_at"),
+            sa.column("crime_report_id"), sa.column("officer_id"),
+        ),
+    }
+    with db.engine.begin() as conn:
+        conn.execute(tables["crime_categories"].insert(), [
+            {"id": i, "name": f"Category {i}", "created_at": start} for i in range(1, 6)
+        ])
+        conn.execute(tables["police_officers"].insert(), [
+            {"id": i, "name": f"Officer {i}", "badge_number": f"{10000000 + i}", "rank": "Sergeant",
+             "email": f"officer{i}@example.com", "phone": f"{700000000 + i:010d}", "password_hash": "x",
+             "role": "officer", "created_at": start}
+            for i in range(1, officers + 1)
+        ])
+
+    assignment_id = 0
+    for chunk_start in range(1, reports + 1, 10000):
+        report_rows, assignment_rows = [], []
+        for i in range(chunk_start, min(chunk_start + 10000, reports + 1)):
+            created_at = start + timedelta(minutes=5 * i)
+            report_rows.append({
+                "id": i, "title": f"Report {i}", "description": "Lorem ipsum dolor sit amet",
+                "location": "Nairobi", "status": rnd.choice(["open", "pending", "closed"]),
+                "created_at": created_at, "crime_category_id": rnd.randint(1, 5),
+            })
+            for officer_id in rnd.sample(range(1, officers + 1), k=rnd.randint(1, 3)):
+                assignment_id += 1
+                assignment_rows.append({
+                    "id": assignment_id, "role_in_case": "Support Officer", "assigned_at": created_at,
+                    "crime_report_id": i, "officer_id": officer_id,
+                })
+        with db.engine.begin() as conn:
+            conn.execute(tables["crime_reports"].insert(), report_rows)
+            conn.execute(tables["assignments"].insert(), assignment_rows)
+
+
+def workload(db, reports):
+    from werkzeug.datastructures import MultiDict
+    from filters import filter_reports
+    from models import CrimeReport, Assignment
+    from pagination import DEFAULT_LIMIT
+
+    def report_page(**args):
+        query = db.session.query(
+            CrimeReport.id, CrimeReport.title, CrimeReport.status,
+            CrimeReport.created_at, CrimeReport.crime_category_id,
+        )
+        query = filter_reports(query, MultiDict(args))
+        return query.order_by(CrimeReport.id.desc()).limit(DEFAULT_LIMIT + 1).statement
+
+    middle = datetime(2020, 1, 1) + timedelta(minutes=5 * reports // 2)
+    page_ids = list(range(reports - DEFAULT_LIMIT, reports))
+    assignment_columns = (Assignment.id, Assignment.crime_report_id, Assignment.officer_id)
+    return {
+        "reports_by_status": report_page(status="pending"),
+        "reports_by_category": report_page(category_id="3"),
+        "reports_by_date_range": report_page(
+            created_from=middle.isoformat(), created_to=(middle + timedelta(days=1)).isoformat(),
+        ),
+        "reports_by_officer": report_page(officer_id="17"),
+        "assignments_for_report_page": db.select(*assignment_columns).where(Assignment.crime_report_id.in_(page_ids)),
+        "assignments_for_officer": db.select(*assignment_columns).where(Assignment.officer_id == 17),
+    }
+
+
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    if conn.dialect.name == "postgresql":
+        return [row[0] for row in conn.exec_driver_sql("EXPLAIN ANALYZE " + sql)]
+    return [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+
+
+def measure(db, statements, repeat):
+    results = {}
+    with db.engine.connect() as conn:
+        for name, stmt in statements.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = {
+                "p50_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+                "plan": explain(conn, stmt),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--reports", type=int, default=200000)
+    parser.add_argument("--officers", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "bench_indexes.db"
+    )
+
+    import sqlalchemy as sa
+    from flask_migrate import downgrade, upgrade
+    from app import app
+    from models import db
+
+    with app.app_context():
+        downgrade(directory=MIGRATIONS, revision="base")
+        db.drop_all()
+        db.session.execute(sa.text("DROP TABLE IF EXISTS alembic_version"))
+        db.session.commit()
+        upgrade(directory=MIGRATIONS, revision=BEFORE)
+
+        start = time.perf_counter()
+        seed(db, sa, args.reports, args.officers, args.seed)
+        print(f"Seeded {args.reports} reports in {time.perf_counter() - start:.1f}s", flush=True)
+
+        statements = workload(db, args.reports)
+        before = measure(db, statements, args.repeat)
+        upgrade(directory=MIGRATIONS, revision=AFTER)
+        after = measure(db, statements, args.repeat)
+        dialect = db.engine.dialect.name
+
+    print(json.dumps({"database": dialect, "reports": args.reports, "before": before, "after": after}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Login throughput and API tail latency while /api/login is being hammered.
+
+Run from the server directory:
+
+    python -m benchmarks.login_storm --hash-workers 0,2 --rounds 12
+
+Each PASSWORD_HASH_WORKERS setting gets its own server process and a
+throwaway SQLite database served by a threaded WSGI server; 0 reproduces
+the old behaviour of hashing inline on every request thread.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 2)
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def hammer(fn, stop, results):
+    while not stop.is_set():
+        results.append(fn())
+
+
+def phase(base, login_threads, api_threads, duration, officers):
+    stop = threading.Event()
+    logins, reads = [], []
+    threads = [
+        threading.Thread(target=hammer, args=(
+            lambda i=i: request(f"{base}/api/login", {"email": f"officer{i % officers}@example.com", "password": "password123"}),
+            stop, logins,
+        ))
+        for i in range(login_threads)
+    ] + [
+        threading.Thread(target=hammer, args=(lambda: request(f"{base}/api/reports?limit=20"), stop, reads))
+        for _ in range(api_threads)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    ok = [t for status, t in logins if status == 200]
+    return {
+        "logins_per_sec": round(len(ok) / duration, 1),
+        "logins_rejected_503": sum(1 for status, _ in logins if status == 503),
+        "login_p99_ms": percentile(ok, 99),
+        "api_requests_per_sec": round(len(reads) / duration, 1),
+        "api_p50_ms": percentile([t for _, t in reads], 50),
+        "api_p99_ms": percentile([t for _, t in reads], 99),
+    }
+
+
+def serve(args):
+    from werkzeug.serving import make_server
+    from app import app
+    from models import db, CrimeCategory, CrimeReport, PoliceOfficer
+    from passwords import password_hasher
+
+    with app.app_context():
+        db.create_all()
+        category = CrimeCategory(name="Theft")
+        db.session.add(category)
+        db.session.add_all(
+            CrimeReport(title=f"Report {i}", description="d", location="Nairobi", crime_category=category)
+            for i in range(200)
+        )
+        password_hash = password_hasher.hash("password123")
+        db.session.add_all(
+            PoliceOfficer(name=f"Officer {i}", badge_number=f"{10000000 + i}", rank="Sergeant",
+                          email=f"officer{i}@example.com", phone=f"{700000000 + i:010d}", password_hash=password_hash)
+            for i in range(args.officers)
+        )
+        db.session.commit()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hash-workers", default="0,2")
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--login-threads", type=int, default=32)
+    parser.add_argument("--api-threads", type=int, default=4)
+    parser.add_argument("--officers", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    results = []
+    for workers in args.hash_workers.split(","):
+        env = dict(
+            os.environ,
+            DATABASE_URL="sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_login.db"),
+            BCRYPT_LOG_ROUNDS=str(args.rounds),
+            PASSWORD_HASH_WORKERS=workers,
+        )
+        # The server gets its own process so the load generator's threads do
+        # not compete with it for the GIL.
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.login_storm", "--serve", "--officers", str(args.officers)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        try:
+            base = f"http://127.0.0.1:{server.stdout.readline().strip()}"
+            results.append({
+                "hash_workers": int(workers),
+                "idle": phase(base, 0, args.api_threads, args.duration / 2, args.officers),
+                "storm": phase(base, args.login_threads, args.api_threads, args.duration, args.officers),
+            })
+        finally:
+            server.terminate()
+            server.wait()
+        print(json.dumps(results[-1]), flush=True)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
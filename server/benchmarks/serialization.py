@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Rows/sec of SerializerMixin.to_dict() versus the precompiled serializers.
+
+Run from the server directory:
+
+    python -m benchmarks.serialization --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from itertools import cycle, islice
+
+from models import PoliceOfficer, CrimeCategory, CrimeReport, Assignment
+from serializers import serialize_report, serialize_assignment, dumps
+
+POOL_SIZE = 10000
+
+
+def build_pool(size):
+    # Transient objects: nothing touches the database, so the numbers measure
+    # serialization alone. Rows are cycled from the pool to reach large sizes.
+    now = datetime.now()
+    categories = [CrimeCategory(id=i, name=f"Category {i}", created_at=now) for i in range(5)]
+    reports, assignments = [], []
+    for i in range(size):
+        report = CrimeReport(
+            id=i, title=f"Report {i}", description="Lorem ipsum " * 8,
+            location="Nairobi", status="open", created_at=now,
+            crime_category_id=i % 5, crime_category=categories[i % 5],
+        )
+        officer = PoliceOfficer(
+            id=i, name=f"Officer {i}", badge_number=f"{10000000 + i}", rank="Sergeant",
+            email=f"officer{i}@example.com", phone=f"{700000000 + i:010d}",
+            password_hash="x", role="officer", created_at=now,
+        )
+        assignment = Assignment(
+            id=i, role_in_case="Lead Investigator", assigned_at=now,
+            crime_report_id=i, officer_id=i, crime_report=report, officer=officer,
+        )
+        reports.append(report)
+        assignments.append(assignment)
+    return reports, assignments
+
+
+def rows_per_sec(fn, pool, n):
+    start = time.perf_counter()
+    for row in islice(cycle(pool), n):
+        fn(row)
+    return n / (time.perf_counter() - start)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    reports, assignments = build_pool(POOL_SIZE)
+    page = [serialize_report(r) for r in reports[:1000]]
+
+    results = {"encode_1000_reports_ms": {
+        "json": timed(lambda: json.dumps(page)) * 1000,
+        "dumps": timed(lambda: dumps(page)) * 1000,
+    }}
+    for n in (int(s) for s in args.sizes.split(",")):
+        results[n] = {
+            "reports_to_dict": rows_per_sec(lambda r: r.to_dict(), reports, n),
+            "reports_precompiled": rows_per_sec(serialize_report, reports, n),
+            "assignments_to_dict": rows_per_sec(lambda a: a.to_dict(), assignments, n),
+            "assignments_precompiled": rows_per_sec(serialize_assignment, assignments, n),
+        }
+        print(n, {k: round(v) for k, v in results[n].items()}, flush=True)
+
+    print(json.dumps(results, indent=2))
+
+
+
+if __name__ == "__main__":
+    main()
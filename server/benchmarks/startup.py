@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Cold start: import, create_app and first-request latency, as JSON.
+
+Run from the server directory:
+
+    python -m benchmarks.startup --runs 10 --output before.json
+    git checkout <other commit>
+    python -m benchmarks.startup --runs 10 --output after.json
+
+Every run is a fresh interpreter that imports app, builds the app and sends
+each --paths request twice through the Flask test client, so the first
+request's lazy work (connecting, first queries, caches) shows against the
+second's. Officer and category lists are left out of the default --paths:
+their second request is a response cache hit, not a warm one. With --target
+gunicorn, a local gunicorn is also started --runs times with and without
+preload_app, timing how long it takes to answer /api/health. Without --database-url a throwaway SQLite file is used.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Only the standard library at module level: the --measure child must pay
+# for every import of the app itself.
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATHS = "/api/health,/api/stats,/api/reports,/api/reports/1,/api/analytics/timeseries"
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def measure(paths):
+    """Runs in the child process; prints one run's timings."""
+    start = time.perf_counter()
+    import app as module
+    imported = time.perf_counter()
+    # Trees from before create_app build the app on import.
+    app = module.create_app() if hasattr(module, "create_app") else module.app
+    created = time.perf_counter()
+
+    client = app.test_client()
+    requests = {}
+    for path in paths:
+        timings = []
+        for _ in range(2):
+            begin = time.perf_counter()
+            resp = client.get(path)
+            resp.get_data()
+            timings.append(time.perf_counter() - begin)
+        requests[path] = {"status": resp.status_code, "first_ms": ms(timings[0]), "second_ms": ms(timings[1])}
+    print(json.dumps({
+        "import_ms": ms(imported - start),
+        "create_app_ms": ms(created - imported),
+        # From `import app` to the first path's response.
+        "first_response_ms": round(ms(created - start) + requests[paths[0]]["first_ms"], 2),
+        "requests": requests,
+    }))
+
+
+def summarize(values):
+    return {"median_ms": round(statistics.median(values), 2), "min_ms": min(values), "max_ms": max(values)}
+
+
+def in_process(paths, runs):
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.startup", "--measure", "--paths", ",".join(paths)],
+            cwd=SERVER_DIR, text=True,
+        )
+        result = json.loads(out.strip().splitlines()[-1])
+        # Includes interpreter start-up and teardown.
+        result["process_ms"] = ms(time.perf_counter() - start)
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr, flush=True)
+
+    summary = {
+        name: summarize([r[name] for r in results])
+        for name in ("import_ms", "create_app_ms", "first_response_ms", "process_ms")
+    }
+    summary["requests"] = {
+        path: {
+            "status": results[-1]["requests"][path]["status"],
+            "first": summarize([r["requests"][path]["first_ms"] for r in results]),
+            "second": summarize([r["requests"][path]["second_ms"] for r in results]),
+        }
+        for path in paths
+    }
+    return summary
+
+
+def gunicorn_ready(workers, preload, runs):
+    from benchmarks.api import start_server
+
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0")
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        server, _ = start_server([
+            sys.executable, "-m", "gunicorn", "-c", os.path.join(SERVER_DIR, "gunicorn.conf.py"),
+            "--chdir", SERVER_DIR, "-b", "127.0.0.1:{port}", "-w", str(workers), "--log-level", "warning", "app:app",
+        ], env)
+        timings.append(ms(time.perf_counter() - start))
+        server.terminate()
+        server.wait()
+    return summarize(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=10000)
+    parser.add_argument("--officers", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="wiped and reseeded unless --reuse-data")
+    parser.add_argument("--reuse-data", action="store_true", help="skip seeding; the database must match --reports/--officers")
+    parser.add_argument("--target", default="process,gunicorn")
+    parser.add_argument("--paths", default=DEFAULT_PATHS, help="comma-separated GET paths, in request order")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = [path for path in args.paths.split(",") if path]
+    if args.measure:
+        return measure(paths)
+
+    from sqlalchemy.engine import make_url
+
+    from benchmarks.api import git_revision, prepare_database
+
+    prepare_database(args)
+
+    report = {
+        **git_revision(),
+        "dataset": {
+            "reports": args.reports, "officers": args.officers, "seed": args.seed,
+            "database": make_url(os.environ["DATABASE_URL"]).get_backend_name(),
+        },
+        "runs": args.runs,
+        "targets": {},
+    }
+    targets = args.target.split(",")
+    if "process" in targets:
+        report["targets"]["process"] = in_process(paths, args.runs)
+    if "gunicorn" in targets:
+        report["targets"]["gunicorn"] = {
+            "workers": args.workers,
+            "ready": {
+                "preload": gunicorn_ready(args.workers, True, args.runs),
+                "no_preload": gunicorn_ready(args.workers, False, args.runs),
+            },
+        }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
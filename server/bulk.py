@@ -0,0 +1,244 @@
+import json
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+from flask import request
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from analytics import apply_deltas
+from filters import filter_reports
+from geo import geo_index
+from models import db, REPORT_STATUSES, PoliceOfficer, CrimeCategory, CrimeReport, Assignment
+from stats import bump
+
+CHUNK_SIZE = 1000
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson", "application/jsonlines"}
+
+
+def read_items():
+    """Yield (index, item) from a JSON array body or an NDJSON stream.
+
+    NDJSON is read line by line from the request stream, so large imports
+    are never held in memory at once. Lines that are not valid JSON are
+    yielded as ValueError instances and reported against their index.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        for index, line in enumerate(request.stream):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                yield index, ValueError(f"Invalid JSON: {e}")
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array or an NDJSON stream")
+    yield from enumerate(data)
+
+
+def _require(item, fields):
+    if isinstance(item, Exception):
+        raise item
+    if not isinstance(item, dict):
+        raise ValueError("Expected a JSON object")
+    missing = [f for f in fields if item.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+
+def _ids(items, field):
+    ids = set()
+    for _, item in items:
+        try:
+            ids.add(int(item[field]))
+        except (TypeError, ValueError, KeyError):
+            pass
+    return ids
+
+
+def prepare_reports(chunk):
+    rows, errors = [], []
+    category_ids = set(db.session.scalars(
+        db.select(CrimeCategory.id).where(CrimeCategory.id.in_(_ids(chunk, "crime_category_id")))
+    ))
+
+    for index, item in chunk:
+        try:
+            _require(item, ("title", "description", "location", "crime_category_id"))
+            # Building a transient model runs the same @validates hooks as
+            # CrimeReportResource.post; it is never added to the session.
+            report = CrimeReport(
+                title=item["title"],
+                description=item["description"],
+                location=item["location"],
+                status=item.get("status", "open"),
+                crime_category_id=int(item["crime_category_id"]),
+                latitude=item.get("latitude"),
+                longitude=item.get("longitude"),
+            )
+            if report.crime_category_id not in category_ids:
+                raise ValueError(f"Unknown crime_category_id {report.crime_category_id}")
+            # Core inserts skip the session hook that geocodes reports.
+            latitude, longitude, geohash = geo_index.locate(report.location, report.latitude, report.longitude)
+            created_at = datetime.fromisoformat(item["created_at"]) if item.get("created_at") else datetime.now()
+            rows.append((index, {
+                "title": report.title,
+                "description": report.description,
+                "location": report.location,
+                "status": report.status,
+                "crime_category_id": report.crime_category_id,
+                "created_at": created_at,
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geohash,
+            }))
+        except (TypeError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+    return rows, errors
+
+
+def record_reports(rows):
+    """Counter and rollup upkeep for inserted report rows, inside their transaction."""
+    statuses = Counter(row["status"] for row in rows)
+    bump(("reports", len(rows)), *((f"reports.{s}", n) for s, n in statuses.items()))
+    apply_deltas(db.session.connection(), Counter(
+        (row["created_at"].date(), row["crime_category_id"], row["status"]) for row in rows
+    ))
+
+
+def prepare_assignments(chunk):
+    rows, errors = [], []
+    report_ids = set(db.session.scalars(
+        db.select(CrimeReport.id).where(CrimeReport.id.in_(_ids(chunk, "crime_report_id")))
+    ))
+    officer_ids = set(db.session.scalars(
+        db.select(PoliceOfficer.id).where(PoliceOfficer.id.in_(_ids(chunk, "officer_id")))
+    ))
+    seen = set(db.session.execute(
+        db.select(Assignment.crime_report_id, Assignment.officer_id)
+        .where(Assignment.crime_report_id.in_(report_ids))
+    ).all())
+
+    for index, item in chunk:
+        try:
+            _require(item, ("role_in_case", "crime_report_id", "officer_id"))
+            pair = (int(item["crime_report_id"]), int(item["officer_id"]))
+            if pair[0] not in report_ids:
+                raise ValueError(f"Unknown crime_report_id {pair[0]}")
+            if pair[1] not in officer_ids:
+                raise ValueError(f"Unknown officer_id {pair[1]}")
+            if pair in seen:
+                raise ValueError("Officer is already assigned to this report")
+            seen.add(pair)
+            rows.append((index, {
+                "role_in_case": item["role_in_case"],
+                "crime_report_id": pair[0],
+                "officer_id": pair[1],
+                "assigned_at": datetime.now(),
+            }))
+        except (TypeError, ValueError) as e:
+            errors.append({"index": index, "error": str(e)})
+    return rows, errors
+
+
+def record_assignments(rows):
+    bump(("assignments", len(rows)))
+
+
+def _insert_chunk(model, indexed_rows, record, errors):
+    rows = [row for _, row in indexed_rows]
+    try:
+        db.session.execute(insert(model), rows)
+        record(rows)
+        db.session.commit()
+        return len(rows)
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    # Something in the chunk violated a constraint (usually a concurrent
+    # writer); retry row by row so only the offending rows are rejected.
+    inserted = 0
+    for index, row in indexed_rows:
+        try:
+            db.session.execute(insert(model), [row])
+            record([row])
+            db.session.commit()
+            inserted += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            errors.append({"index": index, "error": str(getattr(e, "orig", e))})
+    return inserted
+
+
+def ingest(model, prepare, record, chunk_size=CHUNK_SIZE):
+    """Validate and insert request items in chunks, one transaction per chunk.
+
+    `record` is called with each chunk's inserted rows before it commits, to
+    keep the counters and other derived tables in step.
+    """
+    items = read_items()
+    inserted, errors = 0, []
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        rows, chunk_errors = prepare(chunk)
+        errors.extend(chunk_errors)
+        if rows:
+            inserted += _insert_chunk(model, rows, record, errors)
+    errors.sort(key=lambda e: e["index"])
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+
+def update_report_status(args, data):
+    """Move the reports matching `args` filters, or `ids` in the body, to the body's status.
+
+    Rather than loading and flushing each report, this issues one UPDATE per
+    status the reports can move from, which also gives the stat counters
+    and rollups exact deltas. Each statement bumps version and updated_at, so /api/sync
+    picks the rows up and later PATCHes see them as changed; like other
+    bulk statements it publishes no /api/events.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    # A transient report runs the same validate_status hook as a PATCH.
+    status = CrimeReport(status=data.get("status")).status
+
+    stmt = filter_reports(update(CrimeReport), args)
+    ids = data.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list of report ids")
+        try:
+            stmt = stmt.where(CrimeReport.id.in_(sorted({int(i) for i in ids})))
+        except (TypeError, ValueError):
+            raise ValueError("ids must be a list of report ids")
+    elif stmt.whereclause is None:
+        raise ValueError("Give ids or at least one filter; refusing to update every report")
+
+    now = datetime.now()
+    changes, rollups, updated = [], Counter(), 0
+    for old_status in sorted(REPORT_STATUSES - {status}):
+        moved = db.session.execute(
+            stmt.where(CrimeReport.status == old_status)
+            .values(status=status, version=CrimeReport.version + 1, updated_at=now)
+            .returning(CrimeReport.created_at, CrimeReport.crime_category_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        if moved:
+            changes.append((f"reports.{old_status}", -len(moved)))
+            changes.append((f"reports.{status}", len(moved)))
+            updated += len(moved)
+        for created_at, category_id in moved:
+            rollups[created_at.date(), category_id, old_status] -= 1
+            rollups[created_at.date(), category_id, status] += 1
+    if changes:
+        bump(*changes)
+    apply_deltas(db.session.connection(), rollups)
+    db.session.commit()
+    return {"updated": updated, "status": status}
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+from sqlalchemy import event
+
+from serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class RedisBackend:
+    """Shared cache for multi-worker deployments; needs the `redis` package.
+
+    Any server speaking the Redis protocol (Redis, Valkey, KeyDB, ...) works.
+    Connection errors degrade to cache misses rather than failing requests.
+    """
+
+    def __init__(self, url, ttl):
+        import redis
+
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+
+    def get(self, key):
+        try:
+            return self._redis.get(key)
+        except self._errors as e:
+            logger.warning("cache get failed: %s", e)
+            return None
+
+    def set(self, key, value):
+        try:
+            self._redis.set(key, value, ex=self.ttl)
+        except self._errors as e:
+            logger.warning("cache set failed: %s", e)
+
+    def delete_prefix(self, prefix):
+        try:
+            keys = list(self._redis.scan_iter(match=f"{prefix}*", count=500))
+            if keys:
+                self._redis.delete(*keys)
+        except self._errors as e:
+            logger.warning("cache invalidation failed: %s", e)
+
+
+class ResponseCache:
+    """Read-through cache for JSON GET responses, with ETag revalidation.
+
+    Each cached namespace declares the models its responses are built from.
+    Writes to any of those models, whether through the unit of work or bulk
+    ORM statements, drop the namespace once the transaction commits.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.dependencies = {}
+
+    def init_app(self, app, db):
+        url = app.config.get("CACHE_URL", "memory://")
+        ttl = app.config.get("CACHE_TTL", 300)
+        if url.startswith("memory://"):
+            self.backend = MemoryBackend(app.config.get("CACHE_MAX_ENTRIES", 1024), ttl)
+        else:
+            self.backend = RedisBackend(url, ttl)
+
+        event.listen(db.session, "after_flush", self._record_flush)
+        event.listen(db.session, "do_orm_execute", self._record_statement)
+        event.listen(db.session, "after_commit", self._invalidate)
+        event.listen(db.session, "after_rollback", self._discard)
+
+    def depends_on(self, namespace, *models):
+        self.dependencies[namespace] = set(models)
+
+    def cached(self, namespace):
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                key = f"response:{namespace}:{request.full_path}"
+                entry = self.backend.get(key) if self.backend else None
+                if entry is None:
+                    result = f(*args, **kwargs)
+                    body, status = result if isinstance(result, tuple) else (result, 200)
+                    if status != 200:
+                        return result
+                    payload = dumps(body)
+                    etag = hashlib.sha1(payload).hexdigest()
+                    if isinstance(body, dict) and "version" in body:
+                        # A single versioned row leads with its version so the
+                        # tag also works in If-Match (see concurrency.py).
+                        etag = f"{body['version']}-{etag}"
+                    entry = etag.encode() + b"\n" + payload
+                    if self.backend:
+                        self.backend.set(key, entry)
+
+                etag, payload = entry.split(b"\n", 1)
+                etag = etag.decode()
+                if etag in request.if_none_match:
+                    resp = Response(status=304)
+                else:
+                    resp = Response(payload + b"\n", mimetype="application/json")
+                resp.set_etag(etag)
+                # Let browsers keep the body but revalidate it on every use.
+                resp.headers["Cache-Control"] = "no-cache"
+                return resp
+            return decorated
+        return decorator
+
+    def _changed(self, session):
+        return session.info.setdefault("cache_changed_models", set())
+
+    def _record_flush(self, session, flush_context):
+        changed = self._changed(session)
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            changed.add(type(obj))
+
+    def _record_statement(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            changed = self._changed(orm_execute_state.session)
+            changed.update(mapper.class_ for mapper in orm_execute_state.all_mappers)
+
+    def _invalidate(self, session):
+        changed = session.info.pop("cache_changed_models", None)
+        if not changed or not self.backend:
+            return
+        for namespace, models in self.dependencies.items():
+            if changed & models:
+                self.backend.delete_prefix(f"response:{namespace}:")
+
+    def _discard(self, session):
+        session.info.pop("cache_changed_models", None)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,37 @@
+"""Optimistic concurrency for officers and reports.
+
+Both tables carry a version that SQLAlchemy checks and increments in every
+ORM UPDATE (version_id_col), so a write based on a stale read raises
+StaleDataError instead of silently overwriting someone else's change.
+
+Their entity tags start with that version: "3" on a report, "3-<digest>" on
+a cached officer response. A PATCH sent with one of them in If-Match, or
+with the version it read in the body, is refused with 412 Precondition
+Failed once the row has moved on.
+"""
+from flask import request
+from werkzeug.http import quote_etag
+
+
+def etag_header(obj):
+    return {"ETag": quote_etag(str(obj.version))}
+
+
+def version_matches(obj, version=None):
+    """Whether the If-Match header and a version sent in the body both allow updating obj."""
+    current = str(obj.version)
+    if version is not None and str(version) != current:
+        return False
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return True
+    return any(tag.split("-", 1)[0] == current for tag in if_match)
+
+
+def changed(obj, status):
+    """The response to a PATCH whose row has moved on: 412 for a failed precondition, 409 for a lost race."""
+    return (
+        {"error": "The record was changed by another request; fetch it and try again.", "version": obj.version},
+        status,
+        etag_header(obj),
+    )
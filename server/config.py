@@ -5,10 +5,107 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, ".env"))
 
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "super-secret-key")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # "memory://" keeps a per-worker LRU; point it at a redis:// URL to share
+    # the response cache (and its invalidations) between gunicorn workers.
+    # A commit only invalidates the memory cache of the process that made it,
+    # so other workers and writes from worker.py jobs show up after CACHE_TTL.
+    CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", 5 if CACHE_URL.startswith("memory://") else 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+
+    # bcrypt cost factor; existing hashes are upgraded on the next login.
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+    # Threads per worker allowed to run bcrypt at once, and how many more
+    # logins may wait for one before the API answers 503.
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 16))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 5))
+
+    # Postgres connection pool, per gunicorn worker: the database sees up to
+    # WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+    # Recycle connections before upstream idle timeouts drop them, and ping
+    # on checkout so a dead connection is replaced instead of failing a request.
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", True)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 30000))
+    # Set when DATABASE_URL points at PgBouncer in transaction pooling mode.
+    DB_PGBOUNCER = env_flag("DB_PGBOUNCER")
+
+    # Comma-separated read replica URLs; GET requests read from them. After
+    # writing, a client reads from the primary for REPLICA_STICKY_SECONDS,
+    # and a replica that stops answering is skipped for REPLICA_RETRY_SECONDS.
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+    REPLICA_RETRY_SECONDS = float(os.environ.get("REPLICA_RETRY_SECONDS", 30))
+
+    # SQL statements slower than this are logged and counted; 0 disables.
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+    # When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # /api/sync re-sends changes from this window on each poll to catch
+    # transactions that commit late, and keeps deletes for SYNC_TOMBSTONE_DAYS;
+    # clients that have not synced for longer must start over.
+    SYNC_OVERLAP_SECONDS = float(os.environ.get("SYNC_OVERLAP_SECONDS", 10))
+    SYNC_TOMBSTONE_DAYS = float(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+
+    # /api/events: "memory://" only reaches streams held by the same worker
+    # process; a postgresql:// URL relays events between workers with
+    # LISTEN/NOTIFY. Clients further than EVENTS_QUEUE_SIZE events behind are
+    # disconnected.
+    EVENTS_URL = os.environ.get("EVENTS_URL", "memory://")
+    EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", 256))
+    EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("EVENTS_KEEPALIVE_SECONDS", 15))
+
+    # Each worker's officer workload index sees its own writes at once and
+    # reloads from the database this often to pick up other workers'.
+    RECOMMENDATIONS_REFRESH_SECONDS = float(os.environ.get("RECOMMENDATIONS_REFRESH_SECONDS", 60))
+
+    # archive.py moves closed reports filed longer ago than this out of the
+    # live tables.
+    ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", 365))
+
+    # Background jobs (jobs.py, run by worker.py). An idle worker polls every
+    # JOBS_POLL_SECONDS; a failed job is retried up to JOBS_MAX_ATTEMPTS
+    # times, JOBS_RETRY_SECONDS after the first failure and twice as long
+    # after each further one. A job whose worker has not been heard from for
+    # JOBS_LEASE_SECONDS is taken over by another, except on SQLite.
+    JOBS_POLL_SECONDS = float(os.environ.get("JOBS_POLL_SECONDS", 2))
+    JOBS_MAX_ATTEMPTS = int(os.environ.get("JOBS_MAX_ATTEMPTS", 3))
+    JOBS_RETRY_SECONDS = float(os.environ.get("JOBS_RETRY_SECONDS", 30))
+    JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", 120))
+    # Files jobs produce, such as exports; workers and web processes must
+    # share it. Finished jobs and their files are removed after
+    # JOBS_RETENTION_DAYS.
+    JOBS_OUTPUT_DIR = os.environ.get("JOBS_OUTPUT_DIR", os.path.join(basedir, "job_output"))
+    JOBS_RETENTION_DAYS = float(os.environ.get("JOBS_RETENTION_DAYS", 7))
+    # seed jobs create officers with a fixed password; development only.
+    JOBS_ALLOW_SEED = False
+
+    # Place names reports are geocoded against: a name,latitude,longitude CSV
+    # or a GeoNames dump (*.txt), e.g. cities15000.txt for worldwide coverage.
+    GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH", os.path.join(basedir, "data", "gazetteer.csv"))
+
+    # The React production build, served by the catch-all routes in resources.py.
+    FRONTEND_BUILD_DIR = os.environ.get(
+        "FRONTEND_BUILD_DIR", os.path.join(os.path.dirname(basedir), "client", "build")
+    )
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -17,12 +114,10 @@ class DevelopmentConfig(Config):
         "DATABASE_URL",
         f"sqlite:///{os.path.join(basedir, 'app.db')}"
     )
+    JOBS_ALLOW_SEED = env_flag("JOBS_ALLOW_SEED", True)
 
 
 class ProductionConfig(Config):
     DEBUG = False
+    # Required; create_app refuses to start without it.
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
-    if not SQLALCHEMY_DATABASE_URI:
-        raise ValueError(
-            "DATABASE_URL environment variable not set! You must set it on Render."
-        )
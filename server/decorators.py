@@ -9,10 +9,16 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated
 
-def rank_required(f):
+def is_admin():
+    # login sets the officer's role; there is no rank in the session.
+    return session.get("role") == "admin"
+
+def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        if session.get("rank") != "inspector":
+        if "user_id" not in session:
+            return {"error": "Login required"}, 401
+        if not is_admin():
             return {"error": "Admin access required"}, 403
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,219 @@
+"""Server-Sent Events for report and assignment changes (/api/events).
+
+Each open stream waits on its own queue, so under gunicorn's sync workers
+every connected client holds a whole worker. gunicorn.conf.py runs gevent
+workers, where an idle stream costs a greenlet; GUNICORN_WORKER_CONNECTIONS
+caps the streams (and requests) each worker holds open.
+
+With more than one worker process, set EVENTS_URL to the Postgres database
+so commits in any worker reach the streams held by every other one.
+"""
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+
+from models import CrimeReport, Assignment
+from serializers import ROW_SERIALIZERS
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = {CrimeReport: "reports", Assignment: "assignments"}
+CHANNEL = "crime_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_BYTES = 7900
+RETRY_MS = 5000
+
+
+def _encode(data):
+    return json.dumps(data, separators=(",", ":"))
+
+
+class MemoryBackend:
+    """Delivers events to the streams open in this process only."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, events):
+        for e in events:
+            self.deliver(e)
+
+    def start(self):
+        pass
+
+
+class PostgresBackend:
+    """Relays events between processes with LISTEN/NOTIFY; needs psycopg2.
+
+    A process starts listening, on one extra connection in a background
+    thread, the first time a client subscribes. Postgres delivers every
+    notification to all listeners, the publishing process included.
+    """
+
+    def __init__(self, url, deliver):
+        self.deliver = deliver
+        self.engine = create_engine(url, pool_size=1, max_overflow=2, pool_pre_ping=True)
+        self._listening_pid = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=lambda: self.engine.dispose(close=False))
+
+    def publish(self, events):
+        with self.engine.begin() as conn:
+            for e in events:
+                payload = _encode(e)
+                if len(payload.encode()) > MAX_NOTIFY_BYTES:
+                    # Subscribers fetch the row themselves when data is null.
+                    payload = _encode({**e, "data": None})
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+    def start(self):
+        with self._lock:
+            if self._listening_pid == os.getpid():
+                return
+            self._listening_pid = os.getpid()
+        threading.Thread(target=self._listen, name="events-listener", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                conn = self.engine.raw_connection()
+                try:
+                    dbapi_conn = conn.driver_connection
+                    dbapi_conn.autocommit = True
+                    dbapi_conn.cursor().execute(f"LISTEN {CHANNEL}")
+                    while True:
+                        if select.select([dbapi_conn], [], [], 60)[0]:
+                            dbapi_conn.poll()
+                            while dbapi_conn.notifies:
+                                self.deliver(json.loads(dbapi_conn.notifies.pop(0).payload))
+                finally:
+                    conn.invalidate()
+            except Exception:
+                logger.exception("event listener lost its connection, reconnecting")
+                time.sleep(RETRY_MS / 1000)
+
+
+class Subscription:
+    def __init__(self, size, collections):
+        self.queue = queue.Queue(size)
+        self.collections = collections
+        self.overflowed = False
+
+
+class EventBroker:
+    """Publishes committed CrimeReport and Assignment changes to subscribers.
+
+    Changes are collected as the session flushes and published only after
+    the transaction commits; a rollback discards them. Events carry the row
+    in the same flat form as /api/sync, or data: null for deletes.
+
+    A client that falls EVENTS_QUEUE_SIZE events behind is sent an
+    `overflow` event and disconnected; it should catch up through
+    /api/sync before reconnecting. Bulk INSERT/UPDATE/DELETE statements
+    bypass the session and publish nothing.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.queue_size = 256
+        self.keepalive = 15
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        url = app.config.get("EVENTS_URL", "memory://")
+        self.queue_size = app.config.get("EVENTS_QUEUE_SIZE", 256)
+        self.keepalive = app.config.get("EVENTS_KEEPALIVE_SECONDS", 15)
+        if url.startswith("memory://"):
+            self.backend = MemoryBackend(self._deliver)
+        else:
+            self.backend = PostgresBackend(url, self._deliver)
+
+        event.listen(db.session, "after_flush", self._record_flush)
+        event.listen(db.session, "after_flush_postexec", self._serialize)
+        event.listen(db.session, "after_commit", self._publish)
+        event.listen(db.session, "after_rollback", self._discard)
+
+    def _record_flush(self, session, flush_context):
+        changed = session.info.setdefault("events_changed", [])
+        for obj in session.new:
+            if type(obj) in COLLECTIONS:
+                changed.append(("created", obj))
+        for obj in session.dirty:
+            if type(obj) in COLLECTIONS and session.is_modified(obj, include_collections=False):
+                changed.append(("updated", obj))
+        events = session.info.setdefault("events", [])
+        for obj in session.deleted:
+            if type(obj) in COLLECTIONS:
+                events.append({"type": "deleted", "collection": COLLECTIONS[type(obj)], "id": obj.id, "data": None})
+
+    def _serialize(self, session, flush_context):
+        # Rows are read after the flush so they include generated ids and
+        # onupdate timestamps.
+        events = session.info.setdefault("events", [])
+        for kind, obj in session.info.pop("events_changed", ()):
+            events.append({
+                "type": kind,
+                "collection": COLLECTIONS[type(obj)],
+                "id": obj.id,
+                "data": ROW_SERIALIZERS[obj.__tablename__](obj),
+            })
+
+    def _publish(self, session):
+        events = session.info.pop("events", None)
+        session.info.pop("events_changed", None)
+        if not events:
+            return
+        try:
+            self.backend.publish(events)
+        except Exception:
+            # The transaction is already committed; never fail the request.
+            logger.exception("could not publish %d events", len(events))
+
+    def _discard(self, session):
+        session.info.pop("events", None)
+        session.info.pop("events_changed", None)
+
+    def _deliver(self, e):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.collections and e["collection"] not in sub.collections:
+                continue
+            try:
+                sub.queue.put_nowait(e)
+            except queue.Full:
+                sub.overflowed = True
+
+    def stream(self, collections=None):
+        """Yield an SSE stream of events, with a comment line as a keepalive."""
+        self.backend.start()
+        sub = Subscription(self.queue_size, collections)
+        with self._lock:
+            self._subscribers.add(sub)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    e = sub.queue.get(timeout=self.keepalive)
+                except queue.Empty:
+                    e = None
+                if sub.overflowed:
+                    yield "event: overflow\ndata: {}\n\n"
+                    return
+                if e is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {e['collection']}.{e['type']}\ndata: {_encode(e)}\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(sub)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,91 @@
+import csv
+import io
+
+from sqlalchemy import event
+
+from models import db, CrimeReport
+from loaders import eager_options
+from serializers import dumps, serialize_report
+
+BATCH_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+CSV_HEADER = (
+    "id", "title", "description", "location", "status", "created_at",
+    "crime_category_id", "crime_category", "officer_ids", "officers", "latitude", "longitude",
+)
+
+
+def stream_reports(stmt):
+    """Iterate over the reports `stmt` selects, in id order, over a server-side cursor.
+
+    Only one batch of reports (plus its eager-loaded category and officers)
+    is alive at a time, so memory stays flat however large the table is.
+    """
+    stmt = stmt.options(*eager_options(CrimeReport)).order_by(CrimeReport.id)
+    return db.session.scalars(stmt.execution_options(yield_per=BATCH_SIZE))
+
+
+def _eager_loads_unbatched(orm_execute_state):
+    # Once any do_orm_execute listener exists, selectinload's queries inherit
+    # the parent's yield_per and fail on their own unique(); each of them
+    # only covers one batch anyway.
+    if orm_execute_state.is_relationship_load and orm_execute_state.execution_options.get("yield_per"):
+        orm_execute_state.update_execution_options(yield_per=None)
+
+
+def init_app(app, db):
+    event.listen(db.session, "do_orm_execute", _eager_loads_unbatched)
+
+
+def _buffered(lines):
+    # Rows are coalesced into ~64KB writes; the first one goes out as soon
+    # as it is ready so clients see bytes immediately.
+    buffer, size, first = [], 0, True
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if first or size >= FLUSH_BYTES:
+            yield b"".join(buffer)
+            buffer, size, first = [], 0, False
+    if buffer:
+        yield b"".join(buffer)
+
+
+def ndjson_export(reports):
+    return _buffered(dumps(serialize_report(r)) + b"\n" for r in reports)
+
+
+def _csv_rows(reports):
+    yield CSV_HEADER
+    for r in reports:
+        data = serialize_report(r)
+        assignments = data["assignments"]
+        yield (
+            data["id"], data["title"], data["description"], data["location"], data["status"],
+            data["created_at"], data["crime_category_id"],
+            data["crime_category"]["name"] if data["crime_category"] else "",
+            ";".join(str(a["officer_id"]) for a in assignments),
+            ";".join(f"{a['officer']['name']} ({a['role_in_case']})" for a in assignments if a["officer"]),
+            data["latitude"] if data["latitude"] is not None else "",
+            data["longitude"] if data["longitude"] is not None else "",
+        )
+
+
+def csv_export(reports):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def lines():
+        for row in _csv_rows(reports):
+            writer.writerow(row)
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+
+    return _buffered(lines())
+
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_export, "application/x-ndjson"),
+    "csv": (csv_export, "text/csv"),
+}
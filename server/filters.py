@@ -0,0 +1,76 @@
+from models import db, PoliceOfficer, CrimeReport, Assignment, Job
+from pagination import parse_int, parse_date
+
+
+# The report and assignment models default to the live tables; archive.py
+# passes their archived counterparts.
+
+
+def filter_reports(query, args, report=CrimeReport, assignment=Assignment):
+    status = args.get("status")
+    if status:
+        query = query.filter(report.status == status)
+
+    category_id = parse_int(args, "category_id")
+    if category_id is not None:
+        query = query.filter(report.crime_category_id == category_id)
+
+    officer_id = parse_int(args, "officer_id")
+    if officer_id is not None:
+        # IN (subquery) lets the planner drive from the officer_id index
+        # instead of probing assignments once per candidate report.
+        report_ids = db.select(assignment.crime_report_id).where(assignment.officer_id == officer_id)
+        query = query.filter(report.id.in_(report_ids))
+
+    created_from = parse_date(args, "created_from")
+    if created_from:
+        query = query.filter(report.created_at >= created_from)
+
+    created_to = parse_date(args, "created_to")
+    if created_to:
+        query = query.filter(report.created_at < created_to)
+
+    return query
+
+
+def filter_assignments(query, args, report=CrimeReport, assignment=Assignment):
+    officer_id = parse_int(args, "officer_id")
+    if officer_id is not None:
+        query = query.filter(assignment.officer_id == officer_id)
+
+    report_id = parse_int(args, "crime_report_id")
+    if report_id is not None:
+        query = query.filter(assignment.crime_report_id == report_id)
+
+    status = args.get("status")
+    if status:
+        query = query.filter(assignment.crime_report.has(report.status == status))
+
+    assigned_from = parse_date(args, "assigned_from")
+    if assigned_from:
+        query = query.filter(assignment.assigned_at >= assigned_from)
+
+    assigned_to = parse_date(args, "assigned_to")
+    if assigned_to:
+        query = query.filter(assignment.assigned_at < assigned_to)
+
+    return query
+
+
+def filter_officers(query, args):
+    for field in ("rank", "role", "email"):
+        value = args.get(field)
+        if value:
+            query = query.filter(getattr(PoliceOfficer, field) == value)
+    return query
+
+
+def filter_jobs(query, args):
+    for field in ("status", "kind"):
+        value = args.get(field)
+        if value:
+            query = query.filter(getattr(Job, field) == value)
+    created_by = parse_int(args, "created_by")
+    if created_by is not None:
+        query = query.filter(Job.created_by == created_by)
+    return query
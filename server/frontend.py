@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Serving the React production build (client/build).
+
+The build is indexed once at startup, so a request for an asset is a dict
+lookup rather than a series of filesystem checks; restart the server after
+rebuilding the client. Files under static/ have content hashes in their
+names and are cached by browsers for a year; everything else (index.html,
+favicon, manifest) is revalidated with its ETag on each use.
+
+Responses are compressed according to Accept-Encoding. Precompressed .br
+and .gz files next to an asset are used when present; generate them after
+`npm run build` with
+
+    python server/frontend.py client/build
+
+(.br needs the optional `brotli` package). Text assets without a .gz file
+are gzipped into memory at startup instead.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import sys
+
+from flask import Response, request
+from werkzeug.wsgi import wrap_file
+
+logger = logging.getLogger(__name__)
+
+# Preferred first when the client accepts several equally.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE = {".html", ".js", ".css", ".json", ".map", ".svg", ".txt", ".ico"}
+MIN_COMPRESS_SIZE = 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class Asset:
+    def __init__(self, path, mimetype, etag, last_modified, cache_control):
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+        # encoding -> bytes held in memory, or a file path to stream
+        self.variants = {"identity": path}
+        self.sizes = {}
+
+
+def _compressible(path):
+    return os.path.splitext(path)[1] in COMPRESSIBLE
+
+
+def _digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()[:20]
+
+
+def scan(build_dir):
+    """Index every file in the build by its URL path ("static/js/main.1a2b.js")."""
+    assets = {}
+    for root, _, files in os.walk(build_dir):
+        names = set(files)
+        for name in files:
+            if any(name.endswith(suffix) for suffix in ENCODINGS.values()) and name[:-3] in names:
+                continue
+            path = os.path.join(root, name)
+            url = os.path.relpath(path, build_dir).replace(os.sep, "/")
+            stat = os.stat(path)
+            asset = assets[url] = Asset(
+                path,
+                mimetypes.guess_type(name)[0] or "application/octet-stream",
+                _digest(path),
+                stat.st_mtime,
+                IMMUTABLE if url.startswith("static/") else REVALIDATE,
+            )
+            asset.sizes["identity"] = stat.st_size
+            for encoding, suffix in ENCODINGS.items():
+                # A leftover from an older build must not shadow the new file.
+                if name + suffix in names:
+                    variant = os.stat(path + suffix)
+                    if variant.st_mtime >= stat.st_mtime:
+                        asset.variants[encoding] = path + suffix
+                        asset.sizes[encoding] = variant.st_size
+            if "gzip" not in asset.variants and _compressible(name) and stat.st_size >= MIN_COMPRESS_SIZE:
+                with open(path, "rb") as f:
+                    asset.variants["gzip"] = gzip.compress(f.read(), mtime=0)
+    return assets
+
+
+def compress(build_dir):
+    """Write .gz (and, with brotli installed, .br) files next to the text assets."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        logger.warning("brotli is not installed; writing gzip files only")
+
+    written = 0
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if not _compressible(name) or os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = {".gz": gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+            for suffix, body in variants.items():
+                if len(body) < len(data):
+                    with open(path + suffix + ".tmp", "wb") as f:
+                        f.write(body)
+                    os.replace(path + suffix + ".tmp", path + suffix)
+                    written += 1
+    return written
+
+
+class StaticBuild:
+    def __init__(self):
+        self.build_dir = None
+        self.assets = {}
+
+    def init_app(self, app):
+        self.build_dir = app.config["FRONTEND_BUILD_DIR"]
+        self.assets = scan(self.build_dir) if os.path.isdir(self.build_dir) else {}
+        index = self.assets.get("index.html")
+        if index is not None:
+            # Every client-side route is answered with index.html; keep it in memory.
+            for encoding, body in index.variants.items():
+                if not isinstance(body, bytes):
+                    with open(body, "rb") as f:
+                        index.variants[encoding] = f.read()
+
+    def _encoding(self, asset):
+        best, best_quality = "identity", 0
+        for encoding in asset.variants:
+            quality = request.accept_encodings[encoding] if encoding != "identity" else 0
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def serve(self, path):
+        """The response for the build file at `path`, or None if there is none."""
+        asset = self.assets.get(path)
+        if asset is None:
+            return None
+        encoding = self._encoding(asset)
+        response = Response(mimetype=asset.mimetype)
+        if encoding != "identity":
+            response.content_encoding = encoding
+        if len(asset.variants) > 1:
+            response.vary.add("Accept-Encoding")
+        response.set_etag(asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}")
+        response.last_modified = asset.last_modified
+        response.headers["Cache-Control"] = asset.cache_control
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+        body = asset.variants[encoding]
+        if isinstance(body, bytes):
+            response.set_data(body)
+        else:
+            response.response = wrap_file(request.environ, open(body, "rb"))
+            response.direct_passthrough = True
+            response.content_length = asset.sizes[encoding]
+        return response
+
+
+frontend = StaticBuild()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "client", "build")
+    print(f"{compress(build_dir)} compressed files written to {build_dir}")
@@ -0,0 +1,373 @@
+"""Report coordinates and the spatial queries behind /api/reports/near, /bbox and /heatmap.
+
+Reports filed without coordinates are geocoded from their location text
+against an offline gazetteer (GAZETTEER_PATH): a name,latitude,longitude
+CSV like data/gazetteer.csv, or a GeoNames dump such as cities15000.txt.
+"Westlands, Nairobi" is tried whole and then part by part, most specific
+first. Reports the gazetteer cannot place keep null coordinates.
+
+Every located report also stores a 60-bit integer geohash. Nearby points
+share leading bits and every cell is one contiguous range of integers, so a
+box becomes a few range scans of ix_crime_reports_geohash on any database.
+Where PostGIS is installed, radius queries use a GiST index instead.
+
+Distances are measured on an equirectangular projection around the query
+point: plain arithmetic SQLite can evaluate, and accurate to well under 1%
+within MAX_RADIUS_KM. Boxes do not wrap around the antimeridian.
+
+Reports stored before coordinates existed are geocoded with
+
+    python server/geo.py
+"""
+import csv
+import logging
+import math
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import DDL, and_, event, func, inspect, literal_column, or_, text, update
+
+from models import db, CrimeReport
+from pagination import decode_rank_cursor, nearest_query, parse_float, ranked_rows
+
+logger = logging.getLogger(__name__)
+
+GEOHASH_BITS = 60
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_RADIUS_KM = 1
+MAX_RADIUS_KM = 50
+FIRST_RING_KM = 0.25
+# Each cell covering a box is one more index range scan; more cells fit the
+# box more tightly.
+MAX_CELLS = 16
+MAX_HEATMAP_CELLS = 10000
+WORLD = (-90.0, -180.0, 90.0, 180.0)
+
+# The GiST index is optional: it is only built where the postgis extension
+# can be created, and radius queries fall back to the geohash index.
+POSTGIS_INDEX = "ix_crime_reports_geography"
+GEOGRAPHY = "geography(ST_SetSRID(ST_MakePoint({lon}, {lat}), 4326))"
+POSTGIS_DDL = (
+    "DO $$ BEGIN "
+    "IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'postgis') THEN "
+    "CREATE EXTENSION IF NOT EXISTS postgis; "
+    f"CREATE INDEX IF NOT EXISTS {POSTGIS_INDEX} ON crime_reports USING gist "
+    f"({GEOGRAPHY.format(lon='longitude', lat='latitude')}); "
+    "END IF; "
+    "EXCEPTION WHEN OTHERS THEN RAISE NOTICE 'PostGIS index not created: %', SQLERRM; "
+    "END $$"
+)
+
+event.listen(
+    CrimeReport.__table__, "after_create",
+    DDL(POSTGIS_DDL.replace("%", "%%")).execute_if(dialect="postgresql"),
+)
+
+
+def _spread(v):
+    # Moves bit i of a 30-bit integer to bit 2i.
+    v &= 0x3FFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    return (v | (v << 1)) & 0x5555555555555555
+
+
+def _compact(v):
+    v &= 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    return (v | (v >> 16)) & 0x3FFFFFFF
+
+
+def _quantize(value, low, span):
+    return min(max(int((value - low) / span * (1 << 30)), 0), (1 << 30) - 1)
+
+
+def geohash(lat, lon):
+    """The 60-bit integer geohash of a point: longitude and latitude bits interleaved."""
+    return _spread(_quantize(lon, -180, 360)) << 1 | _spread(_quantize(lat, -90, 180))
+
+
+def geohash_text(cell, bits):
+    """The familiar base32 form of a cell `bits` long (a multiple of 5)."""
+    return "".join(BASE32[(cell >> shift) & 31] for shift in range(bits - 5, -1, -5))
+
+
+def cell_center(cell, bits):
+    code = cell << (GEOHASH_BITS - bits)
+    lon_bits, lat_bits = (bits + 1) // 2, bits // 2
+    lon = -180 + _compact(code >> 1) / (1 << 30) * 360 + 180 / (1 << lon_bits)
+    lat = -90 + _compact(code) / (1 << 30) * 180 + 90 / (1 << lat_bits)
+    return lat, lon
+
+
+def _cell_span(box, bits):
+    # Column and row indexes of the cells `bits` long that a box touches.
+    min_lat, min_lon, max_lat, max_lon = box
+    lon_shift, lat_shift = 30 - (bits + 1) // 2, 30 - bits // 2
+    return (
+        _quantize(min_lon, -180, 360) >> lon_shift, _quantize(max_lon, -180, 360) >> lon_shift,
+        _quantize(min_lat, -90, 180) >> lat_shift, _quantize(max_lat, -90, 180) >> lat_shift,
+    )
+
+
+def cell_count(box, bits):
+    x0, x1, y0, y1 = _cell_span(box, bits)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def covering_ranges(box, max_cells=MAX_CELLS):
+    """Half-open [start, end) geohash ranges whose cells together cover the box."""
+    bits = 0
+    while bits < GEOHASH_BITS and cell_count(box, bits + 1) <= max_cells:
+        bits += 1
+    x0, x1, y0, y1 = _cell_span(box, bits)
+    lon_shift, lat_shift = 30 - (bits + 1) // 2, 30 - bits // 2
+    shift = GEOHASH_BITS - bits
+    cells = sorted(
+        (_spread(x << lon_shift) << 1 | _spread(y << lat_shift)) >> shift
+        for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+    )
+    ranges = []
+    for cell in cells:
+        if ranges and ranges[-1][1] == cell << shift:
+            ranges[-1][1] = (cell + 1) << shift
+        else:
+            ranges.append([cell << shift, (cell + 1) << shift])
+    return ranges
+
+
+def _normalize(name):
+    return " ".join(re.findall(r"\w+", name.replace("'", "").casefold()))
+
+
+def load_gazetteer(path):
+    """Map normalized place names to (name, latitude, longitude)."""
+    places, population = {}, {}
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".txt"):
+            # GeoNames: name, asciiname and alternatenames in columns 1-3,
+            # coordinates in 4-5, population in 14. The most populous of
+            # several same-named places wins.
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                names = {row[1], row[2], *row[3].split(",")}
+                for name in filter(None, map(_normalize, names)):
+                    if int(row[14] or 0) >= population.get(name, -1):
+                        places[name] = (row[1], float(row[4]), float(row[5]))
+                        population[name] = int(row[14] or 0)
+        else:
+            for row in csv.DictReader(f):
+                places[_normalize(row["name"])] = (row["name"], float(row["latitude"]), float(row["longitude"]))
+    return places
+
+
+def parse_box(args, required=True):
+    """(min_lat, min_lon, max_lat, max_lon) from query args; the whole world if optional and absent."""
+    names = ("min_lat", "min_lon", "max_lat", "max_lon")
+    values = [parse_float(args, name) for name in names]
+    if all(v is None for v in values) and not required:
+        return WORLD
+    if any(v is None for v in values):
+        raise ValueError("min_lat, min_lon, max_lat and max_lon are required")
+    min_lat, min_lon, max_lat, max_lon = values
+    _check_point(min_lat, min_lon)
+    _check_point(max_lat, max_lon)
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("min_lat and min_lon must not exceed max_lat and max_lon")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _check_point(lat, lon):
+    if not -90 <= lat <= 90:
+        raise ValueError("Latitude must be between -90 and 90")
+    if not -180 <= lon <= 180:
+        raise ValueError("Longitude must be between -180 and 180")
+
+
+def distance_km(distance):
+    """Kilometres from the squared-degree distance that nearest() orders by."""
+    return math.sqrt(distance) * KM_PER_DEGREE
+
+
+class GeoIndex:
+    def __init__(self):
+        self.places = {}
+        self._postgis = None
+
+    def init_app(self, app, db):
+        path = app.config.get("GAZETTEER_PATH")
+        if path and os.path.exists(path):
+            self.places = load_gazetteer(path)
+        else:
+            logger.warning("gazetteer %s not found; reports will not be geocoded", path)
+        event.listen(db.session, "before_flush", self._locate_reports)
+
+    def geocode(self, location):
+        """(latitude, longitude) for a location string, or None if it is not in the gazetteer."""
+        if not location:
+            return None
+        for candidate in (location, *location.split(",")):
+            place = self.places.get(_normalize(candidate))
+            if place is not None:
+                return place[1], place[2]
+        return None
+
+    def locate(self, location, latitude=None, longitude=None):
+        """(latitude, longitude, geohash) for a report, geocoded unless coordinates are given."""
+        if (latitude is None) != (longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        if latitude is None:
+            latitude, longitude = self.geocode(location) or (None, None)
+        if latitude is None:
+            return None, None, None
+        return latitude, longitude, geohash(latitude, longitude)
+
+    def _locate_reports(self, session, flush_context, instances):
+        for obj in session.new:
+            if isinstance(obj, CrimeReport):
+                obj.latitude, obj.longitude, obj.geohash = self.locate(obj.location, obj.latitude, obj.longitude)
+        for obj in session.dirty:
+            if not isinstance(obj, CrimeReport):
+                continue
+            attrs = inspect(obj).attrs
+            if attrs.latitude.history.has_changes() or attrs.longitude.history.has_changes():
+                # Clearing both coordinates falls back to the gazetteer.
+                obj.latitude, obj.longitude, obj.geohash = self.locate(obj.location, obj.latitude, obj.longitude)
+            elif attrs.location.history.has_changes():
+                obj.latitude, obj.longitude, obj.geohash = self.locate(obj.location)
+
+    @property
+    def postgis(self):
+        if self._postgis is None:
+            self._postgis = db.engine.dialect.name == "postgresql" and db.session.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": POSTGIS_INDEX}
+            ).scalar()
+        return self._postgis
+
+    def within(self, query, box):
+        """Filter a CrimeReport query to reports inside the box."""
+        min_lat, min_lon, max_lat, max_lon = box
+        return query.filter(
+            or_(*(and_(CrimeReport.geohash >= start, CrimeReport.geohash < end)
+                  for start, end in covering_ranges(box))),
+            CrimeReport.latitude.between(min_lat, max_lat),
+            CrimeReport.longitude.between(min_lon, max_lon),
+        )
+
+    def _circle(self, query, lat, lon, radius_km):
+        radius = radius_km / KM_PER_DEGREE
+        scale = math.cos(math.radians(lat))
+        dx = (CrimeReport.longitude - lon) * scale
+        dy = CrimeReport.latitude - lat
+        distance = dx * dx + dy * dy
+
+        if self.postgis:
+            point = literal_column(GEOGRAPHY.format(lon=float(lon), lat=float(lat)))
+            column = literal_column(GEOGRAPHY.format(lon="crime_reports.longitude", lat="crime_reports.latitude"))
+            query = query.filter(func.ST_DWithin(column, point, radius_km * 1000))
+        else:
+            width = min(radius / max(scale, 1e-9), 360)
+            query = self.within(query, (
+                max(lat - radius, -90), max(lon - width, -180), min(lat + radius, 90), min(lon + width, 180),
+            ))
+        return query.filter(distance <= radius * radius), distance
+
+    def nearest(self, query, lat, lon, radius_km, args):
+        """One page of (report, distance) within radius_km, nearest first, and the next cursor.
+
+        Rather than sort every report in the circle, the search starts
+        FIRST_RING_KM out (or just past the cursor) and doubles the ring
+        until it holds a full page. Anything outside a ring is farther than
+        everything inside it, so the page is exact. The distance is in
+        squared degrees of latitude; distance_km converts it.
+        """
+        _check_point(lat, lon)
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValueError(f"radius must be greater than 0 and at most {MAX_RADIUS_KM} km")
+        ring = FIRST_RING_KM
+        if args.get("cursor"):
+            ring = max(ring, 2 * distance_km(decode_rank_cursor(args["cursor"])[0]))
+        while True:
+            ring = min(ring, radius_km)
+            circle, distance = self._circle(query, lat, lon, ring)
+            circle, limit = nearest_query(circle.add_columns(distance), distance, CrimeReport.id, args)
+            rows = circle.all()
+            if len(rows) > limit or ring == radius_km:
+                return ranked_rows(rows, limit)
+            ring *= 2
+
+    def heatmap(self, query, box, precision=None):
+        """Report counts per geohash cell of `precision` characters inside the box.
+
+        `query` is a select() to filter further; without a precision the
+        finest one that keeps the grid under MAX_HEATMAP_CELLS is used.
+        """
+        if precision is None:
+            precision = 1
+            while precision < GEOHASH_BITS // 5 and cell_count(box, (precision + 1) * 5) <= MAX_HEATMAP_CELLS:
+                precision += 1
+        elif not 1 <= precision <= GEOHASH_BITS // 5:
+            raise ValueError(f"precision must be between 1 and {GEOHASH_BITS // 5}")
+        elif cell_count(box, precision * 5) > MAX_HEATMAP_CELLS:
+            raise ValueError(f"precision {precision} is too fine for this box; zoom in or lower it")
+
+        bits = precision * 5
+        cell = (CrimeReport.geohash // (1 << (GEOHASH_BITS - bits))).label("cell")
+        query = self.within(query.add_columns(cell, func.count().label("count")), box).group_by(cell)
+        cells = []
+        for row in db.session.execute(query):
+            lat, lon = cell_center(row.cell, bits)
+            cells.append({
+                "geohash": geohash_text(row.cell, bits),
+                "lat": round(lat, 6),
+                "lon": round(lon, 6),
+                "count": row.count,
+            })
+        return {"precision": precision, "cells": cells}
+
+
+geo_index = GeoIndex()
+
+
+def backfill(batch_size=1000):
+    """Geocode reports without coordinates, in id order; returns how many were placed."""
+    located, last_id = 0, 0
+    while True:
+        rows = db.session.execute(
+            db.select(CrimeReport.id, CrimeReport.location, CrimeReport.version)
+            .where(CrimeReport.latitude.is_(None), CrimeReport.id > last_id)
+            .order_by(CrimeReport.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return located
+        last_id = rows[-1].id
+        changes = []
+        for row in rows:
+            latitude, longitude, cell = geo_index.locate(row.location)
+            if latitude is not None:
+                # A new updated_at sends the coordinates to /api/sync clients;
+                # the version guards against a concurrent PATCH.
+                changes.append({
+                    "id": row.id, "version": row.version, "latitude": latitude, "longitude": longitude,
+                    "geohash": cell, "updated_at": datetime.now(),
+                })
+        if changes:
+            db.session.execute(update(CrimeReport), changes)
+        db.session.commit()
+        located += len(changes)
+
+
+if __name__ == "__main__":
+    from app import app
+    from geo import backfill
+
+    with app.app_context():
+        print(f"{backfill()} reports geocoded")
@@ -0,0 +1,34 @@
+"""gunicorn settings, used by Procfile.dev:
+
+    gunicorn -c server/gunicorn.conf.py -b 0.0.0.0:$PORT --chdir server app:app
+
+Workers are gevent workers, so an open /api/events stream costs a greenlet
+rather than a whole worker, and psycogreen makes Postgres queries yield to
+other greenlets. GUNICORN_WORKER_CLASS=sync goes back to plain
+sync workers; the event stream then holds one worker per connected client.
+
+The master builds the app once (create_app) and forks every worker from it,
+so workers start serving at once and share the gazetteer, the React build's
+index.html and the imported modules copy-on-write. Nothing connects to the
+database before the fork; pool.py disposes any inherited connections in
+each worker anyway. Set GUNICORN_PRELOAD=0 with --reload.
+"""
+import os
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").strip().lower() in ("1", "true", "yes", "on")
+
+if worker_class == "gevent":
+    if preload_app:
+        # The standard library must be patched before the preloaded app
+        # imports it; the gevent worker only patches after the fork, which
+        # is too late.
+        from gevent import monkey
+
+        monkey.patch_all()
+    # psycopg2 waits on its sockets in C, out of gevent's sight; without this
+    # every Postgres query blocks the whole worker and all its streams.
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
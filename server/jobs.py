@@ -0,0 +1,411 @@
+"""Background jobs: a queue in the jobs table, worked by worker.py.
+
+Work too slow for a request (a full report export, a large seed-style data
+load, recounting the stats and rollups, archiving) is submitted with
+POST /api/jobs and polled at /api/jobs/<id>. The queue is a plain table,
+so it needs nothing beyond the database the app already uses, on SQLite
+or Postgres.
+
+A worker claims the oldest due job with a compare-and-set UPDATE (on
+Postgres the candidate is also picked with FOR UPDATE SKIP LOCKED, so
+workers do not queue up behind each other), runs its task, and records
+the result in the same transaction as the task's last writes. A failed
+attempt goes back in the queue with exponential backoff until
+max_attempts; a job whose worker stops heartbeating (killed, OOM, lost
+machine) is taken over once its lease runs out. Tasks may run more than
+once, so they should be safe to retry or set max_attempts=1.
+
+Tasks report progress through their JobContext, on a separate connection
+so pollers see it while the task's own transaction is still open. SQLite
+refuses that write while the task holds its write lock, so there progress
+is patchy and leases are never taken over: a job whose worker died stays
+running until it is requeued by hand.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, PoliceOfficer, CrimeCategory, CrimeReport, Assignment, ArchivedCrimeReport, Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+# Progress is written at most this often, except the first and last update.
+PROGRESS_INTERVAL = 1.0
+# pysqlite's default, restored after a progress write.
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class Task:
+    def __init__(self, fn, validate=None, max_attempts=None, admin_only=False):
+        self.fn = fn
+        self.validate = validate
+        self.max_attempts = max_attempts
+        self.admin_only = admin_only
+
+
+class JobContext:
+    """What a running task gets: its job id, progress reporting and an output directory."""
+
+    def __init__(self, job, engine, output_dir):
+        self.job_id = job.id
+        self.worker = job.worker
+        self.engine = engine
+        self.output_dir = output_dir
+        self._last_write = 0.0
+
+    def progress(self, done=None, total=None, message=None, force=False):
+        """Record how far the task has got; any of done, total and message may be left out."""
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        values = {"heartbeat_at": datetime.now()}
+        if done is not None:
+            values["progress"] = done
+        if total is not None:
+            values["total"] = total
+        if message is not None:
+            values["message"] = message[:500]
+        self._update(values)
+
+    def _update(self, values):
+        try:
+            with self.engine.begin() as conn:
+                sqlite = conn.dialect.name == "sqlite"
+                if sqlite:
+                    # Give up at once rather than stall the task for the
+                    # driver's 5s busy timeout on the lock it holds itself.
+                    conn.exec_driver_sql("PRAGMA busy_timeout = 0")
+                try:
+                    conn.execute(
+                        update(Job.__table__)
+                        .where(Job.__table__.c.id == self.job_id, Job.__table__.c.worker == self.worker)
+                        .values(**values)
+                    )
+                finally:
+                    if sqlite:
+                        conn.exec_driver_sql(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        except SQLAlchemyError as e:
+            # SQLite refuses a second writer while the task's transaction
+            # holds the lock; progress is not worth failing the job over.
+            logger.warning("job %s: progress update failed: %s", self.job_id, e)
+
+    def output_path(self, extension):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, f"job-{self.job_id}.{extension}")
+
+
+class Heartbeat:
+    """Refreshes a running job's heartbeat_at from a background thread."""
+
+    def __init__(self, context, interval):
+        self.context = context
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{context.job_id}-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.context._update({"heartbeat_at": datetime.now()})
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class JobQueue:
+    def __init__(self):
+        self.tasks = {}
+        self.max_attempts = 3
+        self.retry_seconds = 30
+        self.lease_seconds = 120
+        self.poll_seconds = 2
+        self.output_dir = None
+        self.retention = timedelta(days=7)
+
+    def init_app(self, app, db):
+        self.max_attempts = app.config.get("JOBS_MAX_ATTEMPTS", 3)
+        self.retry_seconds = app.config.get("JOBS_RETRY_SECONDS", 30)
+        self.lease_seconds = app.config.get("JOBS_LEASE_SECONDS", 120)
+        self.poll_seconds = app.config.get("JOBS_POLL_SECONDS", 2)
+        self.output_dir = app.config.get("JOBS_OUTPUT_DIR")
+        self.retention = timedelta(days=app.config.get("JOBS_RETENTION_DAYS", 7))
+
+    def task(self, kind, validate=None, max_attempts=None, admin_only=False):
+        """Register fn(context, **params) as the task run for jobs of `kind`.
+
+        validate(params), if given, runs when the job is submitted and raises
+        ValueError for parameters the task would fail on. Only admins may
+        submit admin_only tasks.
+        """
+        def decorator(fn):
+            self.tasks[kind] = Task(fn, validate, max_attempts, admin_only)
+            return fn
+        return decorator
+
+    def admin_only(self, kind):
+        task = self.tasks.get(kind) if isinstance(kind, str) else None
+        return task is not None and task.admin_only
+
+    def enqueue(self, kind, params=None, created_by=None):
+        """Add a job to the session; it is queued once the caller commits."""
+        task = self.tasks.get(kind)
+        if task is None:
+            raise ValueError(f"kind must be one of {', '.join(sorted(self.tasks))}")
+        params = params or {}
+        if not isinstance(params, dict):
+            raise ValueError("params must be an object")
+        if task.validate:
+            task.validate(params)
+        job = Job(
+            kind=kind,
+            params=params,
+            status=QUEUED,
+            max_attempts=task.max_attempts or self.max_attempts,
+            created_by=created_by,
+        )
+        db.session.add(job)
+        return job
+
+    def _due(self, now):
+        queued = and_(Job.status == QUEUED, Job.run_at <= now)
+        if db.engine.dialect.name == "sqlite":
+            # The heartbeat cannot be written while the task's transaction
+            # holds SQLite's write lock, so a silent job may well be alive.
+            return queued
+        return or_(
+            queued,
+            and_(Job.status == RUNNING, Job.heartbeat_at < now - timedelta(seconds=self.lease_seconds)),
+        )
+
+    def claim(self, worker):
+        """Take the oldest due job for `worker` and commit; None if there is none."""
+        while True:
+            now = datetime.now()
+            stmt = db.select(Job.id).where(self._due(now)).order_by(Job.run_at, Job.id).limit(1)
+            if db.engine.dialect.name == "postgresql":
+                stmt = stmt.with_for_update(skip_locked=True)
+            job_id = db.session.scalar(stmt)
+            if job_id is None:
+                db.session.rollback()
+                return None
+            # Another worker may have taken it since the SELECT (SQLite has no
+            # row locks); only one UPDATE can still find it due.
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, self._due(now))
+                .values(status=RUNNING, worker=worker, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now),
+                execution_options={"synchronize_session": False},
+            )
+            db.session.commit()
+            if claimed.rowcount:
+                return db.session.get(Job, job_id)
+
+    def _finish(self, job_id, worker, **values):
+        db.session.execute(
+            update(Job).where(Job.id == job_id, Job.worker == worker).values(**values),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+
+    def run(self, job):
+        """Run a claimed job's task and record how it went."""
+        job_id, kind, worker, attempts = job.id, job.kind, job.worker, job.attempts
+        if attempts > job.max_attempts:
+            # Its last attempt's worker died; do not start another.
+            self._finish(job_id, worker, status=FAILED, finished_at=datetime.now(),
+                         error=job.error or "The worker running this job stopped responding.")
+            return FAILED
+
+        task = self.tasks.get(kind)
+        context = JobContext(job, db.engine, self.output_dir)
+        started = time.perf_counter()
+        try:
+            if task is None:
+                raise LookupError(f"No task is registered for {kind!r} jobs")
+            with Heartbeat(context, self.lease_seconds / 4):
+                result = task.fn(context, **job.params)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("job %s (%s) attempt %s failed", job_id, kind, attempts)
+            error = f"{type(e).__name__}: {e}"
+            if attempts < job.max_attempts:
+                delay = self.retry_seconds * 2 ** (attempts - 1)
+                self._finish(job_id, worker, status=QUEUED, error=error,
+                             run_at=datetime.now() + timedelta(seconds=delay))
+                return QUEUED
+            self._finish(job_id, worker, status=FAILED, error=error, finished_at=datetime.now())
+            return FAILED
+
+        # Committed together with whatever the task left uncommitted.
+        values = {"status": SUCCEEDED, "result": result, "error": None, "finished_at": datetime.now()}
+        self._finish(job_id, worker, **values)
+        logger.info("job %s (%s) succeeded in %.1fs", job_id, kind, time.perf_counter() - started)
+        return SUCCEEDED
+
+    def purge(self):
+        """Delete jobs that finished more than JOBS_RETENTION_DAYS ago, and their files."""
+        cutoff = datetime.now() - self.retention
+        finished = Job.status.in_((SUCCEEDED, FAILED))
+        rows = db.session.execute(
+            db.select(Job.id, Job.result).where(finished, Job.finished_at < cutoff)
+        ).all()
+        for job_id, result in rows:
+            path = result_path(result, self.output_dir)
+            if path and os.path.exists(path):
+                os.remove(path)
+        if rows:
+            db.session.execute(
+                db.delete(Job).where(Job.id.in_([job_id for job_id, _ in rows])),
+                execution_options={"synchronize_session": False},
+            )
+        db.session.commit()
+        return len(rows)
+
+
+def result_path(result, output_dir):
+    """The file a job's result points at, if it has one."""
+    if not isinstance(result, dict) or not result.get("file") or not output_dir:
+        return None
+    # Only ever a bare file name inside the output directory.
+    return os.path.join(output_dir, os.path.basename(result["file"]))
+
+
+job_queue = JobQueue()
+
+
+# Tasks. Their modules are imported when a job runs, so the web processes
+# that only submit jobs never load them.
+
+EXPORT_FILTERS = ("status", "category_id", "officer_id", "created_from", "created_to")
+
+
+def _validate_export(params):
+    from export import EXPORT_FORMATS
+    from filters import filter_reports
+
+    fmt = params.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    unknown = set(params) - {"format", *EXPORT_FILTERS}
+    if unknown:
+        raise ValueError(f"Unknown export params: {', '.join(sorted(unknown))}")
+    try:
+        filter_reports(db.select(CrimeReport), params)
+    except TypeError:
+        raise ValueError(f"{', '.join(EXPORT_FILTERS)} must be strings or numbers")
+
+
+@job_queue.task("export_reports", validate=_validate_export)
+def export_reports(context, format="ndjson", **filters):
+    """The reports /api/reports/export would stream, written to a file in JOBS_OUTPUT_DIR."""
+    from export import EXPORT_FORMATS, stream_reports
+    from filters import filter_reports
+
+    stmt = filter_reports(db.select(CrimeReport), filters)
+    total = db.session.scalar(db.select(func.count()).select_from(stmt.subquery()))
+    context.progress(0, total, force=True)
+
+    rows = 0
+
+    def counted(reports):
+        nonlocal rows
+        for report in reports:
+            yield report
+            rows += 1
+            context.progress(rows)
+
+    export, mimetype = EXPORT_FORMATS[format]
+    path = context.output_path(format)
+    # Written under a temporary name so a retry never serves a partial file.
+    with open(path + ".part", "wb") as f:
+        for chunk in export(counted(stream_reports(stmt))):
+            f.write(chunk)
+    os.replace(path + ".part", path)
+    context.progress(rows, force=True)
+    return {"file": os.path.basename(path), "format": format, "mimetype": mimetype,
+            "rows": rows, "bytes": os.path.getsize(path)}
+
+
+# The largest value each seed param accepts; seed itself is any integer.
+SEED_LIMITS = {"officers": 10000, "reports": 1000000, "max_assignments": 10, "days": 3650, "chunk_size": 50000}
+
+
+def _validate_seed(params):
+    from flask import current_app
+
+    # Seeded officers share a known password and half of them are admins.
+    if not current_app.config.get("JOBS_ALLOW_SEED"):
+        raise ValueError("seed jobs are only available in development")
+    unknown = set(params) - {"seed", *SEED_LIMITS}
+    if unknown:
+        raise ValueError(f"Unknown seed params: {', '.join(sorted(unknown))}")
+    for name, value in params.items():
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{name} must be a non-negative integer")
+        if name in SEED_LIMITS and value > SEED_LIMITS[name]:
+            raise ValueError(f"{name} must be at most {SEED_LIMITS[name]}")
+    # seed.generate writes explicit ids from 1 into each of these, and
+    # archived reports keep theirs.
+    for model in (CrimeCategory, PoliceOfficer, CrimeReport, Assignment, ArchivedCrimeReport):
+        if db.session.scalar(db.select(model.id).limit(1)) is not None:
+            raise ValueError("seed jobs load into an empty database")
+
+
+# A failed load leaves rows behind that a second attempt would collide with.
+@job_queue.task("seed", validate=_validate_seed, max_attempts=1, admin_only=True)
+def seed(context, **params):
+    """seed.generate: generated officers, categories, reports and assignments."""
+    from seed import generate
+
+    return generate(**params, log=lambda message: context.progress(message=message, force=True))
+
+
+def _validate_rebuild(params):
+    if params:
+        raise ValueError("rebuild_stats takes no params")
+
+
+@job_queue.task("rebuild_stats", validate=_validate_rebuild, admin_only=True)
+def rebuild_stats(context):
+    """Recount the /api/stats counters and the analytics rollups from the base tables."""
+    from analytics import rebuild_rollups
+    from stats import rebuild_counters
+
+    counters = rebuild_counters()
+    rebuild_rollups()
+    return counters
+
+
+def _validate_archive(params):
+    unknown = set(params) - {"days", "batch_size"}
+    if unknown:
+        raise ValueError(f"Unknown archive params: {', '.join(sorted(unknown))}")
+    for name, value in params.items():
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0):
+            raise ValueError(f"{name} must be a positive number")
+
+
+@job_queue.task("archive_reports", validate=_validate_archive, admin_only=True)
+def archive_reports(context, days=None, batch_size=None):
+    """archive.archive_reports; every batch commits, so a retry carries on where it stopped."""
+    from flask import current_app
+
+    import archive
+
+    if days is None:
+        days = current_app.config["ARCHIVE_AFTER_DAYS"]
+    archived = archive.archive_reports(
+        days, batch_size or archive.BATCH_SIZE, log=lambda message: context.progress(message=message),
+    )
+    return {"archived": archived}
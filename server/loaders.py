@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def _plan(model, prefix, excluded, parent):
+    # Negative serialize_rules are relative to the model that declares them,
+    # exactly as SerializerMixin applies them while it recurses.
+    excluded = excluded | {
+        prefix + rule[1:] for rule in model.serialize_rules if rule.startswith("-")
+    }
+
+    options = []
+    for rel in inspect(model).relationships:
+        path = prefix + rel.key
+        if path in excluded:
+            continue
+
+        # Collections get one extra SELECT ... IN per level; scalar
+        # relationships ride along on the parent query as a JOIN.
+        strategy = selectinload if rel.uselist else joinedload
+        if parent is None:
+            loader = strategy(rel.class_attribute)
+        else:
+            loader = getattr(parent, strategy.__name__)(rel.class_attribute)
+
+        options.extend(_plan(rel.mapper.class_, path + ".", excluded, loader) or [loader])
+    return options
+
+
+@lru_cache(maxsize=None)
+def eager_options(model):
+    """Loader options covering every relationship `model.to_dict()` walks.
+
+    The plan is derived from the serialize_rules on each model, so a list
+    endpoint issues a fixed number of queries however many rows it returns.
+    """
+    return tuple(_plan(model, "", frozenset(), None))
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metric_lines(name, type, help, label_names, series):
+    """Exposition lines for values computed at scrape time (gauges, external counters)."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+    for values, value in series:
+        yield f"{name}{_labels(label_names, values)} {_number(value)}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values=(), amount=1):
+        with self._lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self.series.items())
+        return metric_lines(self.name, "counter", self.help, self.labels, series)
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values, amount):
+        with self._lock:
+            series = self.series.get(values)
+            if series is None:
+                series = self.series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, amount)] += 1
+            series[1] += amount
+
+    def render(self):
+        with self._lock:
+            series = sorted((values, (list(counts), total)) for values, (counts, total) in self.series.items())
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for values, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(self.labels, values, [('le', _number(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {cumulative}"
+
+
+class Metrics:
+    """Request and SQL instrumentation, exposed in Prometheus text format.
+
+    Metrics are kept per process: each gunicorn worker reports only the
+    traffic it served, and process_worker_info says which worker answered.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time spent handling a request.", ("endpoint", "method"),
+        )
+        self.requests = Counter(
+            "http_requests_total", "Requests handled, by response status.", ("endpoint", "method", "status"),
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Size of non-streamed response bodies.", ("endpoint", "method"), SIZE_BUCKETS,
+        )
+        self.request_queries = Histogram(
+            "http_request_sql_queries", "SQL statements executed per request.", ("endpoint", "method"), COUNT_BUCKETS,
+        )
+        self.request_query_time = Histogram(
+            "http_request_sql_duration_seconds", "Time spent in SQL per request.", ("endpoint", "method"),
+        )
+        self.query_duration = Histogram("db_query_duration_seconds", "SQL statement latency.", ("engine",))
+        self.slow_queries = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS.", ("engine",))
+        self.collectors = []
+        self.slow_query_seconds = 0.5
+        self.token = None
+
+    def init_app(self, app, db):
+        self.slow_query_seconds = app.config.get("SLOW_QUERY_MS", 500) / 1000
+        self.token = app.config.get("METRICS_TOKEN")
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_response)
+        # Runs for unhandled exceptions too, which skip after_request.
+        app.teardown_request(self._finish_request)
+        app.add_url_rule("/metrics", "metrics", self.view)
+
+        with app.app_context():
+            engines = {key or "default": engine for key, engine in db.engines.items()}
+        for name, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute(name))
+
+    def add_collector(self, collect):
+        """Register a callable yielding exposition lines at scrape time."""
+        self.collectors.append(collect)
+
+    def _endpoint(self):
+        return request.endpoint or "unmatched", request.method
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+
+    def _record_response(self, response):
+        if "metrics_start" in g:
+            g.metrics_elapsed = time.perf_counter() - g.metrics_start
+            g.metrics_status = response.status_code
+            if not response.is_streamed:
+                g.metrics_size = response.calculate_content_length() or 0
+        return response
+
+    def _finish_request(self, exc):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        labels = self._endpoint()
+        self.request_duration.observe(labels, g.pop("metrics_elapsed", time.perf_counter() - start))
+        status = g.pop("metrics_status", 500)
+        self.requests.inc((*labels, str(500 if exc is not None else status)))
+        size = g.pop("metrics_size", None)
+        if size is not None:
+            self.response_size.observe(labels, size)
+        self.request_queries.observe(labels, g.get("sql_queries", 0))
+        self.request_query_time.observe(labels, g.get("sql_seconds", 0.0))
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    def _after_execute(self, engine_name):
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - context._metrics_start
+            self.query_duration.observe((engine_name,), elapsed)
+            if has_request_context() and "sql_queries" in g:
+                g.sql_queries += 1
+                g.sql_seconds += elapsed
+            if self.slow_query_seconds and elapsed >= self.slow_query_seconds:
+                self.slow_queries.inc((engine_name,))
+                logger.warning(
+                    "slow query (%.0f ms on %s, %s): %s",
+                    elapsed * 1000, engine_name,
+                    request.endpoint if has_request_context() else "no request",
+                    " ".join(statement.split())[:1000],
+                )
+        return after_execute
+
+    def render(self):
+        worker = str(os.getpid())
+        lines = []
+        for metric in (
+            self.request_duration, self.requests, self.response_size,
+            self.request_queries, self.request_query_time, self.query_duration, self.slow_queries,
+        ):
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        lines.extend(metric_lines(
+            "process_worker_info", "gauge", "The worker process that served this scrape.", ("worker",), [((worker,), 1)],
+        ))
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        if self.token and request.headers.get("Authorization") != f"Bearer {self.token}":
+            abort(401)
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+
+metrics = Metrics()
@@ -0,0 +1,38 @@
+"""add stat counters
+
+Revision ID: 139c2405bed5
+Revises: 5670430ad64c
+Create Date: 2026-10-17 09:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '139c2405bed5'
+down_revision = '5670430ad64c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # Backfill from the existing rows so the counters start out correct.
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'reports', COUNT(*) FROM crime_reports")
+    for status in ('open', 'pending', 'closed'):
+        op.execute(
+            f"INSERT INTO stat_counters (name, value) "
+            f"SELECT 'reports.{status}', COUNT(*) FROM crime_reports WHERE status = '{status}'"
+        )
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'officers', COUNT(*) FROM police_officers")
+    op.execute("INSERT INTO stat_counters (name, value) SELECT 'assignments', COUNT(*) FROM assignments")
+
+
+def downgrade():
+    op.drop_table('stat_counters')
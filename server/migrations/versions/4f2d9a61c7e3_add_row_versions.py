@@ -0,0 +1,32 @@
+"""add row versions
+
+Revision ID: 4f2d9a61c7e3
+Revises: 980bdc0833ea
+Create Date: 2026-10-17 22:37:05.614820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2d9a61c7e3'
+down_revision = '980bdc0833ea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('police_officers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    # Plain ALTER rather than batch mode: on SQLite a batch copy of
+    # crime_reports would drop the full-text search triggers.
+    op.add_column('crime_reports', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('crime_reports', 'version')
+
+    with op.batch_alter_table('police_officers', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,45 @@
+"""add indexes for filters and foreign keys
+
+Revision ID: 7b0462fe30d3
+Revises: 139c2405bed5
+Create Date: 2026-10-17 10:03:27.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b0462fe30d3'
+down_revision = '139c2405bed5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_crime_reports_status_id', 'crime_reports', ['status', 'id'], unique=False)
+    op.create_index('ix_crime_reports_crime_category_id_id', 'crime_reports', ['crime_category_id', 'id'], unique=False)
+    op.create_index('ix_crime_reports_created_at', 'crime_reports', ['created_at'], unique=False)
+    op.create_index('ix_assignments_officer_id_crime_report_id', 'assignments', ['officer_id', 'crime_report_id'], unique=False)
+
+    # Drop duplicate officer/report pairs before enforcing uniqueness.
+    op.execute(
+        "DELETE FROM assignments WHERE id NOT IN "
+        "(SELECT MIN(id) FROM assignments GROUP BY crime_report_id, officer_id)"
+    )
+    op.execute(
+        "UPDATE stat_counters SET value = (SELECT COUNT(*) FROM assignments) "
+        "WHERE name = 'assignments'"
+    )
+    with op.batch_alter_table('assignments') as batch_op:
+        batch_op.create_unique_constraint('uq_assignments_crime_report_id_officer_id', ['crime_report_id', 'officer_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('assignments') as batch_op:
+        batch_op.drop_constraint('uq_assignments_crime_report_id_officer_id', type_='unique')
+
+    op.drop_index('ix_assignments_officer_id_crime_report_id', table_name='assignments')
+    op.drop_index('ix_crime_reports_created_at', table_name='crime_reports')
+    op.drop_index('ix_crime_reports_crime_category_id_id', table_name='crime_reports')
+    op.drop_index('ix_crime_reports_status_id', table_name='crime_reports')
@@ -0,0 +1,49 @@
+"""add report coordinates
+
+Revision ID: 980bdc0833ea
+Revises: e823d20af899
+Create Date: 2026-10-17 21:04:12.318224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '980bdc0833ea'
+down_revision = 'e823d20af899'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ALTERs rather than batch mode: on SQLite a batch copy of
+    # crime_reports would drop the full-text search triggers.
+    op.add_column('crime_reports', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('crime_reports', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('crime_reports', sa.Column('geohash', sa.BigInteger(), nullable=True))
+    op.create_index('ix_crime_reports_geohash', 'crime_reports', ['geohash', 'latitude', 'longitude'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Radius queries use this GiST index when PostGIS can be enabled;
+        # without it they fall back to ix_crime_reports_geohash.
+        op.execute(
+            "DO $$ BEGIN "
+            "IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'postgis') THEN "
+            "CREATE EXTENSION IF NOT EXISTS postgis; "
+            "CREATE INDEX IF NOT EXISTS ix_crime_reports_geography ON crime_reports USING gist "
+            "(geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))); "
+            "END IF; "
+            "EXCEPTION WHEN OTHERS THEN RAISE NOTICE 'PostGIS index not created: %', SQLERRM; "
+            "END $$"
+        )
+    # Existing reports are geocoded afterwards with `python geo.py`.
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_crime_reports_geography")
+    op.drop_index('ix_crime_reports_geohash', table_name='crime_reports')
+    op.drop_column('crime_reports', 'geohash')
+    op.drop_column('crime_reports', 'longitude')
+    op.drop_column('crime_reports', 'latitude')
@@ -0,0 +1,38 @@
+"""add report rollups
+
+Revision ID: b81e5c0f3a27
+Revises: 4f2d9a61c7e3
+Create Date: 2026-10-17 23:52:19.406371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e5c0f3a27'
+down_revision = '4f2d9a61c7e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('crime_category_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'crime_category_id', 'status')
+    )
+
+    # Backfill from the existing rows so the rollups start out correct.
+    day = "date(created_at)" if op.get_bind().dialect.name == 'sqlite' else "CAST(created_at AS DATE)"
+    op.execute(
+        f"INSERT INTO report_rollups (day, crime_category_id, status, count) "
+        f"SELECT {day}, crime_category_id, status, COUNT(*) FROM crime_reports "
+        f"WHERE created_at IS NOT NULL GROUP BY {day}, crime_category_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table('report_rollups')
@@ -0,0 +1,65 @@
+"""add full text search
+
+Revision ID: c6a160d18bbe
+Revises: 7b0462fe30d3
+Create Date: 2026-10-17 11:12:40.512930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6a160d18bbe'
+down_revision = '7b0462fe30d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Adding a stored generated column rewrites crime_reports once.
+        op.execute(
+            "ALTER TABLE crime_reports ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'C')) STORED"
+        )
+        op.execute("CREATE INDEX ix_crime_reports_search_vector ON crime_reports USING gin (search_vector)")
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE crime_reports_fts USING fts5("
+        "title, description, location, content='crime_reports', content_rowid='id', "
+        "tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER crime_reports_fts_ai AFTER INSERT ON crime_reports BEGIN "
+        "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+        "VALUES (new.id, new.title, new.description, new.location); END"
+    )
+    op.execute(
+        "CREATE TRIGGER crime_reports_fts_ad AFTER DELETE ON crime_reports BEGIN "
+        "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+        "VALUES ('delete', old.id, old.title, old.description, old.location); END"
+    )
+    op.execute(
+        "CREATE TRIGGER crime_reports_fts_au AFTER UPDATE OF title, description, location ON crime_reports BEGIN "
+        "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+        "VALUES ('delete', old.id, old.title, old.description, old.location); "
+        "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+        "VALUES (new.id, new.title, new.description, new.location); END"
+    )
+    op.execute("INSERT INTO crime_reports_fts(crime_reports_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_crime_reports_search_vector")
+        op.execute("ALTER TABLE crime_reports DROP COLUMN search_vector")
+        return
+
+    op.execute("DROP TRIGGER crime_reports_fts_au")
+    op.execute("DROP TRIGGER crime_reports_fts_ad")
+    op.execute("DROP TRIGGER crime_reports_fts_ai")
+    op.execute("DROP TABLE crime_reports_fts")
@@ -0,0 +1,67 @@
+"""add report archive
+
+Revision ID: d5a7c3e91b04
+Revises: b81e5c0f3a27
+Create Date: 2026-10-18 01:14:36.220957
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a7c3e91b04'
+down_revision = 'b81e5c0f3a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_crime_reports',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('location', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('crime_category_id', sa.Integer(), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('geohash', sa.BigInteger(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['crime_category_id'], ['crime_categories.id'], name=op.f('fk_archived_crime_reports_crime_category_id_crime_categories')),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_crime_reports', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_crime_reports_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_archived_crime_reports_crime_category_id_id', ['crime_category_id', 'id'], unique=False)
+
+    op.create_table('archived_assignments',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('role_in_case', sa.String(), nullable=False),
+    sa.Column('assigned_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('crime_report_id', sa.Integer(), nullable=False),
+    sa.Column('officer_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['crime_report_id'], ['archived_crime_reports.id'], name=op.f('fk_archived_assignments_crime_report_id_archived_crime_reports')),
+    sa.ForeignKeyConstraint(['officer_id'], ['police_officers.id'], name=op.f('fk_archived_assignments_officer_id_police_officers')),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_assignments', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_assignments_crime_report_id', ['crime_report_id'], unique=False)
+        batch_op.create_index('ix_archived_assignments_officer_id_crime_report_id', ['officer_id', 'crime_report_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('archived_assignments', schema=None) as batch_op:
+        batch_op.drop_index('ix_archived_assignments_officer_id_crime_report_id')
+        batch_op.drop_index('ix_archived_assignments_crime_report_id')
+
+    op.drop_table('archived_assignments')
+    with op.batch_alter_table('archived_crime_reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_archived_crime_reports_crime_category_id_id')
+        batch_op.drop_index('ix_archived_crime_reports_created_at')
+
+    op.drop_table('archived_crime_reports')
@@ -0,0 +1,65 @@
+"""autoincrement live report ids
+
+Revision ID: f41b6e2c9a07
+Revises: d2d874bd3488
+Create Date: 2026-10-17 23:12:41.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41b6e2c9a07'
+down_revision = 'd2d874bd3488'
+branch_labels = None
+depends_on = None
+
+# Archived rows keep their ids, so SQLite must not hand max(id) + 1 out
+# again once the newest live row is deleted or archived. Postgres
+# sequences never go back.
+TABLES = {'crime_reports': 'archived_crime_reports', 'assignments': 'archived_assignments'}
+
+FTS_TRIGGERS = (
+    "CREATE TRIGGER crime_reports_fts_ai AFTER INSERT ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    "CREATE TRIGGER crime_reports_fts_ad AFTER DELETE ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER crime_reports_fts_au AFTER UPDATE OF title, description, location ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+)
+
+
+def _recreate(autoincrement):
+    # Recreating crime_reports drops the full-text search triggers with it.
+    for name in ('crime_reports_fts_au', 'crime_reports_fts_ad', 'crime_reports_fts_ai'):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+    for trigger in FTS_TRIGGERS:
+        op.execute(trigger)
+
+
+def upgrade():
+    if op.get_context().dialect.name != 'sqlite':
+        return
+    _recreate(True)
+    # Start past every id already handed out, live or archived.
+    for table, archive in TABLES.items():
+        op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :name").bindparams(name=table))
+        op.execute(sa.text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, max("
+            f"coalesce((SELECT max(id) FROM {table}), 0), coalesce((SELECT max(id) FROM {archive}), 0))"
+        ).bindparams(name=table))
+
+
+def downgrade():
+    if op.get_context().dialect.name != 'sqlite':
+        return
+    _recreate(False)
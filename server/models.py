@@ -6,19 +6,28 @@ from sqlalchemy import MetaData
 from sqlalchemy.orm import validates
 from sqlalchemy_serializer import SerializerMixin
 
+from passwords import password_hasher
+from routing import RoutingSession
+
 metadata = MetaData(
     naming_convention={
         "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
     }
 )
 
-db = SQLAlchemy(metadata=metadata)
+db = SQLAlchemy(metadata=metadata, session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 
+REPORT_STATUSES = {"open", "closed", "pending"}
+
 
 class PoliceOfficer(db.Model, SerializerMixin):
     __tablename__ = "police_officers"
     serialize_rules = ("-assignments.officer", "-crime_reports.officers", "-password_hash")
+    __table_args__ = (
+        # /api/sync reads changes in (updated_at, id) order.
+        db.Index("ix_police_officers_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -29,15 +38,20 @@ class PoliceOfficer(db.Model, SerializerMixin):
     password_hash = db.Column(db.String, nullable=False)
     role = db.Column(db.String, default="officer")
     created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    # Checked and incremented by every ORM UPDATE (see concurrency.py).
+    version = db.Column(db.Integer, nullable=False, server_default="1")
 
     assignments = db.relationship("Assignment", back_populates="officer")
     crime_reports = association_proxy("assignments", "crime_report")
 
+    __mapper_args__ = {"version_id_col": version}
+
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
     @validates("phone")
     def validate_phone(self, key, phone):
@@ -58,10 +72,14 @@ class PoliceOfficer(db.Model, SerializerMixin):
 class CrimeCategory(db.Model, SerializerMixin):
     __tablename__ = "crime_categories"
     serialize_rules = ("-crime_reports.crime_category",)
+    __table_args__ = (
+        db.Index("ix_crime_categories_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     crime_reports = db.relationship(
         "CrimeReport",
@@ -76,6 +94,18 @@ class CrimeCategory(db.Model, SerializerMixin):
 class CrimeReport(db.Model, SerializerMixin):
     __tablename__ = "crime_reports"
     serialize_rules = ("-assignments.crime_report","-crime_category.crime_reports", "-officers.crime_reports")
+    __table_args__ = (
+        # List endpoints filter on these and page newest-first by id.
+        db.Index("ix_crime_reports_status_id", "status", "id"),
+        db.Index("ix_crime_reports_crime_category_id_id", "crime_category_id", "id"),
+        db.Index("ix_crime_reports_created_at", "created_at"),
+        db.Index("ix_crime_reports_updated_at_id", "updated_at", "id"),
+        # Box and radius queries scan geohash ranges and check the exact
+        # coordinates without reading the rows (see geo.py).
+        db.Index("ix_crime_reports_geohash", "geohash", "latitude", "longitude"),
+        # Archived reports keep their ids; SQLite must never reuse one.
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String, nullable=False)
@@ -83,19 +113,40 @@ class CrimeReport(db.Model, SerializerMixin):
     location = db.Column(db.String, nullable=False)
     status = db.Column(db.String, default="open")
     created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     crime_category_id = db.Column(db.Integer, db.ForeignKey("crime_categories.id"), nullable=False)
+    # Set from the request or geocoded from location when the report is
+    # flushed; geohash is maintained alongside them.
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.BigInteger)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
 
     crime_category = db.relationship("CrimeCategory", back_populates="crime_reports")
     assignments = db.relationship("Assignment", back_populates="crime_report")
     officers = association_proxy("assignments", "officer")
 
+    __mapper_args__ = {"version_id_col": version}
+
     @validates("status")
     def validate_status(self, key, status):
-        allowed = {"open", "closed", "pending"}
-        if status not in allowed:
-            raise ValueError(f"Status must be one of {allowed}")
+        if status not in REPORT_STATUSES:
+            raise ValueError(f"Status must be one of {REPORT_STATUSES}")
         return status
 
+    @validates("latitude", "longitude")
+    def validate_coordinate(self, key, value):
+        if value is None:
+            return None
+        limit = 90 if key == "latitude" else 180
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key.capitalize()} must be a number.")
+        if not -limit <= value <= limit:
+            raise ValueError(f"{key.capitalize()} must be between -{limit} and {limit}.")
+        return value
+
     def __repr__(self):
         return f"<CrimeReport {self.title} - {self.status}>"
 
@@ -103,10 +154,18 @@ class CrimeReport(db.Model, SerializerMixin):
 class Assignment(db.Model, SerializerMixin):
     __tablename__ = "assignments"
     serialize_rules = ("-officer.assignments", "-crime_report.assignments")
+    __table_args__ = (
+        # The unique constraint also serves lookups by crime_report_id.
+        db.UniqueConstraint("crime_report_id", "officer_id", name="uq_assignments_crime_report_id_officer_id"),
+        db.Index("ix_assignments_officer_id_crime_report_id", "officer_id", "crime_report_id"),
+        db.Index("ix_assignments_updated_at_id", "updated_at", "id"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     role_in_case = db.Column(db.String, nullable=False)
     assigned_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     crime_report_id = db.Column(db.Integer, db.ForeignKey("crime_reports.id"), nullable=False)
     officer_id = db.Column(db.Integer, db.ForeignKey("police_officers.id"), nullable=False)
 
@@ -115,3 +174,129 @@ class Assignment(db.Model, SerializerMixin):
 
     def __repr__(self):
         return f"<Assignment CrimeReport={self.crime_report_id} Officer={self.officer_id}>"
+
+
+class ArchivedCrimeReport(db.Model, SerializerMixin):
+    """A closed CrimeReport moved out of crime_reports by archive.py, keeping its id."""
+    __tablename__ = "archived_crime_reports"
+    serialize_rules = ("-assignments.crime_report", "-crime_category.crime_reports", "-officers.crime_reports")
+    __table_args__ = (
+        db.Index("ix_archived_crime_reports_crime_category_id_id", "crime_category_id", "id"),
+        db.Index("ix_archived_crime_reports_created_at", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String, nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    location = db.Column(db.String, nullable=False)
+    status = db.Column(db.String)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    crime_category_id = db.Column(db.Integer, db.ForeignKey("crime_categories.id"), nullable=False)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.BigInteger)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    crime_category = db.relationship("CrimeCategory")
+    assignments = db.relationship("ArchivedAssignment", back_populates="crime_report")
+    officers = association_proxy("assignments", "officer")
+
+    def __repr__(self):
+        return f"<ArchivedCrimeReport {self.title} - {self.status}>"
+
+
+class ArchivedAssignment(db.Model, SerializerMixin):
+    """An Assignment archived along with its report."""
+    __tablename__ = "archived_assignments"
+    serialize_rules = ("-officer.assignments", "-crime_report.assignments")
+    __table_args__ = (
+        db.Index("ix_archived_assignments_crime_report_id", "crime_report_id"),
+        db.Index("ix_archived_assignments_officer_id_crime_report_id", "officer_id", "crime_report_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    role_in_case = db.Column(db.String, nullable=False)
+    assigned_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    crime_report_id = db.Column(db.Integer, db.ForeignKey("archived_crime_reports.id"), nullable=False)
+    officer_id = db.Column(db.Integer, db.ForeignKey("police_officers.id"), nullable=False)
+
+    crime_report = db.relationship("ArchivedCrimeReport", back_populates="assignments")
+    officer = db.relationship("PoliceOfficer")
+
+    def __repr__(self):
+        return f"<ArchivedAssignment CrimeReport={self.crime_report_id} Officer={self.officer_id}>"
+
+
+class StatCounter(db.Model):
+    __tablename__ = "stat_counters"
+
+    name = db.Column(db.String, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StatCounter {self.name}={self.value}>"
+
+
+class ReportRollup(db.Model):
+    """Reports filed per day, category and current status (see analytics.py)."""
+    __tablename__ = "report_rollups"
+
+    day = db.Column(db.Date, primary_key=True)
+    crime_category_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ReportRollup {self.day} {self.crime_category_id}/{self.status}={self.count}>"
+
+
+class Tombstone(db.Model):
+    """A deleted row, kept so /api/sync can tell clients to drop their copy."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        db.Index("ix_tombstones_deleted_at_id", "deleted_at", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String, nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<Tombstone {self.table_name}#{self.row_id}>"
+
+
+class Job(db.Model):
+    """A unit of background work, queued here and run by worker.py (see jobs.py)."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The worker's claim query: the oldest due job of a status.
+        db.Index("ix_jobs_status_run_at_id", "status", "run_at", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String, nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String, nullable=False, default="queued")
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    message = db.Column(db.String)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    # Not before this time: set to the backoff when a failed attempt is retried.
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    worker = db.Column(db.String)
+    heartbeat_at = db.Column(db.DateTime)
+    # No foreign key: deleting an officer leaves their jobs' history alone.
+    created_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
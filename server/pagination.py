@@ -0,0 +1,146 @@
+import base64
+import binascii
+import math
+from datetime import datetime
+
+from sqlalchemy import Float, and_, cast, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def encode_rank_cursor(score, last_id):
+    return base64.urlsafe_b64encode(f"{score!r}:{last_id}".encode()).decode()
+
+
+def decode_rank_cursor(cursor):
+    try:
+        score, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(score), int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(args):
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_int(args, name):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+def parse_float(args, name):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a number")
+    return number
+
+
+def parse_date(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date")
+
+
+def keyset_query(query, model, args):
+    """Apply keyset_page's cursor, ordering and limit to a Query or select().
+
+    Returns the query and the page size; it fetches one extra row to tell
+    whether there is a next page. keyset_rows turns the result into a page.
+    """
+    limit = parse_limit(args)
+    cursor = args.get("cursor")
+    if cursor:
+        query = query.filter(model.id < decode_cursor(cursor))
+    return query.order_by(model.id.desc()).limit(limit + 1), limit
+
+
+def keyset_rows(rows, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
+
+
+def keyset_page(query, model, args):
+    """Return one page of `query`, newest first, and the cursor for the next.
+
+    Pages are keyed on the primary key rather than OFFSET, so fetching page
+    1000 costs the same index range scan as fetching page 1.
+    """
+    query, limit = keyset_query(query, model, args)
+    return keyset_rows(query.all(), limit)
+
+
+def ranked_query(query, score, id_column, args):
+    """Like keyset_query, for ranked_page."""
+    limit = parse_limit(args)
+    cursor = args.get("cursor")
+    if cursor:
+        last_score, last_id = decode_rank_cursor(cursor)
+        # Compared as a double, like the score search_hits selects.
+        last_score = cast(last_score, Float(precision=53))
+        query = query.filter(or_(score < last_score, and_(score == last_score, id_column < last_id)))
+    return query.order_by(score.desc(), id_column.desc()).limit(limit + 1), limit
+
+
+def ranked_rows(rows, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1][1], rows[-1][0].id)
+    return rows, next_cursor
+
+
+def ranked_page(query, score, id_column, args):
+    """Return one page of (row, score) pairs, best match first.
+
+    Like keyset_page, but keyed on (score, id) so ties in relevance still
+    page deterministically.
+    """
+    query, limit = ranked_query(query, score, id_column, args)
+    return ranked_rows(query.all(), limit)
+
+
+def nearest_query(query, distance, id_column, args):
+    """Like ranked_query, nearest first; ranked_rows turns the result into a page."""
+    limit = parse_limit(args)
+    cursor = args.get("cursor")
+    if cursor:
+        last_distance, last_id = decode_rank_cursor(cursor)
+        query = query.filter(or_(distance > last_distance, and_(distance == last_distance, id_column > last_id)))
+    return query.order_by(distance, id_column).limit(limit + 1), limit
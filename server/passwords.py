@@ -0,0 +1,96 @@
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ServiceUnavailable
+
+BCRYPT_COST = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+def _gevent_patched():
+    # With threading monkey-patched, a standard pool's "threads" are greenlets
+    # on the event loop, and bcrypt in one of them stalls every request.
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+class HasherBusy(ServiceUnavailable):
+    description = "Too many password checks in progress, please retry shortly."
+
+    def __init__(self):
+        super().__init__(retry_after=1)
+        # Flask-RESTful renders `data` as the body, matching the API's errors.
+        self.data = {"error": self.description}
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small bounded pool instead of the request thread.
+
+    bcrypt releases the GIL, so left alone every concurrent login burns a
+    core. Capping the pool keeps CPU for the rest of the API during a login
+    storm; requests beyond the queue limit wait up to PASSWORD_HASH_TIMEOUT
+    seconds and then get a 503 with Retry-After instead of piling up.
+    PASSWORD_HASH_WORKERS = 0 hashes inline, as before.
+
+    The pool only pays off where a worker serves requests concurrently: the
+    gevent workers gunicorn.conf.py runs, or the ASGI app. Under gevent its
+    threads come from gevent's own pool, which are real threads, so a login
+    waits cooperatively while its hash runs off the event loop.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self.timeout = 5
+        self._bcrypt = None
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, bcrypt):
+        self._bcrypt = bcrypt
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", 2)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", 5)
+        queue = app.config.get("PASSWORD_HASH_QUEUE", 16)
+        self._slots = threading.BoundedSemaphore(self.workers + queue)
+
+    def _pool(self):
+        # Threads do not survive fork, so each gunicorn worker builds its own
+        # pool on first use instead of inheriting the master's.
+        with self._lock:
+            if self._pid != os.getpid():
+                if _gevent_patched():
+                    from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+
+                    self._executor = GeventThreadPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy()
+        try:
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(self._bcrypt.generate_password_hash, password).decode("utf-8")
+
+    def verify(self, password_hash, password):
+        return self._run(self._bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        match = BCRYPT_COST.match(password_hash or "")
+        return match is None or int(match.group(1)) != self.rounds
+
+
+password_hasher = PasswordHasher()
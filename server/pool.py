@@ -0,0 +1,156 @@
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from metrics import metric_lines
+
+
+def engine_options(config, url=None):
+    """Engine options for `url` (the primary by default) from the DB_* settings.
+
+    Only Postgres gets a tuned pool; SQLite keeps SQLAlchemy's defaults.
+    """
+    url = make_url(url or config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() != "postgresql":
+        return {}
+
+    options = {
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 5),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 10),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+        # Reuse the most recently returned connection so surplus ones sit
+        # idle long enough to be recycled after a traffic spike.
+        "pool_use_lifo": True,
+        "connect_args": {},
+    }
+    statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+    if config.get("DB_PGBOUNCER"):
+        # Transaction pooling hands each transaction a different server
+        # connection, so prepared statements cannot be reused (psycopg2
+        # never prepares; psycopg 3 must be told not to) and startup
+        # options are rejected. PoolMonitor sets the timeout per transaction.
+        if url.get_driver_name() == "psycopg":
+            options["connect_args"]["prepare_threshold"] = None
+    elif statement_timeout:
+        options["connect_args"]["options"] = f"-c statement_timeout={statement_timeout}"
+    return options
+
+
+def async_url(url):
+    """The asyncio driver's URL for a sync database URL (aiosqlite or asyncpg)."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.get_backend_name() == "postgresql":
+        query = dict(url.query)
+        # asyncpg spells libpq's sslmode as ssl.
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    return url
+
+
+def async_engine_options(config, url):
+    """engine_options for an asyncpg engine; asyncpg takes different connect_args."""
+    options = engine_options(config, url)
+    if not options:
+        return {}
+    options["connect_args"] = {}
+    statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+    if config.get("DB_PGBOUNCER"):
+        # asyncpg caches prepared statements per connection, which
+        # transaction pooling cannot keep.
+        options["connect_args"]["statement_cache_size"] = 0
+    elif statement_timeout:
+        options["connect_args"]["server_settings"] = {"statement_timeout": str(statement_timeout)}
+    return options
+
+
+class PoolMonitor:
+    """Keeps pooled connections per process and counts pool activity.
+
+    Connections must never be shared across fork: a gunicorn worker reusing
+    the master's socket corrupts both sides ("SSL SYSCALL error"). After a
+    fork the child drops its inherited pools without closing them, so the
+    parent's connections stay intact and the child opens its own.
+    """
+
+    def __init__(self):
+        self.engines = {}
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._fork_hook = False
+
+    def init_app(self, app, db):
+        with app.app_context():
+            engines = {key or "default": engine for key, engine in db.engines.items()}
+        for name, engine in engines.items():
+            self.watch(name, engine, app.config)
+
+    def watch(self, name, engine, config):
+        """Count pool activity on `engine` (a sync Engine) and reset its pool after fork."""
+        self.engines[name] = engine
+        for event_name in ("connect", "checkout", "invalidate"):
+            event.listen(engine, event_name, self._counter(name, event_name))
+        statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+        if config.get("DB_PGBOUNCER") and statement_timeout and engine.dialect.name == "postgresql":
+            event.listen(engine, "begin", lambda conn: conn.exec_driver_sql(
+                f"SET LOCAL statement_timeout = {int(statement_timeout)}"
+            ))
+
+        if not self._fork_hook:
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook = True
+
+    def _counter(self, name, event_name):
+        def count(*args):
+            with self._lock:
+                self._counts[name, event_name] += 1
+        return count
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._counts.clear()
+        for engine in self.engines.values():
+            engine.dispose(close=False)
+
+    def stats(self):
+        stats = {}
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            stats[name] = {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "connects": self._counts[name, "connect"],
+                "checkouts": self._counts[name, "checkout"],
+                "invalidations": self._counts[name, "invalidate"],
+            }
+        return stats
+
+
+pool_monitor = PoolMonitor()
+
+
+POOL_METRICS = (
+    ("db_pool_size", "gauge", "Connections the pool keeps open.", "size"),
+    ("db_pool_checked_out", "gauge", "Connections currently in use.", "checked_out"),
+    ("db_pool_checked_in", "gauge", "Idle connections in the pool.", "checked_in"),
+    ("db_pool_overflow", "gauge", "Connections beyond pool_size (negative while below it).", "overflow"),
+    ("db_pool_connects_total", "counter", "New database connections opened.", "connects"),
+    ("db_pool_checkouts_total", "counter", "Connections checked out of the pool.", "checkouts"),
+    ("db_pool_invalidations_total", "counter", "Connections discarded after errors.", "invalidations"),
+)
+
+
+def pool_metrics():
+    stats = pool_monitor.stats()
+    for name, type, help, key in POOL_METRICS:
+        series = [((engine,), values[key]) for engine, values in stats.items() if values[key] is not None]
+        yield from metric_lines(name, type, help, ("engine",), series)
@@ -0,0 +1,245 @@
+"""Officer workload index behind /api/reports/<id>/recommended-officers.
+
+Each worker keeps every officer's open-case load in memory: assignments on
+reports that are not closed, in total and per category. An officer is
+qualified for a category once they have worked a case in it, live or
+archived. For each category the qualified officers are kept sorted by
+open cases, then open cases in that category; a recommendation walks
+that list, and only if it runs short falls back to the least-loaded
+officers overall. Apart from looking up who is already on the report it
+never touches the database.
+
+Commits that change assignments, officers, or a report's status or
+category mark the officers involved stale, and the next recommendation
+reloads only those, with one GROUP BY on the primary. Bulk statements and
+other workers' writes are picked up by a full reload at most
+RECOMMENDATIONS_REFRESH_SECONDS later.
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import case, event, func, inspect, or_
+
+from models import db, PoliceOfficer, CrimeReport, Assignment, ArchivedCrimeReport, ArchivedAssignment
+
+DEFAULT_K = 5
+MAX_K = 50
+STALE_OFFICERS = "workload_index.officers"
+STALE_REPORTS = "workload_index.reports"
+RELOAD = "workload_index.reload"
+
+
+class OfficerLoad:
+    __slots__ = ("id", "name", "rank", "open_cases", "by_category", "handled")
+
+    def __init__(self, id, name, rank):
+        self.id = id
+        self.name = name
+        self.rank = rank
+        self.open_cases = 0
+        # category id -> open cases, and -> cases ever worked
+        self.by_category = {}
+        self.handled = {}
+
+    def key(self, category_id):
+        return (self.open_cases, self.by_category.get(category_id, 0), self.id)
+
+    def to_dict(self, category_id):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "rank": self.rank,
+            "open_cases": self.open_cases,
+            "open_in_category": self.by_category.get(category_id, 0),
+            "handled_in_category": self.handled.get(category_id, 0),
+        }
+
+
+class WorkloadIndex:
+    def __init__(self):
+        self.refresh_seconds = 60
+        self._officers = {}
+        # sorted [(open_cases, officer id)], and category id -> sorted
+        # [(open_cases, open in category, officer id)] of qualified officers
+        self._all = []
+        self._by_category = {}
+        self._loaded_at = None
+        self._stale_officers = set()
+        self._stale_reports = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        self.refresh_seconds = app.config.get("RECOMMENDATIONS_REFRESH_SECONDS", 60)
+        event.listen(db.session, "after_flush", self._record_flush)
+        event.listen(db.session, "do_orm_execute", self._record_statement)
+        event.listen(db.session, "after_commit", self._mark_stale)
+        event.listen(db.session, "after_rollback", self._discard)
+
+    def _record_flush(self, session, flush_context):
+        officers = session.info.setdefault(STALE_OFFICERS, set())
+        reports = session.info.setdefault(STALE_REPORTS, set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, PoliceOfficer):
+                officers.add(obj.id)
+            elif isinstance(obj, Assignment):
+                # An assignment moved to another officer unloads the old one too.
+                officers.add(obj.officer_id)
+                officers.update(inspect(obj).attrs.officer_id.history.deleted)
+            elif isinstance(obj, CrimeReport) and obj in session.dirty:
+                attrs = inspect(obj).attrs
+                if attrs.status.history.has_changes() or attrs.crime_category_id.history.has_changes():
+                    reports.add(obj.id)
+
+    def _record_statement(self, orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        for mapper in orm_execute_state.all_mappers:
+            # New reports have no assignments yet, so inserting them is harmless.
+            if mapper.class_ in (PoliceOfficer, Assignment) or (
+                mapper.class_ is CrimeReport and not orm_execute_state.is_insert
+            ):
+                orm_execute_state.session.info[RELOAD] = True
+
+    def _mark_stale(self, session):
+        officers = session.info.pop(STALE_OFFICERS, None)
+        reports = session.info.pop(STALE_REPORTS, None)
+        reload = session.info.pop(RELOAD, False)
+        with self._lock:
+            self._stale_officers.update(officers or ())
+            self._stale_reports.update(reports or ())
+            if reload:
+                self._loaded_at = None
+
+    def _discard(self, session):
+        for key in (STALE_OFFICERS, STALE_REPORTS, RELOAD):
+            session.info.pop(key, None)
+
+    def _load(self, officer_ids=None, report_ids=None):
+        """Rows of (id, name, rank, crime_category_id, open cases, cases) for the given officers, or all of them.
+
+        The archive's rows come last and count toward cases only.
+        """
+        is_open = case((CrimeReport.status != "closed", 1), else_=0)
+        live = (
+            db.select(
+                PoliceOfficer.id, PoliceOfficer.name, PoliceOfficer.rank,
+                CrimeReport.crime_category_id, func.coalesce(func.sum(is_open), 0), func.count(CrimeReport.id),
+            )
+            .outerjoin(Assignment, Assignment.officer_id == PoliceOfficer.id)
+            .outerjoin(CrimeReport, CrimeReport.id == Assignment.crime_report_id)
+            .group_by(PoliceOfficer.id, PoliceOfficer.name, PoliceOfficer.rank, CrimeReport.crime_category_id)
+        )
+        archived = (
+            db.select(
+                ArchivedAssignment.officer_id, ArchivedCrimeReport.crime_category_id, func.count(ArchivedCrimeReport.id),
+            )
+            .join(ArchivedCrimeReport, ArchivedCrimeReport.id == ArchivedAssignment.crime_report_id)
+            .group_by(ArchivedAssignment.officer_id, ArchivedCrimeReport.crime_category_id)
+        )
+        if officer_ids is not None:
+            officers = or_(
+                PoliceOfficer.id.in_(officer_ids),
+                PoliceOfficer.id.in_(
+                    db.select(Assignment.officer_id).where(Assignment.crime_report_id.in_(report_ids))
+                ),
+            )
+            live = live.where(officers)
+            archived = archived.where(ArchivedAssignment.officer_id.in_(db.select(PoliceOfficer.id).where(officers)))
+        # Always the primary, outside the request's transaction: a replica
+        # could lag behind the commit that made these officers stale.
+        with db.engine.connect() as conn:
+            return conn.execute(live).all(), conn.execute(archived).all()
+
+    def _refresh(self):
+        with self._lock:
+            full = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+            officer_ids, report_ids = self._stale_officers, self._stale_reports
+            if not full and not officer_ids and not report_ids:
+                return
+            self._stale_officers, self._stale_reports = set(), set()
+            if full:
+                # Other threads keep answering from the old index meanwhile.
+                self._loaded_at = time.monotonic()
+
+        try:
+            rows, archived = self._load() if full else self._load(sorted(officer_ids), sorted(report_ids))
+        except Exception:
+            with self._lock:
+                self._stale_officers.update(officer_ids)
+                self._stale_reports.update(report_ids)
+                if full:
+                    self._loaded_at = None
+            raise
+
+        loads = {}
+        for officer_id, name, rank, category_id, open_cases, cases in rows:
+            officer = loads.setdefault(officer_id, OfficerLoad(officer_id, name, rank))
+            if open_cases:
+                officer.open_cases += open_cases
+                officer.by_category[category_id] = open_cases
+            if cases:
+                officer.handled[category_id] = cases
+        for officer_id, category_id, cases in archived:
+            # An officer deleted since their cases were archived has no row.
+            officer = loads.get(officer_id)
+            if officer is not None:
+                officer.handled[category_id] = officer.handled.get(category_id, 0) + cases
+
+        with self._lock:
+            if full:
+                self._officers = loads
+                self._all = sorted((officer.open_cases, officer.id) for officer in loads.values())
+                self._by_category = {}
+                for officer in loads.values():
+                    for category_id in officer.handled:
+                        self._by_category.setdefault(category_id, []).append(officer.key(category_id))
+                for entries in self._by_category.values():
+                    entries.sort()
+                return
+            # Officers asked for by id but not returned have been deleted.
+            for officer_id in officer_ids | set(loads):
+                self._remove(officer_id)
+            for officer in loads.values():
+                self._officers[officer.id] = officer
+                bisect.insort(self._all, (officer.open_cases, officer.id))
+                for category_id in officer.handled:
+                    bisect.insort(self._by_category.setdefault(category_id, []), officer.key(category_id))
+
+    def _remove(self, officer_id):
+        officer = self._officers.pop(officer_id, None)
+        if officer is None:
+            return
+        del self._all[bisect.bisect_left(self._all, (officer.open_cases, officer.id))]
+        for category_id in officer.handled:
+            entries = self._by_category[category_id]
+            del entries[bisect.bisect_left(entries, officer.key(category_id))]
+            if not entries:
+                del self._by_category[category_id]
+
+    def recommend(self, category_id, exclude=(), k=DEFAULT_K):
+        """The k least-loaded officers not in `exclude`, qualified for `category_id` first.
+
+        Qualified officers are ordered by open cases, then open cases in the
+        category, then officer id. If fewer than k are free, the rest are
+        filled from the officers who have not worked the category, by open
+        cases and id.
+        """
+        self._refresh()
+        with self._lock:
+            picked = []
+            for _, _, officer_id in self._by_category.get(category_id, ()):
+                if len(picked) == k:
+                    return picked
+                if officer_id not in exclude:
+                    picked.append(self._officers[officer_id].to_dict(category_id))
+            for _, officer_id in self._all:
+                if len(picked) == k:
+                    break
+                officer = self._officers[officer_id]
+                if officer_id not in exclude and category_id not in officer.handled:
+                    picked.append(officer.to_dict(category_id))
+            return picked
+
+
+workload_index = WorkloadIndex()
@@ -0,0 +1,553 @@
+"""The /api resources and the routes serving the React build.
+
+create_app imports this module, and everything the views use with it, only
+once it builds the app; init_app registers them on it.
+"""
+import os
+
+from flask import Response, abort, request, send_file, session, stream_with_context
+from flask_restful import Api, Resource
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+
+from cache import response_cache
+from concurrency import changed, etag_header, version_matches
+from passwords import password_hasher, HasherBusy
+from pool import pool_monitor
+from models import db, PoliceOfficer, CrimeCategory, CrimeReport, Assignment, Job
+from decorators import admin_required, is_admin, login_required
+from loaders import eager_options
+from serializers import (
+    output_json, serialize_officer, serialize_report, serialize_assignment, serialize_category, serialize_job,
+)
+from filters import filter_reports, filter_assignments, filter_officers, filter_jobs
+from pagination import keyset_page, ranked_page, parse_float, parse_int, parse_limit
+from search import search_hits
+from geo import DEFAULT_RADIUS_KM, distance_km, geo_index, parse_box
+from bulk import (
+    ingest, prepare_reports, prepare_assignments, record_reports, record_assignments, update_report_status,
+)
+from export import EXPORT_FORMATS, stream_reports
+from frontend import frontend
+from sync import SyncExpired, change_feed
+from events import event_broker
+from stats import bump, get_counters, report_status_changed, summary
+from analytics import report_rollups
+from recommendations import DEFAULT_K, MAX_K, workload_index
+from archive import get_or_404, include_archived, keyset_page_with_archive
+from jobs import SUCCEEDED, job_queue, result_path
+
+
+def login():
+    data = request.get_json()
+    email = data.get("email")
+    password = data.get("password")
+
+    officer = PoliceOfficer.query.filter_by(email=email).first()
+    try:
+        authenticated = officer is not None and officer.check_password(password)
+        if authenticated and password_hasher.needs_rehash(officer.password_hash):
+            officer.set_password(password)
+            try:
+                db.session.commit()
+            except StaleDataError:
+                # A concurrent login of the same officer upgraded it first.
+                db.session.rollback()
+    except HasherBusy as e:
+        return {"error": e.description}, 503, {"Retry-After": "1"}
+
+    if authenticated:
+        session["user_id"] = officer.id
+        session["role"] = officer.role
+        return {"message": f"Logged in as {officer.role}"}, 200
+    return {"error": "Invalid email or password"}, 401
+
+def logout():
+    session.clear()
+    return {"message": "Logged out successfully"}, 200
+
+def health():
+    try:
+        db.session.execute(db.text("SELECT 1"))
+    except SQLAlchemyError as e:
+        return {"status": "unavailable", "error": str(getattr(e, "orig", e)), "pools": pool_monitor.stats()}, 503
+    return {"status": "ok", "pools": pool_monitor.stats()}, 200
+
+def stats():
+    return summary(get_counters()), 200
+
+
+# What a PATCH may change; password is hashed, the rest are plain columns.
+OFFICER_FIELDS = {"name", "badge_number", "rank", "email", "phone", "role", "password"}
+
+class PoliceOfficerResource(Resource):
+    @response_cache.cached("officers")
+    def get(self, id=None):
+        if id:
+            officer = PoliceOfficer.query.options(*eager_options(PoliceOfficer)).get_or_404(id)
+            return serialize_officer(officer)
+        try:
+            query = filter_officers(PoliceOfficer.query.options(*eager_options(PoliceOfficer)), request.args)
+            officers, next_cursor = keyset_page(query, PoliceOfficer, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_officer(o) for o in officers], "next_cursor": next_cursor}, 200
+
+    def post(self):
+        data = request.get_json()
+        try:
+            officer = PoliceOfficer(
+                name=data["name"],
+                badge_number=data["badge_number"],
+                rank=data["rank"],
+                email=data["email"],
+                phone=data["phone"],
+                # Anyone may sign up, but only an admin can create another admin.
+                role=data.get("role", "officer") if is_admin() else "officer",
+            )
+            officer.set_password(data["password"])
+            db.session.add(officer)
+            bump(("officers", 1))
+            db.session.commit()
+            return serialize_officer(officer), 201
+        except HasherBusy:
+            raise
+        except Exception as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+
+    @login_required
+    def patch(self, id):
+        # Officers may edit their own profile; anyone else's takes an admin.
+        if id != session["user_id"] and not is_admin():
+            return {"error": "Admin access required"}, 403
+        officer = PoliceOfficer.query.get_or_404(id)
+        data = request.get_json() or {}
+        if not version_matches(officer, data.pop("version", None)):
+            return changed(officer, 412)
+        unknown = set(data) - OFFICER_FIELDS
+        if unknown:
+            return {"error": f"Unknown or read-only fields: {', '.join(sorted(unknown))}"}, 400
+        if "role" in data and data["role"] != officer.role and not is_admin():
+            return {"error": "Admin access required"}, 403
+        try:
+            for field, value in data.items():
+                if field == "password":
+                    officer.set_password(value)
+                else:
+                    setattr(officer, field, value)
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return changed(officer, 409)
+        except ValueError as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+        return serialize_officer(officer), 200, etag_header(officer)
+
+    @admin_required
+    def delete(self, id):
+        officer = PoliceOfficer.query.get_or_404(id)
+        db.session.delete(officer)
+        bump(("officers", -1))
+        db.session.commit()
+        return {"message": "Officer deleted successfully"}, 204
+
+
+class CrimeReportResource(Resource):
+    def get(self, id=None):
+        if id:
+            report = get_or_404(CrimeReport, id)
+            return serialize_report(report), 200, etag_header(report)
+        try:
+            if include_archived(request.args):
+                reports, next_cursor = keyset_page_with_archive(CrimeReport, request.args)
+            else:
+                query = filter_reports(CrimeReport.query.options(*eager_options(CrimeReport)), request.args)
+                reports, next_cursor = keyset_page(query, CrimeReport, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_report(r) for r in reports], "next_cursor": next_cursor}, 200
+
+    @login_required
+    def post(self):
+        data = request.get_json()
+        try:
+            report = CrimeReport(
+                title=data.get("title"),
+                description=data.get("description"),
+                location=data.get("location"),
+                status=data.get("status", "open"),
+                crime_category_id=data["crime_category_id"],
+                latitude=data.get("latitude"),
+                longitude=data.get("longitude"),
+            )
+            db.session.add(report)
+            report_status_changed(None, report.status)
+            db.session.commit()
+            return serialize_report(report), 201
+        except Exception as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+
+    def patch(self, id):
+        report = CrimeReport.query.get_or_404(id)
+        data = request.get_json()
+        if not version_matches(report, data.pop("version", None)):
+            return changed(report, 412)
+        old_status = report.status
+        try:
+            # The model validators reject a bad status or coordinate here, and
+            # a lone latitude or longitude when the report is flushed.
+            for field, value in data.items():
+                setattr(report, field, value)
+            # The counter UPDATE autoflushes the report, so either can lose the race.
+            report_status_changed(old_status, report.status)
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return changed(report, 409)
+        except ValueError as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+        return serialize_report(report), 200, etag_header(report)
+
+    def delete(self, id):
+        report = CrimeReport.query.get_or_404(id)
+        db.session.delete(report)
+        report_status_changed(report.status, None)
+        db.session.commit()
+        return {"message": "Report deleted"}, 204
+
+
+class CrimeReportSearchResource(Resource):
+    def get(self):
+        q = request.args.get("q", "").strip()
+        if not q:
+            return {"error": "q is required"}, 400
+        try:
+            hits = search_hits(q)
+            query = (
+                CrimeReport.query.options(*eager_options(CrimeReport))
+                .join(hits, hits.c.id == CrimeReport.id)
+                .add_columns(hits.c.score)
+            )
+            query = filter_reports(query, request.args)
+            rows, next_cursor = ranked_page(query, hits.c.score, hits.c.id, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_report(r) for r, _ in rows], "next_cursor": next_cursor}, 200
+
+
+class CrimeReportNearResource(Resource):
+    def get(self):
+        try:
+            lat, lon = parse_float(request.args, "lat"), parse_float(request.args, "lon")
+            if lat is None or lon is None:
+                return {"error": "lat and lon are required"}, 400
+            radius = parse_float(request.args, "radius")
+            query = filter_reports(CrimeReport.query.options(*eager_options(CrimeReport)), request.args)
+            rows, next_cursor = geo_index.nearest(
+                query, lat, lon, DEFAULT_RADIUS_KM if radius is None else radius, request.args,
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        items = []
+        for report, distance in rows:
+            data = serialize_report(report)
+            data["distance_km"] = round(distance_km(distance), 3)
+            items.append(data)
+        return {"items": items, "next_cursor": next_cursor}, 200
+
+
+class CrimeReportBoundingBoxResource(Resource):
+    def get(self):
+        try:
+            query = geo_index.within(CrimeReport.query.options(*eager_options(CrimeReport)), parse_box(request.args))
+            reports, next_cursor = keyset_page(filter_reports(query, request.args), CrimeReport, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_report(r) for r in reports], "next_cursor": next_cursor}, 200
+
+
+class CrimeReportHeatmapResource(Resource):
+    @response_cache.cached("heatmap")
+    def get(self):
+        try:
+            box = parse_box(request.args, required=False)
+            query = filter_reports(db.select(), request.args)
+            return geo_index.heatmap(query, box, parse_int(request.args, "precision")), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+
+class RecommendedOfficersResource(Resource):
+    def get(self, id):
+        try:
+            k = parse_int(request.args, "k")
+            if k is not None and not 1 <= k <= MAX_K:
+                raise ValueError(f"k must be between 1 and {MAX_K}")
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        report = CrimeReport.query.get_or_404(id)
+        assigned = set(db.session.scalars(db.select(Assignment.officer_id).where(Assignment.crime_report_id == id)))
+        officers = workload_index.recommend(report.crime_category_id, assigned, k or DEFAULT_K)
+        return {"crime_report_id": id, "crime_category_id": report.crime_category_id, "items": officers}, 200
+
+
+class CrimeReportBulkResource(Resource):
+    @login_required
+    def post(self):
+        try:
+            return ingest(CrimeReport, prepare_reports, record_reports), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+    @login_required
+    def patch(self):
+        try:
+            return update_report_status(request.args, request.get_json(silent=True)), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+
+class CrimeReportExportResource(Resource):
+    @login_required
+    def get(self):
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            return {"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, 400
+        try:
+            stmt = filter_reports(db.select(CrimeReport), request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        export, mimetype = EXPORT_FORMATS[fmt]
+        return Response(
+            stream_with_context(export(stream_reports(stmt))),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=reports.{fmt}"},
+        )
+
+
+class AssignmentResource(Resource):
+    def get(self, id=None):
+        if id:
+            return serialize_assignment(get_or_404(Assignment, id))
+        try:
+            if include_archived(request.args):
+                assignments, next_cursor = keyset_page_with_archive(Assignment, request.args)
+            else:
+                query = filter_assignments(Assignment.query.options(*eager_options(Assignment)), request.args)
+                assignments, next_cursor = keyset_page(query, Assignment, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_assignment(a) for a in assignments], "next_cursor": next_cursor}, 200
+    
+    @admin_required
+    def post(self):
+        data = request.get_json()
+        try:
+            assignment = Assignment(
+                role_in_case=data["role_in_case"],
+                crime_report_id=data["crime_report_id"],
+                officer_id=data["officer_id"],
+            )
+            db.session.add(assignment)
+            bump(("assignments", 1))
+            db.session.commit()
+            return serialize_assignment(assignment), 201
+        except Exception as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+
+
+class AssignmentBulkResource(Resource):
+    @admin_required
+    def post(self):
+        try:
+            return ingest(Assignment, prepare_assignments, record_assignments), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+
+class CrimeCategoryResource(Resource):
+    @response_cache.cached("categories")
+    def get(self, id=None):
+        if id:
+            category = CrimeCategory.query.options(*eager_options(CrimeCategory)).get_or_404(id)
+            return serialize_category(category)
+        categories = CrimeCategory.query.options(*eager_options(CrimeCategory)).all()
+        return [serialize_category(c) for c in categories], 200
+
+    def post(self):
+        data = request.get_json()
+        try:
+            category = CrimeCategory(name=data["name"])
+            db.session.add(category)
+            db.session.commit()
+            return serialize_category(category), 201
+        except Exception as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+
+class TimeSeriesResource(Resource):
+    def get(self):
+        try:
+            return report_rollups.timeseries(request.args), 200
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+class SyncResource(Resource):
+    def get(self):
+        try:
+            return change_feed.changes(request.args.get("since"), parse_limit(request.args)), 200
+        except SyncExpired as e:
+            return {"error": e.description}, 410
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+class EventStreamResource(Resource):
+    def get(self):
+        collections = {c for c in request.args.get("collections", "").split(",") if c}
+        unknown = collections - {"reports", "assignments"}
+        if unknown:
+            return {"error": f"Unknown collections: {', '.join(sorted(unknown))}"}, 400
+        return Response(
+            event_broker.stream(collections),
+            mimetype="text/event-stream",
+            # Proxies must pass events through as they are written.
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+def visible_jobs():
+    # Params and results can hold report data; officers only see their own jobs.
+    if is_admin():
+        return Job.query
+    return Job.query.filter(Job.created_by == session["user_id"])
+
+class JobResource(Resource):
+    @login_required
+    def get(self, id=None):
+        if id:
+            return serialize_job(visible_jobs().filter(Job.id == id).first_or_404()), 200
+        try:
+            jobs, next_cursor = keyset_page(filter_jobs(visible_jobs(), request.args), Job, request.args)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return {"items": [serialize_job(j) for j in jobs], "next_cursor": next_cursor}, 200
+
+    @login_required
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        if job_queue.admin_only(data.get("kind")) and not is_admin():
+            return {"error": "Admin access required"}, 403
+        try:
+            job = job_queue.enqueue(data.get("kind"), data.get("params"), session.get("user_id"))
+            db.session.commit()
+        except ValueError as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+        return serialize_job(job), 202, {"Location": f"/api/jobs/{job.id}"}
+
+class JobResultResource(Resource):
+    @login_required
+    def get(self, id):
+        job = visible_jobs().filter(Job.id == id).first_or_404()
+        if job.status != SUCCEEDED:
+            return {"error": f"Job is {job.status}"}, 409
+        path = result_path(job.result, job_queue.output_dir)
+        if path is None:
+            return {"error": "Job has no result file"}, 404
+        if not os.path.exists(path):
+            return {"error": "Result file is no longer available"}, 410
+        return send_file(
+            path, mimetype=job.result.get("mimetype"), as_attachment=True,
+            download_name=f"{job.kind}-{job.id}.{job.result.get('format', 'out')}",
+        )
+
+# Debug route to check file paths
+def debug_info():
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(server_dir)
+    build_dir = frontend.build_dir
+    static_dir = os.path.join(build_dir, "static")
+    build_exists = os.path.exists(build_dir)
+    static_exists = os.path.exists(static_dir)
+    
+    build_contents = []
+    static_contents = []
+    
+    if build_exists:
+        try:
+            build_contents = os.listdir(build_dir)
+        except:
+            build_contents = ["Error reading build directory"]
+    
+    if static_exists:
+        try:
+            static_contents = os.listdir(static_dir)
+        except:
+            static_contents = ["Error reading static directory"]
+    
+    return {
+        "server_dir": server_dir,
+        "project_root": project_root,
+        "build_dir": build_dir,
+        "static_dir": static_dir,
+        "build_exists": build_exists,
+        "static_exists": static_exists,
+        "build_contents": build_contents,
+        "static_contents": static_contents,
+    }
+
+# Serve static files (CSS, JS, images)
+def serve_static(filename):
+    return frontend.serve(f"static/{filename}") or abort(404)
+
+# React frontend routes
+def serve_react(path):
+    if not frontend.assets:
+        return f"Build directory not found at: {frontend.build_dir}", 404
+
+    # Build files (favicon, manifest, ...), else index.html for SPA routing
+    response = (path and frontend.serve(path)) or frontend.serve("index.html")
+    if response is None:
+        return f"index.html not found in {frontend.build_dir}", 404
+    return response
+
+
+def init_app(app):
+    api = Api(app)
+    api.representation("application/json")(output_json)
+    # Add /api prefix to all API resources
+    api.add_resource(PoliceOfficerResource, "/api/officers", "/api/officers/<int:id>")
+    api.add_resource(CrimeReportResource, "/api/reports", "/api/reports/<int:id>")
+    api.add_resource(CrimeReportSearchResource, "/api/reports/search")
+    api.add_resource(CrimeReportNearResource, "/api/reports/near")
+    api.add_resource(CrimeReportBoundingBoxResource, "/api/reports/bbox")
+    api.add_resource(CrimeReportHeatmapResource, "/api/reports/heatmap")
+    api.add_resource(RecommendedOfficersResource, "/api/reports/<int:id>/recommended-officers")
+    api.add_resource(CrimeReportBulkResource, "/api/reports/bulk")
+    api.add_resource(CrimeReportExportResource, "/api/reports/export")
+    api.add_resource(AssignmentResource, "/api/assignments", "/api/assignments/<int:id>")
+    api.add_resource(AssignmentBulkResource, "/api/assignments/bulk")
+    api.add_resource(CrimeCategoryResource, "/api/categories", "/api/categories/<int:id>")
+    api.add_resource(TimeSeriesResource, "/api/analytics/timeseries")
+    api.add_resource(SyncResource, "/api/sync")
+    api.add_resource(EventStreamResource, "/api/events")
+    api.add_resource(JobResource, "/api/jobs", "/api/jobs/<int:id>")
+    api.add_resource(JobResultResource, "/api/jobs/<int:id>/result")
+
+    app.add_url_rule('/api/login', view_func=login, methods=['POST'])
+    app.add_url_rule('/api/logout', view_func=logout, methods=['POST'])
+    app.add_url_rule('/api/health', view_func=health)
+    app.add_url_rule('/api/stats', view_func=stats)
+
+    app.add_url_rule('/debug', view_func=debug_info)
+    app.add_url_rule("/static/<path:filename>", view_func=serve_static)
+    # React frontend routes - these should be LAST
+    app.add_url_rule("/", view_func=serve_react, defaults={"path": ""})
+    app.add_url_rule("/<path:path>", view_func=serve_react)
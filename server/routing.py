@@ -0,0 +1,120 @@
+import logging
+import random
+import threading
+import time
+
+from flask import has_request_context, request, session as cookie_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+WROTE = "replica_router.wrote"
+REPLICA = "replica_router.replica"
+
+
+class ReplicaRouter:
+    """Sends reads made while serving GET requests to a replica.
+
+    Anything that writes (flushes, INSERT/UPDATE/DELETE statements, SELECT
+    FOR UPDATE) and every later statement in that session stays on the
+    primary. After a commit the client's session cookie pins it to the
+    primary for REPLICA_STICKY_SECONDS so it reads its own writes despite
+    replication lag. A replica that fails with a connection error is
+    skipped for REPLICA_RETRY_SECONDS and probed before it is used again.
+    """
+
+    def __init__(self):
+        self.replicas = {}
+        self.sticky_seconds = 5
+        self.retry_seconds = 30
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        self.sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", 5)
+        self.retry_seconds = app.config.get("REPLICA_RETRY_SECONDS", 30)
+        with app.app_context():
+            self.replicas = {
+                key: engine for key, engine in db.engines.items()
+                if key and key.startswith("replica_")
+            }
+        for key, engine in self.replicas.items():
+            event.listen(engine, "handle_error", self._error_handler(key))
+
+        event.listen(db.session, "after_flush", self._record_flush)
+        event.listen(db.session, "do_orm_execute", self._record_statement)
+        event.listen(db.session, "after_commit", self._pin_to_primary)
+
+    def reads_from_replica(self, session, clause):
+        if not self.replicas or not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if session._flushing or session.info.get(WROTE):
+            return False
+        if isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+            return False
+        return cookie_session.get("primary_until", 0) < time.time()
+
+    def engine_for(self, session):
+        """The replica this session reads from, or None to use the primary."""
+        key = session.info.get(REPLICA)
+        if key is None or not self._healthy(key):
+            healthy = [k for k in self.replicas if self._healthy(k)]
+            if not healthy:
+                return None
+            key = session.info[REPLICA] = random.choice(healthy)
+        return self.replicas[key]
+
+    def _healthy(self, key):
+        if key not in self._down_until:
+            return True
+        with self._lock:
+            down_until = self._down_until.get(key)
+            if down_until is None:
+                return True
+            if down_until > time.monotonic():
+                return False
+            # Hold other threads off while this one probes the replica.
+            self._down_until[key] = time.monotonic() + self.retry_seconds
+        try:
+            with self.replicas[key].connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+        except DBAPIError:
+            return False
+        self._down_until.pop(key, None)
+        logger.info("replica %s is back", key)
+        return True
+
+    def _error_handler(self, key):
+        def handle_error(context):
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                if key not in self._down_until:
+                    logger.warning("replica %s unavailable: %s", key, context.original_exception)
+                self._down_until[key] = time.monotonic() + self.retry_seconds
+        return handle_error
+
+    def _record_flush(self, session, flush_context):
+        session.info[WROTE] = True
+
+    def _record_statement(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info[WROTE] = True
+
+    def _pin_to_primary(self, session):
+        if self.replicas and session.info.get(WROTE) and has_request_context():
+            cookie_session["primary_until"] = time.time() + self.sticky_seconds
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and replica_router.reads_from_replica(self, clause):
+            engine = replica_router.engine_for(self)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+replica_router = ReplicaRouter()
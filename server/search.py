@@ -0,0 +1,98 @@
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import DDL, Float, cast, event, false, func, literal_column, table, text
+
+from models import db, CrimeReport
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "crime_reports_fts"
+
+# Postgres keeps a weighted tsvector next to each row (title > location >
+# description) and indexes it with GIN. The column is generated, so every
+# write path, bulk inserts included, keeps it current without app code.
+POSTGRES_DDL = (
+    "ALTER TABLE crime_reports ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')) STORED",
+    "CREATE INDEX ix_crime_reports_search_vector ON crime_reports USING gin (search_vector)",
+)
+
+# SQLite has no tsvector, so an external-content FTS5 table indexes the same
+# columns and triggers keep it in step with crime_reports.
+SQLITE_INSERT_TRIGGER = (
+    "CREATE TRIGGER crime_reports_fts_ai AFTER INSERT ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END"
+)
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crime_reports_fts USING fts5("
+    "title, description, location, content='crime_reports', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    SQLITE_INSERT_TRIGGER,
+    "CREATE TRIGGER crime_reports_fts_ad AFTER DELETE ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER crime_reports_fts_au AFTER UPDATE OF title, description, location ON crime_reports BEGIN "
+    "INSERT INTO crime_reports_fts(crime_reports_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO crime_reports_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+)
+
+# db.create_all() (seed.py, local setups) builds the index too; migrated
+# databases get it from the add_full_text_search revision.
+for statement in POSTGRES_DDL:
+    event.listen(CrimeReport.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DDL:
+    event.listen(CrimeReport.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    CrimeReport.__table__, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+@contextmanager
+def deferred_search_index(session):
+    """Bulk-load crime_reports without per-row FTS5 upkeep, then index once.
+
+    On SQLite the insert trigger makes loads several times slower than one
+    'rebuild' at the end. Postgres maintains its generated column either way.
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        yield
+        return
+    session.execute(text("DROP TRIGGER IF EXISTS crime_reports_fts_ai"))
+    session.commit()
+    try:
+        yield
+    finally:
+        session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        session.execute(text(SQLITE_INSERT_TRIGGER))
+        session.commit()
+
+
+def search_hits(q, dialect=None):
+    """Subquery of (id, score) for reports matching `q`; higher scores rank first."""
+    if (dialect or db.engine.dialect.name) == "sqlite":
+        # Quote every word so user input can never be parsed as FTS5 syntax.
+        terms = " ".join(f'"{term}"' for term in re.findall(r"\w+", q))
+        fts = literal_column(FTS_TABLE)
+        return (
+            db.select(literal_column("rowid").label("id"), (-func.bm25(fts, 10.0, 1.0, 5.0)).label("score"))
+            .select_from(table(FTS_TABLE))
+            .where(fts.op("MATCH")(terms) if terms else false())
+            .subquery("hits")
+        )
+
+    vector = literal_column("crime_reports.search_vector")
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    # ts_rank is a float4; as a float8 it round-trips through the cursor
+    # exactly and compares equal to the score it came from.
+    score = cast(func.ts_rank(vector, tsquery), Float(precision=53))
+    return (
+        db.select(CrimeReport.id.label("id"), score.label("score"))
+        .where(vector.op("@@")(tsquery))
+        .subquery("hits")
+    )
@@ -1,63 +1,182 @@
 #!/usr/bin/env python3
+"""Fill the database with generated officers, categories, reports and assignments.
+
+    python seed.py                                    # the small demo data set
+    python seed.py --reports 1000000 --officers 5000  # load-test scale
+
+Rows are bulk inserted in chunks, and the same --seed always produces the
+same data, so benchmark runs against different commits are comparable.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
 
-from random import randint, choice as rc, sample
 from faker import Faker
-from app import app
+from sqlalchemy import text
+
+from analytics import rebuild_rollups
+from geo import geo_index, geohash
 from models import db, PoliceOfficer, CrimeCategory, CrimeReport, Assignment
+from passwords import password_hasher
+from search import deferred_search_index
+from stats import rebuild_counters
 
-fake = Faker()
+CATEGORIES = ["Theft", "Assault", "Fraud", "Vandalism", "Traffic"]
+RANKS = ["Constable", "Sergeant", "Inspector", "Chief"]
+ROLES = ["officer", "admin"]
+CASE_ROLES = ["Lead Investigator", "Support Officer"]
+STATUSES = ["open", "closed", "pending"]
+STATUS_WEIGHTS = [5, 3, 2]
+# Seeded reports are scattered this many degrees (~3 km) around their place.
+SCATTER_DEGREES = 0.03
+# Faker is far too slow to call once per row at millions of rows, so each
+# run draws from fixed pools of generated text instead.
+TEXT_POOL_SIZE = 5000
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(model, rows, chunk_size):
+    for chunk in _chunks(rows, chunk_size):
+        db.session.execute(model.__table__.insert(), chunk)
+        db.session.commit()
+
+
+def generate(officers=10, reports=15, max_assignments=3, days=365, seed=0, chunk_size=10000, log=print):
+    """Insert a deterministic data set into an empty schema; returns the row counts."""
+    fake = Faker()
+    fake.seed_instance(seed)
+    rnd = random.Random(seed)
+    pool = min(TEXT_POOL_SIZE, max(reports, 1))
+    titles = [fake.sentence(nb_words=4) for _ in range(pool)]
+    descriptions = [fake.paragraph() for _ in range(pool)]
+    # Locations come from the gazetteer so reports have coordinates to query.
+    places = {name: (lat, lon) for name, lat, lon in geo_index.places.values()}
+    cities = sorted(places) or [fake.city() for _ in range(min(pool, 500))]
+    scatter = random.Random(f"{seed}-scatter")
+    # One hash for every officer: bcrypt per row would dominate large runs.
+    password_hash = password_hasher.hash("password123")
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+
+    _insert(CrimeCategory, (
+        {"id": i, "name": name, "created_at": start, "updated_at": start} for i, name in enumerate(CATEGORIES, 1)
+    ), chunk_size)
+
+    _insert(PoliceOfficer, (
+        {
+            "id": i,
+            "name": fake.name(),
+            "badge_number": str(10000000 + i),
+            "rank": rnd.choice(RANKS),
+            "email": f"officer{i}@example.com",
+            "phone": f"07{i:08d}",
+            "password_hash": password_hash,
+            "role": rnd.choice(ROLES),
+            "created_at": start,
+            "updated_at": start,
+        }
+        for i in range(1, officers + 1)
+    ), chunk_size)
+    log(f"{officers} officers")
+
+    # Ids follow created_at, as they do for reports filed through the API.
+    step = (now - start) / max(reports, 1)
+    assignment_counts = [rnd.randint(1, min(max_assignments, officers)) if officers and max_assignments else 0
+                         for _ in range(reports)]
+
+    def report_rows():
+        for i in range(1, reports + 1):
+            title, description, location = rnd.choice(titles), rnd.choice(descriptions), rnd.choice(cities)
+            latitude = longitude = cell = None
+            if location in places:
+                latitude = places[location][0] + scatter.gauss(0, SCATTER_DEGREES)
+                longitude = places[location][1] + scatter.gauss(0, SCATTER_DEGREES)
+                cell = geohash(latitude, longitude)
+            yield {
+                "id": i,
+                "title": title,
+                "description": description,
+                "location": location,
+                "status": rnd.choices(STATUSES, STATUS_WEIGHTS)[0],
+                "created_at": start + step * i,
+                "updated_at": start + step * i,
+                "crime_category_id": rnd.randint(1, len(CATEGORIES)),
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": cell,
+            }
+            if i % 100000 == 0:
+                log(f"{i} reports")
+
+    started = time.perf_counter()
+    with deferred_search_index(db.session):
+        _insert(CrimeReport, report_rows(), chunk_size)
+    log(f"{reports} reports in {time.perf_counter() - started:.1f}s")
+
+    def assignment_rows():
+        assignment_id = 0
+        for report_id, count in enumerate(assignment_counts, 1):
+            assigned_at = start + step * report_id
+            for officer_id in rnd.sample(range(1, officers + 1), count):
+                assignment_id += 1
+                yield {
+                    "id": assignment_id,
+                    "role_in_case": rnd.choice(CASE_ROLES),
+                    "assigned_at": assigned_at,
+                    "updated_at": assigned_at,
+                    "crime_report_id": report_id,
+                    "officer_id": officer_id,
+                }
+
+    started = time.perf_counter()
+    _insert(Assignment, assignment_rows(), chunk_size)
+    log(f"{sum(assignment_counts)} assignments in {time.perf_counter() - started:.1f}s")
+
+    if db.engine.dialect.name == "postgresql":
+        # Explicit ids do not advance the sequences; move them past the data.
+        for table in ("crime_categories", "police_officers", "crime_reports", "assignments"):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+            ))
+
+    counters = rebuild_counters()
+    rebuild_rollups()
+    db.session.commit()
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--officers", type=int, default=10)
+    parser.add_argument("--reports", type=int, default=15)
+    parser.add_argument("--max-assignments", type=int, default=3, help="officers per report, at most")
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Imported here so jobs.py can run generate() inside an app it already built.
+    from app import app
 
-if __name__ == "__main__":
     with app.app_context():
-    
         print("Clearing database...")
         db.drop_all()
         db.create_all()
         print("Database created!")
+        generate(args.officers, args.reports, args.max_assignments, args.days, args.seed, args.chunk_size)
+        print("Seeding complete!")
 
-        officers = []
-        roles = ["officer", "admin"]
-        for _ in range(10):
-            officer = PoliceOfficer(
-                name=fake.name(),
-                badge_number=str(randint(10000000, 99999999)),
-                rank=rc(["Constable", "Sergeant", "Inspector", "Chief"]),
-                email=fake.unique.email(),
-                phone=fake.unique.msisdn()[:10],
-                role=rc(roles)
-            )
-            officer.set_password("password123")
-            db.session.add(officer)
-            officers.append(officer)
-
-        categories = []
-        for name in ["Theft", "Assault", "Fraud", "Vandalism", "Traffic"]:
-            category = CrimeCategory(name=name)
-            db.session.add(category)
-            categories.append(category)
-
-
-        reports = []
-        for _ in range(15):
-            report = CrimeReport(
-                title=fake.sentence(nb_words=4),
-                description=fake.paragraph(),
-                location=fake.city(),
-                status=rc(["open", "closed", "pending"]),
-                crime_category=rc(categories)
-            )
-            db.session.add(report)
-            reports.append(report)
-
-        for report in reports:
-            assigned_officers = sample(officers, k=randint(1, min(3, len(officers))))
-            for officer in assigned_officers:
-                assignment = Assignment(
-                    role_in_case=rc(["Lead Investigator", "Support Officer"]),
-                    crime_report=report,
-                    officer=officer
-                )
-                db.session.add(assignment)
 
-        db.session.commit()
-        print("Seeding complete!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import json
+
+from flask import make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Flat, hand-written equivalents of SerializerMixin.to_dict(). Each function
+# produces the same keys and nesting the mixin derives from serialize_rules,
+# but without re-parsing rules or introspecting the mapper on every row.
+
+
+def _datetime(value):
+    # Same output as SerializerMixin's default "%Y-%m-%d %H:%M:%S" for the
+    # naive timestamps stored here, at a fraction of strftime's cost.
+    return value.isoformat(" ", "seconds") if value is not None else None
+
+
+def _category_fields(c):
+    return {
+        "id": c.id,
+        "name": c.name,
+        "created_at": _datetime(c.created_at),
+        "updated_at": _datetime(c.updated_at),
+    }
+
+
+def _officer_fields(o):
+    return {
+        "id": o.id,
+        "name": o.name,
+        "badge_number": o.badge_number,
+        "rank": o.rank,
+        "email": o.email,
+        "phone": o.phone,
+        "role": o.role,
+        "created_at": _datetime(o.created_at),
+        "updated_at": _datetime(o.updated_at),
+        "version": o.version,
+    }
+
+
+def _report_fields(r):
+    return {
+        "id": r.id,
+        "title": r.title,
+        "description": r.description,
+        "location": r.location,
+        "status": r.status,
+        "created_at": _datetime(r.created_at),
+        "updated_at": _datetime(r.updated_at),
+        "crime_category_id": r.crime_category_id,
+        "latitude": r.latitude,
+        "longitude": r.longitude,
+        "version": r.version,
+    }
+
+
+def _assignment_fields(a):
+    return {
+        "id": a.id,
+        "role_in_case": a.role_in_case,
+        "assigned_at": _datetime(a.assigned_at),
+        "updated_at": _datetime(a.updated_at),
+        "crime_report_id": a.crime_report_id,
+        "officer_id": a.officer_id,
+    }
+
+
+def _optional(fields, value):
+    return fields(value) if value is not None else None
+
+
+def _assignment_with_officer(a):
+    data = _assignment_fields(a)
+    data["officer"] = _optional(_officer_fields, a.officer)
+    return data
+
+
+def serialize_report_summary(r):
+    if r is None:
+        return None
+    data = _report_fields(r)
+    data["crime_category"] = _optional(_category_fields, r.crime_category)
+    return data
+
+
+def serialize_report(r):
+    data = serialize_report_summary(r)
+    data["assignments"] = [_assignment_with_officer(a) for a in r.assignments]
+    return data
+
+
+def serialize_assignment(a):
+    data = _assignment_with_officer(a)
+    data["crime_report"] = serialize_report_summary(a.crime_report)
+    return data
+
+
+def serialize_officer(o):
+    data = _officer_fields(o)
+    data["assignments"] = []
+    for a in o.assignments:
+        assignment = _assignment_fields(a)
+        assignment["crime_report"] = serialize_report_summary(a.crime_report)
+        data["assignments"].append(assignment)
+    return data
+
+
+def serialize_category(c):
+    data = _category_fields(c)
+    data["crime_reports"] = []
+    for r in c.crime_reports:
+        report = _report_fields(r)
+        report["assignments"] = [_assignment_with_officer(a) for a in r.assignments]
+        data["crime_reports"].append(report)
+    return data
+
+
+def serialize_job(j):
+    return {
+        "id": j.id,
+        "kind": j.kind,
+        "params": j.params,
+        "status": j.status,
+        "progress": j.progress,
+        "total": j.total,
+        "message": j.message,
+        "result": j.result,
+        "error": j.error,
+        "attempts": j.attempts,
+        "max_attempts": j.max_attempts,
+        "run_at": _datetime(j.run_at),
+        "created_by": j.created_by,
+        "created_at": _datetime(j.created_at),
+        "started_at": _datetime(j.started_at),
+        "finished_at": _datetime(j.finished_at),
+    }
+
+
+# Flat rows by table name, for clients that keep their own copy of each
+# table and join it locally (/api/sync).
+ROW_SERIALIZERS = {
+    "police_officers": _officer_fields,
+    "crime_categories": _category_fields,
+    "crime_reports": _report_fields,
+    "assignments": _assignment_fields,
+}
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation that uses orjson when it is installed."""
+    resp = make_response(dumps(data) + b"\n", code)
+    resp.mimetype = "application/json"
+    resp.headers.extend(headers or {})
+    return resp
@@ -0,0 +1,96 @@
+from sqlalchemy import event, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import (
+    db, REPORT_STATUSES, StatCounter, PoliceOfficer, CrimeReport, Assignment, ArchivedCrimeReport, ArchivedAssignment,
+)
+
+COUNTERS = ("reports", *(f"reports.{status}" for status in REPORT_STATUSES), "officers", "assignments")
+
+
+@event.listens_for(StatCounter.__table__, "after_create")
+def _seed_counters(table, connection, **kw):
+    # db.create_all() starts every counter at zero alongside the empty
+    # tables; migrated databases are backfilled by add_stat_counters.
+    connection.execute(table.insert(), [{"name": name, "value": 0} for name in COUNTERS])
+
+
+def _insert_missing(name):
+    """Add a zero counter unless it exists; concurrent callers both succeed."""
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    db.session.execute(dialect.insert(StatCounter).values(name=name, value=0).on_conflict_do_nothing())
+
+
+def count_all(session=None):
+    """Every counter's true value, from GROUP BY queries over the base tables."""
+    session = session or db.session
+    counts = {"reports": 0, "officers": 0, "assignments": 0}
+    counts.update({f"reports.{status}": 0 for status in REPORT_STATUSES})
+
+    # Archived reports and assignments still count (see archive.py).
+    for report in (CrimeReport, ArchivedCrimeReport):
+        rows = session.query(report.status, func.count()).group_by(report.status)
+        for status, count in rows:
+            counts["reports"] += count
+            counts[f"reports.{status}"] += count
+    counts["officers"] = session.query(func.count(PoliceOfficer.id)).scalar()
+    counts["assignments"] = sum(
+        session.query(func.count(assignment.id)).scalar() for assignment in (Assignment, ArchivedAssignment)
+    )
+    return counts
+
+
+def rebuild_counters():
+    """Recompute every counter from the base tables with GROUP BY queries."""
+    StatCounter.query.delete()
+    counters = count_all()
+    db.session.add_all(StatCounter(name=name, value=value) for name, value in counters.items())
+    db.session.flush()
+    return counters
+
+
+def bump(*changes):
+    """Apply (name, delta) changes to the counters inside the caller's transaction.
+
+    Each change is a single UPDATE so concurrent writers never lose counts.
+    Counter rows are created with their table; one that has gone missing
+    is started again at zero rather than recounted here; the rebuild_stats
+    job recounts everything.
+    """
+    for name, delta in changes:
+        update = db.update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta)
+        if db.session.execute(update).rowcount == 0:
+            _insert_missing(name)
+            db.session.execute(update)
+
+
+def report_status_changed(old_status, new_status):
+    """Counter changes for a report moving between statuses; None means created or deleted."""
+    if old_status == new_status:
+        return
+    changes = []
+    if old_status is None:
+        changes.append(("reports", 1))
+    else:
+        changes.append((f"reports.{old_status}", -1))
+    if new_status is None:
+        changes.append(("reports", -1))
+    else:
+        changes.append((f"reports.{new_status}", 1))
+    bump(*changes)
+
+
+def get_counters():
+    return {c.name: c.value for c in StatCounter.query.all()}
+
+
+def summary(counters):
+    """The /api/stats response body."""
+    return {
+        "total_reports": counters.get("reports", 0),
+        "open_reports": counters.get("reports.open", 0),
+        "pending_reports": counters.get("reports.pending", 0),
+        "closed_reports": counters.get("reports.closed", 0),
+        "total_officers": counters.get("officers", 0),
+        "total_assignments": counters.get("assignments", 0),
+    }
@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, event, or_
+from werkzeug.exceptions import Gone
+
+from models import PoliceOfficer, CrimeCategory, CrimeReport, Assignment, Tombstone
+from serializers import ROW_SERIALIZERS
+
+COLLECTIONS = {
+    "officers": PoliceOfficer,
+    "categories": CrimeCategory,
+    "reports": CrimeReport,
+    "assignments": Assignment,
+}
+TABLE_COLLECTIONS = {model.__tablename__: name for name, model in COLLECTIONS.items()}
+DELETED = "deleted"
+
+
+class SyncExpired(Gone):
+    description = "since is older than the deletion history; sync again without it."
+
+
+def encode_token(positions):
+    data = {name: [ts.isoformat(), row_id] for name, (ts, row_id) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode()
+
+
+def decode_token(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return {
+            name: (datetime.fromisoformat(ts), int(row_id))
+            for name, (ts, row_id) in data.items()
+            if name in COLLECTIONS or name == DELETED
+        }
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid since token")
+
+
+class ChangeFeed:
+    """Rows created, updated or deleted since a client's last sync.
+
+    Each synced table is read in (updated_at, id) order, and deletes made
+    through the session leave a Tombstone that is read the same way. The
+    `since` token holds the client's position in each of them. Clients
+    should apply the deleted ids first and then upsert the changed rows.
+
+    updated_at is stamped when a transaction flushes, not when it commits,
+    so a slow transaction can commit rows behind a position a client has
+    already read past. Once a client is caught up its position is therefore
+    held SYNC_OVERLAP_SECONDS behind the present, and changes from that
+    window are sent again on the next sync; applying a row twice is harmless.
+
+    Bulk DELETE statements bypass the session and leave no tombstones;
+    archive.py writes its own.
+    """
+
+    def __init__(self):
+        self.overlap = timedelta(seconds=10)
+        self.retention = timedelta(days=30)
+
+    def init_app(self, app, db):
+        self.overlap = timedelta(seconds=app.config.get("SYNC_OVERLAP_SECONDS", 10))
+        self.retention = timedelta(days=app.config.get("SYNC_TOMBSTONE_DAYS", 30))
+        event.listen(db.session, "after_flush", self._record_deletes)
+
+    def _record_deletes(self, session, flush_context):
+        now = datetime.now()
+        rows = [
+            {"table_name": obj.__tablename__, "row_id": obj.id, "deleted_at": now}
+            for obj in session.deleted
+            if getattr(obj, "__tablename__", None) in TABLE_COLLECTIONS
+        ]
+        if rows:
+            conn = session.connection()
+            conn.execute(Tombstone.__table__.insert(), rows)
+            conn.execute(Tombstone.__table__.delete().where(Tombstone.deleted_at < now - self.retention))
+
+    def _page(self, query, ts_column, id_column, position, limit):
+        if position is not None:
+            ts, last_id = position
+            query = query.filter(or_(ts_column > ts, and_(ts_column == ts, id_column > last_id)))
+        rows = query.order_by(ts_column, id_column).limit(limit + 1).all()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            position = (getattr(rows[-1], ts_column.key), rows[-1].id)
+        return rows, position, more
+
+    def changes(self, since, limit):
+        now = datetime.now()
+        horizon = (now - self.overlap, 0)
+        # A new client starts from an empty copy, so it needs every row but
+        # only the deletes made while it pages through them.
+        positions = decode_token(since) if since else {DELETED: horizon}
+        if DELETED not in positions or positions[DELETED][0] < now - self.retention:
+            raise SyncExpired()
+
+        result, next_positions, has_more = {}, {}, False
+        for name, model in COLLECTIONS.items():
+            rows, next_positions[name], more = self._page(
+                model.query, model.updated_at, model.id, positions.get(name), limit,
+            )
+            serialize = ROW_SERIALIZERS[model.__tablename__]
+            result[name] = [serialize(row) for row in rows]
+            has_more = has_more or more
+
+        tombstones, next_positions[DELETED], more = self._page(
+            Tombstone.query, Tombstone.deleted_at, Tombstone.id, positions[DELETED], limit,
+        )
+        has_more = has_more or more
+        result[DELETED] = {name: [] for name in COLLECTIONS}
+        for tombstone in tombstones:
+            result[DELETED][TABLE_COLLECTIONS[tombstone.table_name]].append(tombstone.row_id)
+
+        if not has_more:
+            # Caught up: the next sync re-reads the overlap window.
+            next_positions = dict.fromkeys(next_positions, horizon)
+        result["since"] = encode_token(
+            {name: position for name, position in next_positions.items() if position is not None}
+        )
+        result["has_more"] = has_more
+        return result
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+# The server modules import each other by bare name (`from models import db`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from config import DevelopmentConfig  # noqa: E402
+from models import db  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    # The extensions listen on db.session, so every test module shares one app.
+    class TestConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+        BCRYPT_LOG_ROUNDS = 4
+        RECOMMENDATIONS_REFRESH_SECONDS = 3600
+
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def seeded(app):
+    """A fresh schema holding seed.generate's small data set, inside an app context."""
+    from cache import response_cache
+    from seed import generate
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(officers=5, reports=20, log=lambda message: None)
+        response_cache.backend.delete_prefix("response:")
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, seeded):
+    """A test client logged in as officer 1, an admin."""
+    from models import PoliceOfficer
+
+    db.session.execute(db.update(PoliceOfficer).where(PoliceOfficer.id == 1).values(role="admin"))
+    db.session.commit()
+    client = app.test_client()
+    response = client.post("/api/login", json={"email": "officer1@example.com", "password": "password123"})
+    assert response.status_code == 200
+    return client
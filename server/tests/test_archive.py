@@ -0,0 +1,91 @@
+"""Archiving closed reports: ids, lookups and what sync and stats see."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from archive import archive_reports
+from models import db, ArchivedAssignment, ArchivedCrimeReport, Assignment, CrimeReport
+from stats import get_counters
+
+
+def close_and_age(*ids):
+    db.session.execute(
+        db.update(CrimeReport).where(CrimeReport.id.in_(ids))
+        .values(status="closed", created_at=datetime.now() - timedelta(days=400))
+    )
+    db.session.commit()
+
+
+def archive():
+    return archive_reports(365, log=lambda message: None)
+
+
+def test_archived_reports_keep_their_ids_and_stay_readable(client):
+    close_and_age(3, 4)
+    assignment_ids = set(db.session.scalars(db.select(Assignment.id).where(Assignment.crime_report_id == 3)))
+
+    assert archive() == 2
+    assert db.session.get(CrimeReport, 3) is None
+    assert db.session.get(ArchivedCrimeReport, 3).status == "closed"
+    assert set(db.session.scalars(db.select(ArchivedAssignment.id).where(
+        ArchivedAssignment.crime_report_id == 3,
+    ))) == assignment_ids
+
+    assert client.get("/api/reports/3").get_json()["id"] == 3
+    live = [r["id"] for r in client.get("/api/reports?limit=100").get_json()["items"]]
+    merged = [r["id"] for r in client.get("/api/reports?limit=100&include_archived=true").get_json()["items"]]
+    assert 3 not in live
+    assert merged == sorted(live + [3, 4], reverse=True)
+
+
+def test_ids_of_archived_rows_are_never_handed_out_again(client):
+    newest = db.session.scalar(db.select(func.max(CrimeReport.id)))
+    newest_assignment = db.session.scalar(db.select(func.max(Assignment.id)))
+    report_id = db.session.scalar(db.select(Assignment.crime_report_id).where(Assignment.id == newest_assignment))
+    close_and_age(newest, report_id)
+    assert archive() >= 1
+
+    created = client.post("/api/reports", json={
+        "title": "New", "description": "d", "location": "Nairobi", "crime_category_id": 1,
+    }).get_json()
+    assert created["id"] > newest
+    assignment = client.post("/api/assignments", json={
+        "crime_report_id": created["id"], "officer_id": 1, "role_in_case": "Lead Investigator",
+    }).get_json()
+    assert assignment["id"] > newest_assignment
+    assert client.get(f"/api/reports/{created['id']}").get_json()["title"] == "New"
+
+
+def test_sync_sends_archived_rows_as_deleted(client):
+    since = client.get("/api/sync").get_json()["since"]
+    close_and_age(5)
+    assignment_ids = sorted(db.session.scalars(db.select(Assignment.id).where(Assignment.crime_report_id == 5)))
+    archive()
+
+    deleted = client.get("/api/sync", query_string={"since": since}).get_json()["deleted"]
+    assert deleted["reports"] == [5]
+    assert sorted(deleted["assignments"]) == assignment_ids
+
+
+def test_archived_reports_still_count_but_leave_search(client):
+    title = db.session.get(CrimeReport, 6).title
+    close_and_age(6)
+    before = get_counters()
+    archive()
+
+    assert get_counters() == before
+    hits = client.get("/api/reports/search", query_string={"q": title, "limit": 100}).get_json()["items"]
+    assert 6 not in [hit["id"] for hit in hits]
+
+
+def test_nothing_recent_or_open_is_archived(client):
+    db.session.execute(db.update(CrimeReport).where(CrimeReport.id == 7).values(status="closed"))
+    db.session.execute(
+        db.update(CrimeReport).where(CrimeReport.id == 8)
+        .values(status="open", created_at=datetime.now() - timedelta(days=400))
+    )
+    db.session.commit()
+
+    archive()
+    assert db.session.get(CrimeReport, 7) is not None
+    assert db.session.get(CrimeReport, 8) is not None
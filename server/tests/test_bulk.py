@@ -0,0 +1,125 @@
+"""Bulk report and assignment ingestion, and bulk status updates."""
+from sqlalchemy import func
+
+import resources
+from bulk import prepare_assignments
+from models import db, REPORT_STATUSES, Assignment, CrimeReport
+from stats import get_counters
+
+
+def report_item(**fields):
+    return {"title": "Bulk", "description": "Imported", "location": "Nairobi", "crime_category_id": 1, **fields}
+
+
+def test_ingest_reports_inserts_valid_items_and_reports_the_rest(client):
+    before = get_counters()
+    response = client.post("/api/reports/bulk", json=[
+        report_item(),
+        report_item(title=""),
+        report_item(status="lost"),
+        report_item(crime_category_id=999),
+        "not an object",
+        report_item(status="closed"),
+    ])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["inserted"] == 2
+    assert [(e["index"], e["error"]) for e in body["errors"]] == [
+        (1, "Missing required fields: title"),
+        (2, f"Status must be one of {REPORT_STATUSES}"),
+        (3, "Unknown crime_category_id 999"),
+        (4, "Expected a JSON object"),
+    ]
+    counters = get_counters()
+    assert counters["reports"] == before["reports"] + 2
+    assert counters["reports.open"] == before["reports.open"] + 1
+    assert counters["reports.closed"] == before["reports.closed"] + 1
+
+
+def test_ingest_reads_ndjson_and_reports_bad_lines(client):
+    lines = b'{"title": "A", "description": "d", "location": "Nairobi", "crime_category_id": 2}\n{oops\n\n'
+    response = client.post("/api/reports/bulk", data=lines, content_type="application/x-ndjson")
+
+    body = response.get_json()
+    assert body["inserted"] == 1
+    assert body["failed"] == 1
+    assert body["errors"][0]["index"] == 1
+    assert body["errors"][0]["error"].startswith("Invalid JSON")
+
+
+def test_ingest_rejects_a_body_that_is_not_a_list(client):
+    response = client.post("/api/reports/bulk", json={"title": "A"})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Expected a JSON array or an NDJSON stream"}
+
+
+def test_ingest_falls_back_to_row_by_row_when_the_chunk_conflicts(client, monkeypatch):
+    report_id = db.session.scalar(db.select(func.max(CrimeReport.id)))
+    taken = set(db.session.scalars(db.select(Assignment.officer_id).where(Assignment.crime_report_id == report_id)))
+    free = [officer_id for officer_id in range(1, 6) if officer_id not in taken]
+    assert len(free) >= 2
+
+    def racing_prepare(chunk):
+        # Another writer assigns the second officer after validation passed.
+        rows, errors = prepare_assignments(chunk)
+        db.session.add(Assignment(crime_report_id=report_id, officer_id=free[1], role_in_case="Support Officer"))
+        db.session.commit()
+        return rows, errors
+
+    monkeypatch.setattr(resources, "prepare_assignments", racing_prepare)
+    before = get_counters()["assignments"]
+    response = client.post("/api/assignments/bulk", json=[
+        {"crime_report_id": report_id, "officer_id": officer_id, "role_in_case": "Support Officer"}
+        for officer_id in free[:2]
+    ])
+
+    body = response.get_json()
+    assert body["inserted"] == 1
+    assert [e["index"] for e in body["errors"]] == [1]
+    assert "UNIQUE" in body["errors"][0]["error"]
+    assigned = set(db.session.scalars(db.select(Assignment.officer_id).where(Assignment.crime_report_id == report_id)))
+    assert assigned == taken | set(free[:2])
+    # The racing insert went through the session and bumped nothing.
+    assert get_counters()["assignments"] == before + 1
+
+
+def test_bulk_status_update_bumps_versions_so_stale_patches_fail(client):
+    report = client.get("/api/reports/1")
+    etag = report.headers["ETag"]
+    new_status = "pending" if report.get_json()["status"] == "closed" else "closed"
+
+    response = client.patch("/api/reports/bulk", json={"ids": [1, 2], "status": new_status})
+    assert response.status_code == 200
+    assert response.get_json()["status"] == new_status
+
+    assert client.get("/api/reports/1").headers["ETag"] != etag
+    stale = client.patch("/api/reports/1", json={"title": "Edited"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert db.session.get(CrimeReport, 1).title != "Edited"
+
+
+def test_bulk_status_update_keeps_counters_exact(client):
+    before = get_counters()
+    open_ids = list(db.session.scalars(db.select(CrimeReport.id).where(CrimeReport.status == "open")))
+
+    response = client.patch("/api/reports/bulk?status=open", json={"status": "closed"})
+
+    assert response.get_json()["updated"] == len(open_ids)
+    counters = get_counters()
+    assert counters["reports.open"] == 0
+    assert counters["reports.closed"] == before["reports.closed"] + len(open_ids)
+    assert counters["reports"] == before["reports"]
+
+
+def test_bulk_status_update_errors(client):
+    cases = [
+        ({"status": "closed"}, "Give ids or at least one filter; refusing to update every report"),
+        ({"ids": "1,2", "status": "closed"}, "ids must be a list of report ids"),
+        ({"ids": ["x"], "status": "closed"}, "ids must be a list of report ids"),
+    ]
+    for body, error in cases:
+        response = client.patch("/api/reports/bulk", json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {"error": error}
+    assert client.patch("/api/reports/bulk", json={"ids": [1], "status": "lost"}).status_code == 400
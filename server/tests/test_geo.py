@@ -0,0 +1,105 @@
+"""Geohashes, geocoding and the /near, /bbox and /heatmap queries."""
+import math
+import random
+
+import pytest
+
+from geo import EARTH_RADIUS_KM, MAX_RADIUS_KM, covering_ranges, geohash, geohash_text
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def file_report(client, **fields):
+    response = client.post("/api/reports", json={
+        "title": "Pothole", "description": "Deep", "location": "Nowhere in particular", "crime_category_id": 1,
+        **fields,
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def test_geohash_matches_the_base32_geohash():
+    assert geohash_text(geohash(57.64911, 10.40744) >> 5, 55) == "u4pruydqqvj"
+
+
+def test_covering_ranges_contain_every_point_in_the_box():
+    rnd = random.Random(0)
+    for _ in range(50):
+        lat, lon = rnd.uniform(-80, 80), rnd.uniform(-170, 170)
+        box = (lat, lon, lat + rnd.uniform(0, 5), lon + rnd.uniform(0, 5))
+        ranges = covering_ranges(box)
+        for _ in range(20):
+            cell = geohash(rnd.uniform(box[0], box[2]), rnd.uniform(box[1], box[3]))
+            assert any(start <= cell < end for start, end in ranges)
+
+
+def test_reports_are_geocoded_from_the_most_specific_known_place(client):
+    report = file_report(client, location="Westlands, Nairobi")
+    assert (report["latitude"], report["longitude"]) == (-1.2676, 36.8108)
+
+    unknown = file_report(client)
+    assert unknown["latitude"] is None and unknown["longitude"] is None
+
+
+def test_near_returns_reports_nearest_first_and_pages_through_them(client):
+    # Far from the seed data, which is all in Kenya.
+    lat, lon = 10.0, 10.0
+    # Filed out of distance order, plus one outside the radius.
+    ids = {km: file_report(client, latitude=lat + km / 111.2, longitude=lon)["id"] for km in (2.5, 0.1, 7.0, 0.9, 20)}
+
+    seen, cursor = [], None
+    while True:
+        query = {"lat": lat, "lon": lon, "radius": 10, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/reports/near", query_string=query).get_json()
+        seen += body["items"]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert [r["id"] for r in seen] == [ids[km] for km in (0.1, 0.9, 2.5, 7.0)]
+    for report in seen:
+        expected = haversine_km(lat, lon, report["latitude"], report["longitude"])
+        assert report["distance_km"] == pytest.approx(expected, rel=0.01, abs=0.001)
+
+
+def test_bbox_and_heatmap_agree(client):
+    box = {"min_lat": -5, "min_lon": 33, "max_lat": 5, "max_lon": 42}
+    in_box = client.get("/api/reports/bbox", query_string={**box, "limit": 100}).get_json()["items"]
+    for report in in_box:
+        assert box["min_lat"] <= report["latitude"] <= box["max_lat"]
+        assert box["min_lon"] <= report["longitude"] <= box["max_lon"]
+
+    heatmap = client.get("/api/reports/heatmap", query_string={**box, "precision": 3}).get_json()
+    assert heatmap["precision"] == 3
+    assert sum(cell["count"] for cell in heatmap["cells"]) == len(in_box)
+    assert all(len(cell["geohash"]) == 3 for cell in heatmap["cells"])
+
+
+@pytest.mark.parametrize("path, query, error", [
+    ("/api/reports/near", {"lat": 1}, "lat and lon are required"),
+    ("/api/reports/near", {"lat": 95, "lon": 0}, "Latitude must be between -90 and 90"),
+    ("/api/reports/near", {"lat": 0, "lon": 0, "radius": MAX_RADIUS_KM + 1},
+     f"radius must be greater than 0 and at most {MAX_RADIUS_KM} km"),
+    ("/api/reports/near", {"lat": 0, "lon": 0, "cursor": "junk"}, "Invalid cursor"),
+    ("/api/reports/bbox", {"min_lat": 0, "min_lon": 0}, "min_lat, min_lon, max_lat and max_lon are required"),
+    ("/api/reports/bbox", {"min_lat": 1, "min_lon": 0, "max_lat": 0, "max_lon": 1},
+     "min_lat and min_lon must not exceed max_lat and max_lon"),
+    ("/api/reports/heatmap", {"precision": 13}, "precision must be between 1 and 12"),
+    ("/api/reports/heatmap", {"precision": 6}, "precision 6 is too fine for this box; zoom in or lower it"),
+])
+def test_bad_geo_queries_are_rejected(client, path, query, error):
+    response = client.get(path, query_string=query)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+
+
+def test_a_lone_coordinate_is_rejected(client):
+    response = client.post("/api/reports", json={
+        "title": "Pothole", "description": "Deep", "location": "Nairobi", "crime_category_id": 1, "latitude": 1.0,
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "latitude and longitude must be given together"}
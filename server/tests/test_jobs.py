@@ -0,0 +1,161 @@
+"""The job queue: claiming, leases, retries with backoff, and worker.py."""
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+import worker
+from jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, Task, job_queue
+from models import db, CrimeCategory, Job
+
+
+@pytest.fixture
+def flaky(seeded, monkeypatch):
+    """Register a "flaky" task that fails its first `failures[0]` attempts."""
+    failures = [0]
+
+    def run(context, name="Flaky"):
+        # Left uncommitted: run() commits it together with the result.
+        db.session.add(CrimeCategory(name=f"{name} {context.job_id}"))
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    monkeypatch.setitem(job_queue.tasks, "flaky", Task(run))
+    return failures
+
+
+def submit(kind="flaky", params=None, **values):
+    job = job_queue.enqueue(kind, params)
+    for name, value in values.items():
+        setattr(job, name, value)
+    db.session.commit()
+    return job.id
+
+
+def make_due(job_id):
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(run_at=datetime.now() - timedelta(seconds=1)))
+    db.session.commit()
+
+
+def test_claim_takes_the_oldest_due_job_once(flaky):
+    later = submit(run_at=datetime.now() + timedelta(hours=1))
+    first, second = submit(), submit()
+
+    job = job_queue.claim("w1")
+    assert (job.id, job.status, job.worker, job.attempts) == (first, RUNNING, "w1", 1)
+    assert job_queue.claim("w2").id == second
+    assert job_queue.claim("w3") is None
+    assert db.session.get(Job, later).status == QUEUED
+
+
+def test_sqlite_never_takes_over_a_lease(flaky):
+    job_id = submit()
+    job_queue.claim("w1")
+    stale = datetime.now() - timedelta(seconds=job_queue.lease_seconds + 1)
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(heartbeat_at=stale))
+    db.session.commit()
+
+    assert job_queue.claim("w2") is None
+
+
+def test_an_expired_lease_is_taken_over_elsewhere(flaky, monkeypatch):
+    job_id = submit()
+    job_queue.claim("w1")
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+        heartbeat_at=datetime.now() - timedelta(seconds=job_queue.lease_seconds + 1),
+    ))
+    db.session.commit()
+    # The lease rule as Postgres applies it; SQLite renders FOR UPDATE as nothing.
+    monkeypatch.setattr(db.engine.dialect, "name", "postgresql")
+
+    job = job_queue.claim("w2")
+    assert (job.id, job.worker, job.attempts) == (job_id, "w2", 2)
+
+
+def test_failed_attempts_back_off_exponentially_then_fail(flaky):
+    flaky[0] = 3
+    job_id = submit()
+
+    for attempt in (1, 2):
+        before = datetime.now()
+        assert job_queue.run(job_queue.claim("w1")) == QUEUED
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        delay = job_queue.retry_seconds * 2 ** (attempt - 1)
+        assert before + timedelta(seconds=delay) <= job.run_at <= datetime.now() + timedelta(seconds=delay)
+        assert job.error == "RuntimeError: boom"
+        # Not due until the backoff has passed.
+        assert job_queue.claim("w1") is None
+        make_due(job_id)
+
+    assert job_queue.run(job_queue.claim("w1")) == FAILED
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert (job.status, job.attempts, job.error) == (FAILED, 3, "RuntimeError: boom")
+    # A failed attempt's writes are rolled back with it.
+    assert db.session.scalar(db.select(db.func.count()).where(CrimeCategory.name == f"Flaky {job_id}")) == 0
+
+
+def test_success_commits_the_result_with_the_tasks_writes(flaky):
+    flaky[0] = 1
+    job_id = submit(params={"name": "Arson"})
+    job_queue.run(job_queue.claim("w1"))
+    make_due(job_id)
+
+    assert job_queue.run(job_queue.claim("w1")) == SUCCEEDED
+    job = db.session.get(Job, job_id)
+    db.session.refresh(job)
+    assert (job.status, job.result, job.error, job.attempts) == (SUCCEEDED, {"ok": True}, None, 2)
+    assert db.session.scalar(db.select(CrimeCategory.name).where(CrimeCategory.name == f"Arson {job_id}"))
+
+
+def test_a_job_whose_last_worker_died_is_not_run_again(flaky):
+    job_id = submit(attempts=3)
+    job = job_queue.claim("w1")
+    assert job.attempts == 4
+
+    assert job_queue.run(job) == FAILED
+    db.session.refresh(job)
+    assert job.error == "The worker running this job stopped responding."
+    assert db.session.scalar(db.select(db.func.count()).where(CrimeCategory.name == f"Flaky {job_id}")) == 0
+
+
+def test_a_job_of_an_unregistered_kind_fails(flaky, monkeypatch):
+    job_id = submit(max_attempts=1)
+    monkeypatch.delitem(job_queue.tasks, "flaky")
+
+    assert job_queue.run(job_queue.claim("w1")) == FAILED
+    assert db.session.get(Job, job_id).error == "LookupError: No task is registered for 'flaky' jobs"
+
+
+def test_submitting_jobs_validates_kind_and_params(client):
+    cases = [
+        ({"kind": "nope"}, "kind must be one of"),
+        ({"kind": "export_reports", "params": "csv"}, "params must be an object"),
+        ({"kind": "export_reports", "params": {"format": "xml"}}, "format must be one of"),
+        ({"kind": "export_reports", "params": {"colour": "red"}}, "Unknown export params: colour"),
+    ]
+    for body, error in cases:
+        response = client.post("/api/jobs", json=body)
+        assert response.status_code == 400
+        assert response.get_json()["error"].startswith(error)
+    assert db.session.scalar(db.select(db.func.count(Job.id))) == 0
+
+
+def test_burst_worker_runs_every_due_job_and_exits(app, flaky, monkeypatch):
+    due = [submit(), submit()]
+    later = submit(run_at=datetime.now() + timedelta(hours=1))
+    # Through the module dict: getattr would build a second app (app.__getattr__).
+    monkeypatch.setitem(vars(app_module), "app", app)
+    monkeypatch.setattr(worker.signal, "signal", lambda signum, handler: None)
+    monkeypatch.setattr(sys, "argv", ["worker.py", "--burst", "--name", "test"])
+
+    worker.main()
+
+    jobs = [db.session.get(Job, job_id) for job_id in (*due, later)]
+    for job in jobs:
+        db.session.refresh(job)
+    assert [(job.status, job.worker) for job in jobs] == [(SUCCEEDED, "test"), (SUCCEEDED, "test"), (QUEUED, None)]
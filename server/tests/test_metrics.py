@@ -0,0 +1,31 @@
+"""Request metrics count every response, including unhandled exceptions."""
+import pytest
+
+import resources
+from metrics import metrics
+
+
+def requests_total(endpoint, status):
+    return metrics.requests.series.get((endpoint, "GET", str(status)), 0)
+
+
+def test_handled_responses_are_counted_by_status(client):
+    ok, missing = requests_total("stats", 200), requests_total("crimereportresource", 404)
+    client.get("/api/stats")
+    client.get("/api/reports/99999")
+
+    assert requests_total("stats", 200) == ok + 1
+    assert requests_total("crimereportresource", 404) == missing + 1
+
+
+def test_unhandled_exceptions_are_counted_as_500(client, monkeypatch):
+    def broken(counters):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(resources, "summary", broken)
+    before = requests_total("stats", 500)
+    # The test app propagates exceptions, so after_request never sees a response.
+    with pytest.raises(RuntimeError):
+        client.get("/api/stats")
+
+    assert requests_total("stats", 500) == before + 1
@@ -0,0 +1,85 @@
+"""Statements per request must not grow with the data.
+
+Every list and detail endpoint is requested against a small and a larger
+generated data set, counting the SQL statements each sends. An N+1 (a
+relationship loaded row by row) shows up as a count that grows with the
+number of rows on the page or embedded in it.
+"""
+from sqlalchemy import event
+
+from models import db
+
+# Large enough to fill a page of every list, small enough that no embedded
+# collection passes selectinload's 500-key batches.
+SIZES = {"small": {"officers": 5, "reports": 20}, "large": {"officers": 60, "reports": 400}}
+
+ENDPOINTS = [
+    "/api/officers",
+    "/api/officers/1",
+    "/api/reports",
+    "/api/reports/1",
+    "/api/reports/search?q={word}",
+    "/api/reports/near?lat=-1.2864&lon=36.8172&radius=50",
+    "/api/reports/bbox?min_lat=-90&min_lon=-180&max_lat=90&max_lon=180",
+    "/api/reports/heatmap",
+    "/api/reports/1/recommended-officers",
+    "/api/assignments",
+    "/api/assignments/1",
+    "/api/categories",
+    "/api/categories/1",
+    "/api/analytics/timeseries",
+    "/api/sync",
+    "/api/jobs",
+    "/api/stats",
+]
+
+
+def count_queries(app, size):
+    """Statements sent by each endpoint, against a fresh data set of `size`."""
+    from cache import response_cache
+    from jobs import job_queue
+    from models import CrimeReport
+    from seed import generate
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(**SIZES[size], log=lambda message: None)
+        for _ in range(SIZES[size]["officers"]):
+            job_queue.enqueue("export_reports", created_by=1)
+        db.session.commit()
+        # So the search has hits at both sizes.
+        word = db.session.get(CrimeReport, 1).title.split()[0]
+        engine = db.engine
+    paths = {path: path.format(word=word) for path in ENDPOINTS}
+
+    client = app.test_client()
+    client.post("/api/login", json={"email": "officer1@example.com", "password": "password123"})
+    # Load anything loaded once per process or data set (the workload index,
+    # counters) before counting.
+    for path in paths.values():
+        assert client.get(path).status_code == 200, path
+    response_cache.backend.delete_prefix("response:")
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    counts = {}
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for endpoint, path in paths.items():
+            del statements[:]
+            assert client.get(path).status_code == 200, path
+            counts[endpoint] = len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return counts
+
+
+def test_query_counts_do_not_grow_with_the_data(app):
+    small = count_queries(app, "small")
+    large = count_queries(app, "large")
+    grown = {path: (small[path], large[path]) for path in ENDPOINTS if large[path] > small[path]}
+    assert not grown, f"statements per request grew with the data (small, large): {grown}"
@@ -0,0 +1,72 @@
+"""/api/sync tombstones: deletes reach clients as ids, until they expire."""
+from datetime import datetime, timedelta
+
+from models import db, Assignment, Tombstone
+from sync import DELETED, change_feed, decode_token, encode_token
+
+
+def sync(client, since=None, limit=None):
+    params = {k: v for k, v in (("since", since), ("limit", limit)) if v is not None}
+    return client.get("/api/sync", query_string=params)
+
+
+def test_deleted_report_is_sent_as_a_tombstone(client):
+    since = sync(client).get_json()["since"]
+    created = client.post("/api/reports", json={
+        "title": "Lost bike", "description": "Taken", "location": "Nairobi", "crime_category_id": 1,
+    }).get_json()
+    assert client.delete(f"/api/reports/{created['id']}").status_code == 204
+
+    body = sync(client, since).get_json()
+    assert body["deleted"]["reports"] == [created["id"]]
+
+
+def test_session_deletes_leave_tombstones_for_every_synced_table(client):
+    since = sync(client).get_json()["since"]
+    assignment = db.session.get(Assignment, 1)
+    db.session.delete(assignment)
+    db.session.commit()
+
+    deleted = sync(client, since).get_json()["deleted"]
+    assert deleted == {"officers": [], "categories": [], "reports": [], "assignments": [1]}
+
+
+def test_tombstones_page_with_the_rest(client):
+    since = sync(client).get_json()["since"]
+    for assignment_id in (1, 2, 3):
+        db.session.delete(db.session.get(Assignment, assignment_id))
+    db.session.commit()
+
+    first = sync(client, since, limit=2).get_json()
+    assert first["deleted"]["assignments"] == [1, 2]
+    assert first["has_more"] is True
+    second = sync(client, first["since"], limit=2).get_json()
+    assert 3 in second["deleted"]["assignments"]
+
+
+def test_expired_tombstones_are_purged_on_the_next_delete(client):
+    old = datetime.now() - change_feed.retention - timedelta(days=1)
+    db.session.add(Tombstone(table_name="assignments", row_id=999, deleted_at=old))
+    db.session.commit()
+
+    db.session.delete(db.session.get(Assignment, 1))
+    db.session.commit()
+
+    assert db.session.scalars(db.select(Tombstone.row_id)).all() == [1]
+
+
+def test_token_older_than_the_retention_is_gone(client):
+    positions = decode_token(sync(client).get_json()["since"])
+    positions[DELETED] = (datetime.now() - change_feed.retention - timedelta(minutes=1), 0)
+
+    response = sync(client, encode_token(positions))
+    assert response.status_code == 410
+    # So is a token that never saw the deletion history.
+    del positions[DELETED]
+    assert sync(client, encode_token(positions)).status_code == 410
+
+
+def test_invalid_token(client):
+    response = sync(client, "not-a-token")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid since token"}
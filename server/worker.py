@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Run background jobs (see jobs.py) until stopped.
+
+    python server/worker.py            # what Procfile.dev runs next to gunicorn
+    python server/worker.py --burst    # exit once no job is due
+
+Each worker runs one job at a time; start more for more parallelism.
+SIGTERM and Ctrl-C let the running job finish before the worker exits.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger("worker")
+
+# How often an idle worker removes jobs older than JOBS_RETENTION_DAYS.
+PURGE_INTERVAL = 3600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", action="store_true", help="exit once no job is due")
+    parser.add_argument("--name", default=f"{socket.gethostname()}:{os.getpid()}", help="recorded on the jobs it runs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from app import app
+    from jobs import job_queue
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("stopping after the current job")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    logger.info("worker %s waiting for jobs", args.name)
+    purged_at = None
+    while not stop.is_set():
+        try:
+            with app.app_context():
+                if purged_at is None or time.monotonic() - purged_at > PURGE_INTERVAL:
+                    purged_at = time.monotonic()
+                    removed = job_queue.purge()
+                    if removed:
+                        logger.info("removed %s finished jobs", removed)
+                job = job_queue.claim(args.name)
+                if job is not None:
+                    logger.info("running job %s (%s), attempt %s", job.id, job.kind, job.attempts)
+                    job_queue.run(job)
+                    continue
+        except SQLAlchemyError as e:
+            # The database going away should not take the worker with it.
+            logger.warning("job queue unavailable: %s", e)
+        if args.burst:
+            break
+        stop.wait(job_queue.poll_seconds)
+
+
+if __name__ == "__main__":
+    main()